@@ -1,10 +1,13 @@
 from contextlib import asynccontextmanager
-from .router import router, scraper
+from .router import router, scraper, job_manager, scheduler
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
+from core.config import SCHEDULER_ENABLED
 from core.logging import setup_logging
+from db.session import init_engine, dispose_engine, get_pool_status
 
 from app.services.s3_session_manager import s3_manager
 
@@ -25,6 +28,8 @@ def init_routers(api: FastAPI) -> None:
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    init_engine()
+
     try:
         await scraper.initialize()
         print("✅ Telegram scraper initialized")
@@ -32,9 +37,16 @@ async def lifespan(app: FastAPI):
         print(f"❌ Failed to initialize scraper: {e}")
         raise
 
+    await job_manager.start()
+    if SCHEDULER_ENABLED:
+        await scheduler.start()
+
     yield
 
+    await scheduler.stop()
+    await job_manager.stop()
     await scraper.disconnect()
+    await dispose_engine()
 
 
 def create_api() -> FastAPI:
@@ -59,7 +71,7 @@ setup_logging()
 
 @api.get("/health")
 async def health_check():
-    """Health check with S3 status"""
+    """Health check with S3 and database pool status"""
     s3_status = "available" if s3_manager._initialized else "unavailable"
 
     return {
@@ -67,4 +79,17 @@ async def health_check():
         "service": "telegram-scraper",
         "s3_storage": s3_status,
         "session_file": s3_manager.get_session_path(),
+        "session_sync": s3_manager.stats.as_dict(),
+        "telegram_accounts": scraper.pool.health(),
+        "database_pool": get_pool_status(),
+        "entity_cache": scraper.entity_cache.stats(),
+        "scrape_coalescing": scraper.scrape_flights.stats(),
+        "scrape_jobs": job_manager.stats(),
+        "scheduler": scheduler.stats(),
     }
+
+
+@api.get("/metrics")
+async def metrics():
+    """Prometheus metrics: per-stage latency histograms, in-flight gauges and counters"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
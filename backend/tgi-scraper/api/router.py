@@ -1,32 +1,246 @@
-from fastapi import HTTPException, APIRouter
+from datetime import datetime
+from typing import Any, AsyncIterator, Literal
+from uuid import UUID
+
+from fastapi import HTTPException, APIRouter, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
+import orjson
+
+from core.config import (
+    ANALYTICS_MAX_MESSAGES,
+    SCRAPE_BATCH_CONCURRENCY,
+    SCRAPE_BATCH_MAX_CHANNELS,
+    SNAPSHOT_REVALIDATE_AFTER,
+)
 from app.services.telegram_scraper import TelegramScraper
-from app.schemas.stats import ScrapeRequest, ScrapeResponse
+from app.services.scrape_jobs import ScrapeJobManager
+from app.services.scheduler import WatchlistScheduler
+from app.services.rollups import GRANULARITY_HOUR
+from app.services.analytics import ChannelAnalytics
+from app.services.export import (
+    ChannelExporter,
+    EXPORT_EXTENSIONS,
+    EXPORT_FORMAT_PARQUET,
+    EXPORT_MEDIA_TYPES,
+)
+from app.schemas.stats import (
+    ScrapeRequest,
+    ScrapeResponse,
+    ScrapeBatchRequest,
+    MetricsRefreshRequest,
+    MetricsRefreshResponse,
+    ScrapeJobResponse,
+    WatchlistRequest,
+    WatchedChannelResponse,
+)
 
 
 router = APIRouter(prefix="", tags=["channels"])
 scraper = TelegramScraper()
+job_manager = ScrapeJobManager(scraper)
+scheduler = WatchlistScheduler(scraper)
+analytics = ChannelAnalytics()
+exporter = ChannelExporter()
+
+
+def job_response(job) -> ScrapeJobResponse:
+    return ScrapeJobResponse(
+        job_id=job.id,
+        status=job.status,
+        progress=job.progress,
+        request=job.request,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        error=job.error,
+        result=job.result,
+    )
+
+
+def scrape_response(result: dict[str, Any]) -> ORJSONResponse:
+    """Scrape result serialized with orjson as is.
+
+    The result is not validated against ScrapeResponse at runtime: messages
+    are built from typed records (or ORM rows for snapshots) in that shape,
+    and `response_model` on the route only documents it in OpenAPI.
+    """
+    return ORJSONResponse(result)
+
+
+def watched_channel_response(channel) -> WatchedChannelResponse:
+    return WatchedChannelResponse(
+        channel_identifier=channel.channel_identifier,
+        channel_id=channel.channel_id,
+        interval_seconds=channel.interval_seconds,
+        limit_messages=channel.limit_messages,
+        priority=channel.priority,
+        subscribers_count=channel.subscribers_count,
+        posts_per_day=channel.posts_per_day,
+        next_run_at=channel.next_run_at,
+        last_run_at=channel.last_run_at,
+        last_error=channel.last_error,
+        failures=channel.failures,
+    )
 
 
 @router.post("/scrape", response_model=ScrapeResponse)
 async def scrape_channel_route(request: ScrapeRequest):
     """Scrape channel statistics. The operation collects and returns current channel metrics including subscribers, views, and engagement data."""
     try:
+        if request.max_age is not None and not request.incremental:
+            snapshot = await scraper.get_recent_snapshot(
+                request.channel_identifier,
+                request.limit_messages,
+                request.max_age,
+                include_text=request.include_text,
+            )
+            if snapshot is not None:
+                if (
+                    request.background_refresh
+                    and snapshot["data_age"] >= SNAPSHOT_REVALIDATE_AFTER
+                ):
+                    scraper.schedule_refresh(
+                        request.channel_identifier, request.limit_messages
+                    )
+                return scrape_response(snapshot)
+
         result = await scraper.scrape_channel_stats(
+            request.channel_identifier,
+            request.limit_messages,
+            incremental=request.incremental,
+            hot_window_hours=request.hot_window_hours,
+            include_text=request.include_text,
+        )
+        return scrape_response(result)
+
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def ndjson_line(item: dict[str, Any]) -> bytes:
+    return orjson.dumps(item, default=str) + b"\n"
+
+
+async def ndjson_stream(
+    header: dict[str, Any], items: AsyncIterator[dict[str, Any]]
+) -> AsyncIterator[bytes]:
+    yield ndjson_line(header)
+    try:
+        async for item in items:
+            yield ndjson_line(item)
+    except Exception as e:
+        yield ndjson_line({"type": "error", "detail": str(e)})
+
+
+@router.post("/scrape/stream")
+async def scrape_channel_stream_route(request: ScrapeRequest):
+    """Scrape channel statistics as NDJSON. The operation streams a channel header line, one line per message as it is fetched and a final summary line; messages are saved in chunks along the way."""
+    items = scraper.stream_channel_stats(
+        request.channel_identifier,
+        request.limit_messages,
+        incremental=request.incremental,
+        hot_window_hours=request.hot_window_hours,
+        include_text=request.include_text,
+    )
+    try:
+        header = await anext(items)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(
+        ndjson_stream(header, items), media_type="application/x-ndjson"
+    )
+
+
+@router.post("/scrape/batch")
+async def scrape_batch_route(request: ScrapeBatchRequest):
+    """Scrape many channels in one request as NDJSON. The operation scrapes channels concurrently and streams a `result` or `error` line per channel as soon as it finishes; each channel is saved in its own transaction before its `result` line is sent, and concurrent scrapes of the same channel share one fetch with `/scrape`."""
+    if not request.channels:
+        raise HTTPException(status_code=400, detail="No channels given")
+    if len(request.channels) > SCRAPE_BATCH_MAX_CHANNELS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {SCRAPE_BATCH_MAX_CHANNELS} channels per batch",
+        )
+
+    concurrency = max(
+        1,
+        min(request.concurrency or SCRAPE_BATCH_CONCURRENCY, SCRAPE_BATCH_CONCURRENCY),
+    )
+    items = scraper.scrape_batch(
+        [channel.model_dump() for channel in request.channels],
+        concurrency,
+        include_text=request.include_text,
+    )
+    header = {
+        "type": "batch",
+        "channels": len(request.channels),
+        "concurrency": concurrency,
+    }
+    return StreamingResponse(
+        ndjson_stream(header, items), media_type="application/x-ndjson"
+    )
+
+
+@router.post("/jobs", response_model=ScrapeJobResponse, status_code=202)
+async def submit_scrape_job_route(request: ScrapeRequest):
+    """Submit a scrape job. The operation queues the scrape and returns a job ID that can be polled for progress and the result."""
+    job = await job_manager.submit(
+        request.model_dump(
+            include={
+                "channel_identifier",
+                "limit_messages",
+                "incremental",
+                "hot_window_hours",
+            }
+        )
+    )
+    return job_response(job)
+
+
+@router.get("/jobs/{job_id}", response_model=ScrapeJobResponse)
+async def get_scrape_job_route(job_id: UUID):
+    """Get scrape job status. The operation returns the job status, the number of messages fetched so far and the final result."""
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_response(job)
+
+
+@router.delete("/jobs/{job_id}", response_model=ScrapeJobResponse)
+async def cancel_scrape_job_route(job_id: UUID):
+    """Cancel a scrape job. The operation stops a queued or running job."""
+    job = await job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_response(job)
+
+
+@router.post("/scrape/metrics", response_model=MetricsRefreshResponse)
+async def refresh_channel_metrics_route(request: MetricsRefreshRequest):
+    """Refresh post counters. The operation updates views, forwards and replies of already stored posts without downloading message bodies."""
+    try:
+        result = await scraper.refresh_channel_metrics(
             request.channel_identifier, request.limit_messages
         )
-        return ScrapeResponse(**result)
+        return MetricsRefreshResponse(**result)
 
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/stats/{channel_id}")
-async def get_channel_stats_route(channel_id: int, limit: int = 5):
-    """Get channel statistics history. The operation returns historical metrics for the specified channel including subscriber growth and engagement trends."""
+async def get_channel_stats_route(
+    channel_id: int, limit: int = Query(5, ge=1, le=500), cursor: str | None = None
+):
+    """Get channel statistics history. The operation returns historical metrics for the specified channel including subscriber growth and engagement trends, newest first; pass `next_cursor` back as `cursor` to get the next page."""
     try:
-        stats = await scraper.get_channel_history(channel_id, limit)
+        stats, next_cursor = await scraper.get_channel_history(
+            channel_id, limit, cursor
+        )
         return {
             "channel_id": channel_id,
+            "next_cursor": next_cursor,
             "history": [
                 {
                     "scraped_at": stat.scraped_at,
@@ -38,5 +252,120 @@ async def get_channel_stats_route(channel_id: int, limit: int = 5):
                 for stat in stats
             ],
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/stats/{channel_id}/series")
+async def get_channel_series_route(
+    channel_id: int,
+    granularity: Literal["hour", "day"] = GRANULARITY_HOUR,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = Query(168, ge=1, le=5000),
+):
+    """Get hourly or daily channel aggregates. The operation reads precomputed rollups only: subscriber deltas, post counts, view sums and percentiles, forwards and reaction totals per bucket, oldest first."""
+    try:
+        rollups = await scraper.rollups.get_series(
+            channel_id, granularity, since, until, limit
+        )
+        return {
+            "channel_id": channel_id,
+            "granularity": granularity,
+            "series": [
+                {
+                    "bucket_start": rollup.bucket_start,
+                    "snapshots": rollup.snapshots,
+                    "subscribers_open": rollup.subscribers_open,
+                    "subscribers_close": rollup.subscribers_close,
+                    "subscribers_delta": rollup.subscribers_delta,
+                    "posts": rollup.posts,
+                    "views_sum": rollup.views_sum,
+                    "views_p50": rollup.views_p50,
+                    "views_p90": rollup.views_p90,
+                    "forwards_sum": rollup.forwards_sum,
+                    "reactions_total": rollup.reactions_total,
+                }
+                for rollup in rollups
+            ],
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/stats/{channel_id}/engagement")
+async def get_channel_engagement_route(
+    channel_id: int,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = Query(ANALYTICS_MAX_MESSAGES, ge=1, le=ANALYTICS_MAX_MESSAGES),
+):
+    """Get channel engagement analytics. The operation computes ER per post, view percentiles, view-decay curve, posting hour by weekday heatmap, media vs text performance and reaction mix over the latest stored posts."""
+    try:
+        result = await analytics.get_engagement(channel_id, since, until, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if result is None:
+        raise HTTPException(status_code=404, detail="No messages stored for channel")
+    return result
+
+
+async def chunked_stream(
+    first: bytes, chunks: AsyncIterator[bytes]
+) -> AsyncIterator[bytes]:
+    yield first
+    async for chunk in chunks:
+        yield chunk
+
+
+@router.get("/export/{channel_id}")
+async def export_channel_route(
+    channel_id: int,
+    table: Literal["messages", "channel"] = "messages",
+    format: Literal["parquet", "arrow"] = EXPORT_FORMAT_PARQUET,
+    since: datetime | None = None,
+    until: datetime | None = None,
+):
+    """Export stored channel data as Parquet or Arrow IPC stream. The operation reads message (or channel snapshot) rows in chunks, optionally limited to a date range, and streams the encoded file as it is written."""
+    chunks = exporter.export(channel_id, table, format, since, until)
+    try:
+        first = await anext(chunks)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+    filename = f"channel_{channel_id}_{table}.{EXPORT_EXTENSIONS[format]}"
+    return StreamingResponse(
+        chunked_stream(first, chunks),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/watchlist", response_model=list[WatchedChannelResponse])
+async def get_watchlist_route():
+    """Get watched channels. The operation lists channels refreshed in the background, highest priority first, with their schedule and last run outcome."""
+    return [watched_channel_response(channel) for channel in await scheduler.channels()]
+
+
+@router.post("/watchlist", response_model=WatchedChannelResponse)
+async def add_to_watchlist_route(request: WatchlistRequest):
+    """Add a channel to the watchlist. The operation schedules periodic background refreshes of the channel or updates the interval of an already watched one."""
+    try:
+        channel = await scheduler.add(
+            request.channel_identifier,
+            request.interval_seconds,
+            request.limit_messages,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return watched_channel_response(channel)
+
+
+@router.delete("/watchlist/{channel_identifier:path}", status_code=204)
+async def remove_from_watchlist_route(channel_identifier: str):
+    """Remove a channel from the watchlist. The operation stops background refreshes; stored data is kept."""
+    if not await scheduler.remove(channel_identifier):
+        raise HTTPException(status_code=404, detail="Channel is not watched")
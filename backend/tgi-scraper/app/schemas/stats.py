@@ -1,11 +1,17 @@
 from datetime import datetime
 from typing import Optional, Dict, Any, List
+from uuid import UUID
 from pydantic import BaseModel
 
 
 class ScrapeRequest(BaseModel):
     channel_identifier: str
     limit_messages: int = 100
+    incremental: bool = False
+    hot_window_hours: Optional[int] = None
+    max_age: Optional[int] = None
+    background_refresh: bool = False
+    include_text: bool = True
 
 
 class MessageStatsResponse(BaseModel):
@@ -15,11 +21,24 @@ class MessageStatsResponse(BaseModel):
     forwards: Optional[int]
     replies: Optional[int]
     reactions: Dict[str, int]
-    text: str
+    text: Optional[str] = None
     media_type: Optional[str]
     has_media: bool
 
 
+class BatchScrapeItem(BaseModel):
+    channel_identifier: str
+    limit_messages: int = 100
+    incremental: bool = False
+    hot_window_hours: Optional[int] = None
+
+
+class ScrapeBatchRequest(BaseModel):
+    channels: List[BatchScrapeItem]
+    concurrency: Optional[int] = None
+    include_text: bool = True
+
+
 class ScrapeResponse(BaseModel):
     channel_id: int
     username: Optional[str]
@@ -28,6 +47,40 @@ class ScrapeResponse(BaseModel):
     subscribers_count: Optional[int]
     participants_count: Optional[int]
     messages: List[MessageStatsResponse]
+    scraped_at: Optional[datetime] = None
+    data_age: Optional[float] = None
+    from_cache: bool = False
+
+
+class ScrapeJobResponse(BaseModel):
+    job_id: UUID
+    status: str
+    progress: int
+    request: Dict[str, Any]
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    result: Optional[ScrapeResponse] = None
+
+
+class MetricsRefreshRequest(BaseModel):
+    channel_identifier: str
+    limit_messages: int = 100
+
+
+class MessageMetricsResponse(BaseModel):
+    message_id: int
+    views: Optional[int]
+    forwards: Optional[int]
+    replies: Optional[int]
+
+
+class MetricsRefreshResponse(BaseModel):
+    channel_id: int
+    requested: int
+    updated: int
+    messages: List[MessageMetricsResponse]
 
 
 class ChannelStatsResponse(BaseModel):
@@ -40,3 +93,23 @@ class ChannelStatsResponse(BaseModel):
     avg_views: Optional[float]
     avg_reactions: Optional[float]
     scraped_at: datetime
+
+
+class WatchlistRequest(BaseModel):
+    channel_identifier: str
+    interval_seconds: Optional[int] = None
+    limit_messages: int = 100
+
+
+class WatchedChannelResponse(BaseModel):
+    channel_identifier: str
+    channel_id: Optional[int]
+    interval_seconds: int
+    limit_messages: int
+    priority: float
+    subscribers_count: Optional[int]
+    posts_per_day: Optional[float]
+    next_run_at: datetime
+    last_run_at: Optional[datetime]
+    last_error: Optional[str]
+    failures: int
@@ -0,0 +1,448 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Sequence
+
+import numpy as np
+import orjson
+from sqlalchemy import BigInteger, cast, func, select, true
+
+from core.config import ANALYTICS_MAX_MESSAGES
+from db.functions import epoch_seconds, json_array_agg, json_entries, json_values_sum
+from db.models.stats import ChannelStats, MessageStats, MessageStatsHistory
+from db.uow import get_uow
+
+# возраст поста (в часах), к которому считается доля набранных просмотров
+DECAY_EDGES_HOURS = (1, 2, 4, 8, 12, 24, 48, 72, 168, 336, 720)
+TEXT_MEDIA_TYPE = "text"
+WEEKDAYS = 7
+HOURS = 24
+EPOCH = datetime(1970, 1, 1)
+
+# колонки постов; база отдаёт каждую одним JSON-массивом (json_array_agg),
+# так что массивы NumPy строятся без построчной работы в Python
+MESSAGE_COLUMNS = [
+    MessageStats.message_id,
+    epoch_seconds(MessageStats.date).label("date"),
+    MessageStats.views,
+    func.coalesce(MessageStats.forwards, 0).label("forwards"),
+    func.coalesce(MessageStats.replies, 0).label("replies"),
+    json_values_sum(MessageStats.reactions).label("reactions_total"),
+    func.coalesce(MessageStats.media_type, TEXT_MEDIA_TYPE).label("media_type"),
+]
+HISTORY_COLUMNS = [
+    json_array_agg(MessageStatsHistory.message_id),
+    json_array_agg(epoch_seconds(MessageStatsHistory.scraped_at)),
+    json_array_agg(MessageStatsHistory.views),
+]
+
+
+class MessageColumns:
+    """Column arrays of a channel's posts, one element per post.
+
+    Missing views stay NaN so they drop out of view statistics; missing
+    forwards and replies count as zero interactions. Media types are stored
+    as codes into `media_kinds`; reactions are per-post totals plus
+    channel-wide totals per emoji as parallel arrays.
+    """
+
+    def __init__(
+        self,
+        message_id: np.ndarray,
+        date: np.ndarray,
+        views: np.ndarray,
+        forwards: np.ndarray,
+        replies: np.ndarray,
+        reactions: np.ndarray,
+        media_type: np.ndarray,
+        media_kinds: np.ndarray,
+        reaction_keys: np.ndarray,
+        reaction_values: np.ndarray,
+    ):
+        self.message_id = message_id
+        self.date = date
+        self.views = views
+        self.forwards = forwards
+        self.replies = replies
+        self.reactions = reactions
+        self.media_type = media_type
+        self.media_kinds = media_kinds
+        self.reaction_keys = reaction_keys
+        self.reaction_values = reaction_values
+
+    def __len__(self) -> int:
+        return len(self.message_id)
+
+    @classmethod
+    def from_arrays(
+        cls, arrays: Sequence[list], reaction_totals: Sequence[tuple[str, int]]
+    ) -> "MessageColumns":
+        """Строит колонки из списков в порядке MESSAGE_COLUMNS и сумм реакций"""
+        message_id, date, views, forwards, replies, reactions, media_type = arrays
+
+        media_kinds = sorted(set(media_type))
+        codes = {kind: code for code, kind in enumerate(media_kinds)}
+        return cls(
+            message_id=np.array(message_id, dtype=np.int64),
+            date=np.array(date, dtype=np.int64).astype("datetime64[s]"),
+            # None в float даёт NaN
+            views=np.array(views, dtype=np.float64),
+            forwards=np.array(forwards, dtype=np.float64),
+            replies=np.array(replies, dtype=np.float64),
+            reactions=np.array(reactions, dtype=np.float64),
+            media_type=np.fromiter(
+                map(codes.__getitem__, media_type),
+                dtype=np.int64,
+                count=len(media_type),
+            ),
+            media_kinds=np.array(media_kinds, dtype=np.str_),
+            reaction_keys=np.array([key for key, _ in reaction_totals], dtype=np.str_),
+            reaction_values=np.array(
+                [value for _, value in reaction_totals], dtype=np.float64
+            ),
+        )
+
+
+class HistoryColumns:
+    """Column arrays of metric snapshots: message id, snapshot time (UTC) and views"""
+
+    def __init__(
+        self, message_id: np.ndarray, scraped_at: np.ndarray, views: np.ndarray
+    ):
+        self.message_id = message_id
+        self.scraped_at = scraped_at
+        self.views = views
+
+    @classmethod
+    def from_arrays(cls, arrays: Sequence[list]) -> "HistoryColumns":
+        """Строит колонки из списков в порядке HISTORY_COLUMNS.
+
+        scraped_at пишется локальным временем сервера, а даты постов — в UTC,
+        поэтому время снимков переводится в UTC.
+        """
+        message_id, scraped_at, views = arrays
+        return cls(
+            message_id=np.array(message_id, dtype=np.int64),
+            scraped_at=_local_to_utc(np.array(scraped_at, dtype=np.int64)).astype(
+                "datetime64[s]"
+            ),
+            views=np.array(views, dtype=np.float64),
+        )
+
+
+def engagement_rates(columns: MessageColumns) -> np.ndarray:
+    """ER поста в процентах: (пересылки + ответы + реакции) / просмотры"""
+    interactions = columns.forwards + columns.replies + columns.reactions
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(columns.views > 0, interactions / columns.views * 100, np.nan)
+
+
+def view_summary(columns: MessageColumns) -> dict:
+    """Сумма, среднее, медиана и p90 просмотров"""
+    views = columns.views[~np.isnan(columns.views)]
+    if not views.size:
+        return {"total": 0, "mean": None, "median": None, "p90": None}
+
+    median, p90 = np.percentile(views, [50, 90])
+    return {
+        "total": int(views.sum()),
+        "mean": _round(views.mean()),
+        "median": _round(median),
+        "p90": _round(p90),
+    }
+
+
+def view_decay(
+    columns: MessageColumns,
+    history: HistoryColumns,
+    edges: Sequence[int] = DECAY_EDGES_HOURS,
+) -> list[dict]:
+    """Медианная доля текущих просмотров, которую пост набрал к данному возрасту.
+
+    Снимок попадает в точку `age_hours`, если его возраст больше предыдущей
+    границы и не больше этой.
+    """
+    result = [
+        {"age_hours": edge, "samples": 0, "views_share_median": None} for edge in edges
+    ]
+    if not len(columns) or not history.message_id.size:
+        return result
+
+    order = np.argsort(columns.message_id)
+    sorted_ids = columns.message_id[order]
+    position = np.minimum(
+        np.searchsorted(sorted_ids, history.message_id), len(sorted_ids) - 1
+    )
+    known = sorted_ids[position] == history.message_id
+    post = order[position[known]]
+
+    current = columns.views[post]
+    age = (history.scraped_at[known] - columns.date[post]) / np.timedelta64(1, "h")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        share = history.views[known] / current
+    valid = (current > 0) & np.isfinite(share) & (age >= 0)
+
+    bins = np.searchsorted(np.asarray(edges), age[valid], side="left")
+    share = np.minimum(share[valid], 1.0)
+    for index, point in enumerate(result):
+        sample = share[bins == index]
+        if sample.size:
+            point["samples"] = int(sample.size)
+            point["views_share_median"] = _round(np.median(sample))
+    return result
+
+
+def posting_heatmap(columns: MessageColumns, rates: np.ndarray) -> dict:
+    """Матрицы день недели (пн = 0) × час публикации: посты, средние просмотры и ER"""
+    days = columns.date.astype("datetime64[D]")
+    hours = ((columns.date - days) // np.timedelta64(1, "h")).astype(np.int64)
+    # 1970-01-01 — четверг
+    weekdays = (days.astype(np.int64) + 3) % WEEKDAYS
+    cells = weekdays * HOURS + hours
+    size = WEEKDAYS * HOURS
+
+    has_views = ~np.isnan(columns.views)
+    has_rate = ~np.isnan(rates)
+    return {
+        "posts": np.bincount(cells, minlength=size).reshape(WEEKDAYS, HOURS).tolist(),
+        "views_mean": _cell_means(cells[has_views], columns.views[has_views], size),
+        "er_mean": _cell_means(cells[has_rate], rates[has_rate], size),
+    }
+
+
+def media_performance(columns: MessageColumns, rates: np.ndarray) -> list[dict]:
+    """Посты, медиана просмотров и средний ER по типу контента (text — без медиа)"""
+    result = []
+    for index, kind in enumerate(columns.media_kinds):
+        mask = columns.media_type == index
+        views = columns.views[mask]
+        views = views[~np.isnan(views)]
+        group_rates = rates[mask]
+        group_rates = group_rates[~np.isnan(group_rates)]
+        result.append(
+            {
+                "media_type": str(kind),
+                "posts": int(mask.sum()),
+                "views_median": _round(np.median(views)) if views.size else None,
+                "er_mean": _round(group_rates.mean()) if group_rates.size else None,
+            }
+        )
+    return sorted(result, key=lambda item: item["posts"], reverse=True)
+
+
+def reaction_mix(columns: MessageColumns) -> list[dict]:
+    """Доли реакций по эмодзи, от самой частой"""
+    if not columns.reaction_keys.size:
+        return []
+
+    reactions, groups = np.unique(columns.reaction_keys, return_inverse=True)
+    counts = np.bincount(groups, weights=columns.reaction_values)
+    total = counts.sum()
+    return [
+        {
+            "reaction": str(reactions[index]),
+            "count": int(counts[index]),
+            "share": _round(counts[index] / total),
+        }
+        for index in np.argsort(counts)[::-1]
+    ]
+
+
+def compute_engagement(
+    columns: MessageColumns,
+    history: HistoryColumns,
+    subscribers: int | None = None,
+    top: int = 10,
+) -> dict:
+    """Все метрики вовлечённости канала за один векторный проход по колонкам"""
+    rates = engagement_rates(columns)
+    valid_rates = rates[~np.isnan(rates)]
+    views = view_summary(columns)
+
+    top_posts = []
+    if valid_rates.size:
+        ranked = np.argsort(np.nan_to_num(rates, nan=-1.0))[::-1][:top]
+        top_posts = [
+            {
+                "message_id": int(columns.message_id[index]),
+                "views": int(columns.views[index]),
+                "er": _round(rates[index]),
+            }
+            for index in ranked
+            if not np.isnan(rates[index])
+        ]
+
+    return {
+        "posts": len(columns),
+        "period": {
+            "from": columns.date.min().item() if len(columns) else None,
+            "to": columns.date.max().item() if len(columns) else None,
+        },
+        "subscribers": subscribers,
+        "views": views,
+        "engagement": {
+            "er_mean": _round(valid_rates.mean()) if valid_rates.size else None,
+            "er_median": _round(np.median(valid_rates)) if valid_rates.size else None,
+            "er_p90": (
+                _round(np.percentile(valid_rates, 90)) if valid_rates.size else None
+            ),
+            "reach_rate": (
+                _round(views["mean"] / subscribers * 100)
+                if subscribers and views["mean"] is not None
+                else None
+            ),
+        },
+        "top_posts": top_posts,
+        "view_decay": view_decay(columns, history),
+        "heatmap": posting_heatmap(columns, rates),
+        "media": media_performance(columns, rates),
+        "reaction_mix": reaction_mix(columns),
+    }
+
+
+def _local_to_utc(seconds: np.ndarray) -> np.ndarray:
+    """Наивное локальное время (секунды от эпохи без пояса) в секунды UTC"""
+    if not seconds.size:
+        return seconds
+    # смещение меняется только на переходах DST, поэтому оно берётся на
+    # границах встреченных суток, а по часам уточняется лишь в дни перехода
+    days, inverse = np.unique(seconds // 86400, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    day_start = _utc_offsets(days * 86400)
+    day_end = _utc_offsets((days + 1) * 86400)
+    offsets = day_start[inverse]
+    transition = (day_start != day_end)[inverse]
+    if transition.any():
+        hours, hour_inverse = np.unique(
+            seconds[transition] // 3600, return_inverse=True
+        )
+        offsets[transition] = _utc_offsets(hours * 3600)[hour_inverse.reshape(-1)]
+    return seconds - offsets
+
+
+def _utc_offsets(local_seconds: np.ndarray) -> np.ndarray:
+    return np.fromiter(
+        (_utc_offset(int(value)) for value in local_seconds),
+        dtype=np.int64,
+        count=local_seconds.size,
+    )
+
+
+def _utc_offset(local_seconds: int) -> int:
+    local = (EPOCH + timedelta(seconds=local_seconds)).astimezone()
+    return int(local.utcoffset().total_seconds())
+
+
+def _decode(array: str | None) -> list:
+    # json_agg пустой выборки в PostgreSQL даёт NULL, json_group_array в SQLite — []
+    return orjson.loads(array) if array is not None else []
+
+
+def _cell_means(cells: np.ndarray, values: np.ndarray, size: int) -> list[list]:
+    sums = np.bincount(cells, weights=values, minlength=size)
+    counts = np.bincount(cells, minlength=size)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = np.where(counts > 0, sums / counts, np.nan)
+    return [[_round(value) for value in row] for row in means.reshape(-1, HOURS)]
+
+
+def _round(value: float) -> float | None:
+    value = float(value)
+    return None if np.isnan(value) else round(value, 4)
+
+
+class ChannelAnalytics:
+    """Engagement analytics over stored posts of a channel.
+
+    Each column arrives from the database as one JSON array, and reactions
+    are summed per emoji in SQL, so no per-row Python objects are built. The
+    CPU-bound part runs in a worker thread so large channels don't block the
+    event loop.
+    """
+
+    async def get_engagement(
+        self,
+        channel_id: int,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        limit: int = ANALYTICS_MAX_MESSAGES,
+    ) -> dict | None:
+        """Аналитика по последним `limit` постам канала за период"""
+        expressions = [MessageStats.channel_id == channel_id]
+        if since is not None:
+            expressions.append(MessageStats.date >= since)
+        if until is not None:
+            expressions.append(MessageStats.date < until)
+
+        async with get_uow() as uow:
+            message_stats_repo = await uow.get_repo(MessageStats)
+            posts = message_stats_repo.select_columns(
+                MESSAGE_COLUMNS,
+                *expressions,
+                order_by=[MessageStats.message_id.desc()],
+                limit=limit,
+            ).subquery()
+            columns = [posts.c[column.key] for column in MESSAGE_COLUMNS]
+            (arrays,) = await message_stats_repo.fetch(
+                select(
+                    func.min(posts.c.message_id),
+                    func.max(posts.c.message_id),
+                    *(json_array_agg(column) for column in columns),
+                )
+            )
+            first_id, last_id, *arrays = arrays
+            if first_id is None:
+                return None
+
+            # отдельная выборка тех же постов без вычисляемых колонок: иначе
+            # подзапрос заново считал бы их для каждой строки
+            post_reactions = message_stats_repo.select_columns(
+                [MessageStats.reactions],
+                *expressions,
+                order_by=[MessageStats.message_id.desc()],
+                limit=limit,
+            ).subquery()
+            reactions = json_entries(post_reactions.c.reactions).table_valued(
+                "key", "value"
+            )
+            reaction_totals = await message_stats_repo.fetch(
+                select(reactions.c.key, func.sum(cast(reactions.c.value, BigInteger)))
+                .select_from(post_reactions)
+                .join(reactions, true())
+                .group_by(reactions.c.key)
+            )
+
+            history_repo = await uow.get_repo(MessageStatsHistory)
+            (history_arrays,) = await history_repo.columns(
+                HISTORY_COLUMNS,
+                MessageStatsHistory.channel_id == channel_id,
+                MessageStatsHistory.message_id.between(first_id, last_id),
+            )
+
+            channel_stats_repo = await uow.get_repo(ChannelStats)
+            snapshots = await channel_stats_repo.filter(
+                ChannelStats.channel_id == channel_id,
+                ChannelStats.subscribers_count.is_not(None),
+                order_by=[ChannelStats.scraped_at.desc()],
+                limit=1,
+            )
+
+        subscribers = snapshots[0].subscribers_count if snapshots else None
+        result = await asyncio.to_thread(
+            self._compute, arrays, reaction_totals, history_arrays, subscribers
+        )
+        return {"channel_id": channel_id, **result}
+
+    @staticmethod
+    def _compute(
+        arrays: Sequence[str | None],
+        reaction_totals: Sequence[tuple[str, int]],
+        history_arrays: Sequence[str | None],
+        subscribers: int | None,
+    ) -> dict:
+        return compute_engagement(
+            MessageColumns.from_arrays(
+                [_decode(array) for array in arrays], reaction_totals
+            ),
+            HistoryColumns.from_arrays([_decode(array) for array in history_arrays]),
+            subscribers,
+        )
@@ -0,0 +1,229 @@
+import asyncio
+from contextlib import asynccontextmanager
+import logging
+import time
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+
+from telethon import TelegramClient
+from telethon.errors import FloodWaitError
+
+from core.config import TELEGRAM_API_ID, TELEGRAM_API_HASH, S3_SESSION_KEYS
+from core.metrics import FLOOD_WAIT_SECONDS
+
+from app.services.s3_session_manager import S3SessionManager
+from app.services.rate_limiter import AdaptiveRateLimiter, FloodWaitBudget
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def create_telegram_client(session_path: str) -> TelegramClient:
+    if not TELEGRAM_API_ID or not TELEGRAM_API_HASH:
+        raise ValueError("Telegram API credentials not configured")
+    # FloodWaits are handled by the rate limiter, never slept through inside Telethon
+    return TelegramClient(
+        session_path,
+        int(TELEGRAM_API_ID),
+        TELEGRAM_API_HASH,
+        flood_sleep_threshold=0,
+    )
+
+
+class TelegramAccount:
+    """One Telethon client with its load, rate limits and FloodWait cooldown state"""
+
+    def __init__(self, session_key: str, client: TelegramClient):
+        self.session_key = session_key
+        self.client = client
+        self.limiter = AdaptiveRateLimiter()
+        self.authorized = False
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.flood_waits = 0
+        self.flood_wait_seconds = 0
+        self.errors = 0
+
+    @property
+    def cooldown_remaining(self) -> float:
+        return max(0.0, self.cooldown_until - time.time())
+
+    @property
+    def available(self) -> bool:
+        return self.authorized and self.cooldown_remaining == 0
+
+    def park(self, seconds: int):
+        """Take the account out of rotation for the FloodWait duration"""
+        self.cooldown_until = max(self.cooldown_until, time.time() + seconds)
+        self.flood_waits += 1
+        self.flood_wait_seconds += seconds
+        FLOOD_WAIT_SECONDS.labels("parked").inc(seconds)
+
+    async def call(
+        self,
+        method_class: str,
+        request: Callable[[], Awaitable[T]],
+        budget: FloodWaitBudget,
+    ) -> T:
+        """Run one MTProto request under the limiter of its method class.
+
+        A FloodWait that fits into `budget` is slept through and the request
+        is repeated; a longer one is raised so the account can be parked.
+        """
+        while True:
+            await self.limiter.acquire(method_class)
+            try:
+                result = await request()
+            except FloodWaitError as e:
+                self.limiter.on_flood_wait(method_class, e.seconds)
+                if not budget.absorb(e.seconds):
+                    raise
+                FLOOD_WAIT_SECONDS.labels("absorbed").inc(e.seconds)
+                logger.info(
+                    f"Account {self.session_key} absorbs {e.seconds}s FloodWait on {method_class}"
+                )
+                await asyncio.sleep(e.seconds)
+                continue
+
+            self.limiter.on_success(method_class)
+            return result
+
+    def health(self) -> dict:
+        return {
+            "session_key": self.session_key,
+            "authorized": self.authorized,
+            "available": self.available,
+            "in_flight": self.in_flight,
+            "cooldown_remaining": round(self.cooldown_remaining, 1),
+            "requests": self.requests,
+            "flood_waits": self.flood_waits,
+            "flood_wait_seconds": self.flood_wait_seconds,
+            "errors": self.errors,
+            "rate_limits": self.limiter.stats(),
+        }
+
+
+class TelegramClientPool:
+    """Pool of Telegram accounts loaded from S3 sessions.
+
+    Work goes to the least-loaded authorized account that is not parked
+    after a FloodWait.
+    """
+
+    def __init__(
+        self,
+        session_manager: S3SessionManager,
+        session_keys: list[str] = S3_SESSION_KEYS,
+        client_factory: Callable[[str], TelegramClient] = create_telegram_client,
+    ):
+        self.session_manager = session_manager
+        self.session_keys = session_keys
+        self.client_factory = client_factory
+        self.accounts: list[TelegramAccount] = []
+        self._initialize_lock = asyncio.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return any(account.authorized for account in self.accounts)
+
+    async def initialize(self):
+        """Download sessions, connect clients and keep the authorized ones.
+
+        A repeated call (reconnect, lifespan restart) keeps connected authorized
+        accounts with their limiter state and reconnects the rest, so every
+        session is in the pool exactly once.
+        """
+        async with self._initialize_lock:
+            current = {account.session_key: account for account in self.accounts}
+            accounts = []
+            for session_key in dict.fromkeys(self.session_keys):
+                account = current.get(session_key)
+                if account is None or not (
+                    account.authorized and account.client.is_connected()
+                ):
+                    if account is not None:
+                        await account.client.disconnect()
+                    account = await self._connect(session_key)
+                accounts.append(account)
+            self.accounts = accounts
+
+        if not self.ready:
+            raise ValueError(
+                "Telegram client not authorized. Please authenticate first."
+            )
+
+    async def _connect(self, session_key: str) -> TelegramAccount:
+        await self.session_manager.download_session(session_key)
+
+        client = self.client_factory(self.session_manager.get_session_path(session_key))
+        account = TelegramAccount(session_key, client)
+
+        try:
+            await client.connect()
+            account.authorized = await client.is_user_authorized()
+        except Exception as e:
+            logger.error(f"Failed to connect Telegram account {session_key}: {e}")
+            return account
+
+        if account.authorized:
+            logger.info(f"Telegram account {session_key} authorized successfully")
+            await self.session_manager.upload_session(session_key)
+        else:
+            logger.warning(f"Telegram account {session_key} not authorized")
+        return account
+
+    def has_available(self) -> bool:
+        return any(account.available for account in self.accounts)
+
+    def is_tight(self) -> bool:
+        """True when no account can take work without hitting Telegram limits"""
+        return not any(
+            account.available and not account.limiter.is_tight()
+            for account in self.accounts
+        )
+
+    def next_available_in(self) -> float:
+        """Seconds until some authorized account leaves cooldown"""
+        remaining = [
+            account.cooldown_remaining
+            for account in self.accounts
+            if account.authorized
+        ]
+        return min(remaining) if remaining else 0.0
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[TelegramAccount]:
+        candidates = [account for account in self.accounts if account.available]
+        if not candidates:
+            raise ValueError(
+                "All Telegram accounts are rate limited, "
+                f"retry in {int(self.next_available_in()) + 1} seconds"
+            )
+
+        account = min(
+            candidates,
+            key=lambda x: (x.limiter.is_tight(), x.in_flight, x.requests),
+        )
+        account.in_flight += 1
+        account.requests += 1
+        try:
+            yield account
+        except Exception:
+            account.errors += 1
+            raise
+        finally:
+            account.in_flight -= 1
+
+    async def disconnect(self):
+        """Disconnect clients first so their session files are final, then flush them"""
+        for account in self.accounts:
+            await account.client.disconnect()
+        await self.session_manager.flush(
+            [account.session_key for account in self.accounts if account.authorized]
+        )
+        self.accounts = []
+
+    def health(self) -> list[dict]:
+        return [account.health() for account in self.accounts]
@@ -0,0 +1,178 @@
+import base64
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from telethon.extensions import BinaryReader
+from telethon.tl.tlobject import TLObject
+
+from core.config import (
+    ENTITY_CACHE_TTL,
+    FULL_INFO_CACHE_TTL,
+    ENTITY_CACHE_MAX_SIZE,
+    ENTITY_CACHE_PATH,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_channel_identifier(identifier: str) -> str:
+    """Приводит @name, t.me/name и https://t.me/name к одному ключу"""
+    identifier = identifier.strip()
+    for prefix in ("https://", "http://"):
+        identifier = identifier.removeprefix(prefix)
+    for prefix in ("t.me/", "telegram.me/"):
+        identifier = identifier.removeprefix(prefix)
+    return identifier.strip("/").lstrip("@").lower()
+
+
+class TTLCache:
+    """Bounded LRU mapping with per-entry expiry"""
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._items: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        item = self._items.get(key)
+        if item is None or item[0] <= time.time():
+            if item is not None:
+                del self._items[key]
+            self.misses += 1
+            return None
+
+        self._items.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def set(self, key: Hashable, value: Any, expires_at: float | None = None):
+        self._items[key] = (expires_at or time.time() + self.ttl, value)
+        self._items.move_to_end(key)
+
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+    def items(self) -> list[tuple[Hashable, float, Any]]:
+        now = time.time()
+        return [
+            (key, expires_at, value)
+            for key, (expires_at, value) in self._items.items()
+            if expires_at > now
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._items),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class EntityCache:
+    """Cache for resolved channel entities and their full-channel info.
+
+    Entities (username → Channel/Chat) are stable and live long; full info
+    (subscriber counters, description) changes often and expires quickly.
+    Entities carry an account-specific access_hash, so they are cached per
+    `scope` (the session key of the account that resolved them).
+    """
+
+    def __init__(
+        self,
+        entity_ttl: float = ENTITY_CACHE_TTL,
+        full_info_ttl: float = FULL_INFO_CACHE_TTL,
+        max_size: int = ENTITY_CACHE_MAX_SIZE,
+        path: str | None = ENTITY_CACHE_PATH,
+    ):
+        self.entities = TTLCache(entity_ttl, max_size)
+        self.channel_ids = TTLCache(entity_ttl, max_size)
+        self.full_info = TTLCache(full_info_ttl, max_size)
+        self.path = path
+
+    @staticmethod
+    def _entity_key(identifier: str, scope: str) -> str:
+        return f"{scope}:{normalize_channel_identifier(identifier)}"
+
+    def get_entity(self, identifier: str, scope: str = "") -> TLObject | None:
+        return self.entities.get(self._entity_key(identifier, scope))
+
+    def set_entity(self, identifier: str, entity: TLObject, scope: str = ""):
+        self.entities.set(self._entity_key(identifier, scope), entity)
+        self.channel_ids.set(normalize_channel_identifier(identifier), entity.id)
+
+    def get_channel_id(self, identifier: str) -> int | None:
+        return self.channel_ids.get(normalize_channel_identifier(identifier))
+
+    def get_full_info(self, channel_id: int) -> dict | None:
+        return self.full_info.get(channel_id)
+
+    def set_full_info(self, channel_id: int, info: dict):
+        self.full_info.set(channel_id, info)
+
+    def load(self):
+        """Restore non-expired entries from the backing file"""
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+
+            now = time.time()
+            for key, expires_at, value in data.get("entities", []):
+                if expires_at > now:
+                    entity = BinaryReader(base64.b64decode(value)).tgread_object()
+                    self.entities.set(key, entity, expires_at)
+            for key, expires_at, value in data.get("channel_ids", []):
+                if expires_at > now:
+                    self.channel_ids.set(key, value, expires_at)
+            for key, expires_at, value in data.get("full_info", []):
+                if expires_at > now:
+                    self.full_info.set(key, value, expires_at)
+
+            logger.info(
+                f"Entity cache loaded: {len(self.entities.items())} entities, "
+                f"{len(self.full_info.items())} full infos"
+            )
+        except Exception as e:
+            logger.error(f"Error loading entity cache: {e}")
+
+    def save(self):
+        """Persist non-expired entries to the backing file"""
+        if not self.path:
+            return
+
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            data = {
+                "entities": [
+                    [key, expires_at, base64.b64encode(bytes(entity)).decode()]
+                    for key, expires_at, entity in self.entities.items()
+                ],
+                "channel_ids": self.channel_ids.items(),
+                "full_info": self.full_info.items(),
+            }
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+
+            logger.info(f"Entity cache saved: {self.path}")
+        except Exception as e:
+            logger.error(f"Error saving entity cache: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "entities": self.entities.stats(),
+            "full_info": self.full_info.stats(),
+            "persisted": bool(self.path),
+        }
@@ -0,0 +1,209 @@
+import asyncio
+from datetime import datetime
+import json
+import logging
+from typing import Any, AsyncIterator, Callable
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Column
+
+from core.config import EXPORT_CHUNK_SIZE
+from db.models.stats import ChannelStats, MessageStats
+from db.uow import get_uow
+
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMAT_PARQUET = "parquet"
+EXPORT_FORMAT_ARROW = "arrow"
+EXPORT_MEDIA_TYPES = {
+    EXPORT_FORMAT_PARQUET: "application/vnd.apache.parquet",
+    EXPORT_FORMAT_ARROW: "application/vnd.apache.arrow.stream",
+}
+EXPORT_EXTENSIONS = {
+    EXPORT_FORMAT_PARQUET: "parquet",
+    EXPORT_FORMAT_ARROW: "arrows",
+}
+
+
+class ExportTable:
+    """Exported columns of a model with their Arrow types.
+
+    `converters` map a column key to a function applied to every value
+    before it is handed to Arrow (e.g. JSON blobs that have no fixed shape).
+    """
+
+    def __init__(
+        self,
+        model: type,
+        fields: list[tuple[Column, pa.DataType]],
+        time_column: Column,
+        order_by: Column,
+        converters: dict[str, Callable[[Any], Any]] | None = None,
+    ):
+        self.model = model
+        self.columns = [column for column, _ in fields]
+        self.schema = pa.schema(
+            [pa.field(column.key, arrow_type) for column, arrow_type in fields]
+        )
+        self.time_column = time_column
+        self.order_by = order_by
+        self.converters = converters or {}
+
+    def record_batch(self, rows: list[tuple]) -> pa.RecordBatch:
+        """Собирает колоночный батч из кортежей выборки"""
+        values = list(zip(*rows)) or [()] * len(self.columns)
+        arrays = []
+        for column, field, column_values in zip(self.columns, self.schema, values):
+            converter = self.converters.get(column.key)
+            if converter is not None:
+                column_values = [
+                    None if value is None else converter(value)
+                    for value in column_values
+                ]
+            arrays.append(pa.array(column_values, type=field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+
+EXPORT_TABLES = {
+    "messages": ExportTable(
+        MessageStats,
+        [
+            (MessageStats.channel_id, pa.int64()),
+            (MessageStats.message_id, pa.int64()),
+            (MessageStats.date, pa.timestamp("us")),
+            (MessageStats.scraped_at, pa.timestamp("us")),
+            (MessageStats.views, pa.int32()),
+            (MessageStats.forwards, pa.int32()),
+            (MessageStats.replies, pa.int32()),
+            (MessageStats.reactions, pa.map_(pa.string(), pa.int64())),
+            (MessageStats.text, pa.string()),
+            (MessageStats.media_type, pa.string()),
+            (MessageStats.has_media, pa.int8()),
+        ],
+        time_column=MessageStats.date,
+        order_by=MessageStats.message_id,
+    ),
+    "channel": ExportTable(
+        ChannelStats,
+        [
+            (ChannelStats.channel_id, pa.int64()),
+            (ChannelStats.scraped_at, pa.timestamp("us")),
+            (ChannelStats.username, pa.string()),
+            (ChannelStats.title, pa.string()),
+            (ChannelStats.subscribers_count, pa.int32()),
+            (ChannelStats.participants_count, pa.int32()),
+            (ChannelStats.total_messages, pa.int32()),
+            (ChannelStats.avg_views, pa.int32()),
+            (ChannelStats.avg_reactions, pa.int32()),
+            (ChannelStats.avg_forwards, pa.int32()),
+            (ChannelStats.messages_analyzed, pa.int32()),
+            (ChannelStats.incremental, pa.bool_()),
+            (ChannelStats.recent_activity, pa.string()),
+        ],
+        time_column=ChannelStats.scraped_at,
+        order_by=ChannelStats.scraped_at,
+        converters={"recent_activity": lambda value: json.dumps(value, default=str)},
+    ),
+}
+
+
+class _ByteSink:
+    """Write-only file object whose contents are taken out chunk by chunk"""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ChannelExporter:
+    """Streams stored channel data as Parquet or Arrow IPC.
+
+    Rows are read through a server-side cursor in `chunk_size` batches and
+    each batch is encoded and handed out before the next one is fetched, so
+    memory stays bounded by one chunk regardless of history length. Arrow
+    conversion runs in a worker thread.
+    """
+
+    def __init__(self, chunk_size: int = EXPORT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+
+    async def export(
+        self,
+        channel_id: int,
+        table: str,
+        export_format: str,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> AsyncIterator[bytes]:
+        """Отдаёт файл выгрузки частями по мере чтения из БД"""
+        if table not in EXPORT_TABLES:
+            raise ValueError(f"Unknown export table: {table}")
+        if export_format not in EXPORT_MEDIA_TYPES:
+            raise ValueError(f"Unknown export format: {export_format}")
+
+        spec = EXPORT_TABLES[table]
+        expressions = [spec.model.channel_id == channel_id]
+        if since is not None:
+            expressions.append(spec.time_column >= since)
+        if until is not None:
+            expressions.append(spec.time_column < until)
+
+        sink = _ByteSink()
+        output = pa.PythonFile(sink, mode="w")
+        if export_format == EXPORT_FORMAT_PARQUET:
+            writer = pq.ParquetWriter(output, spec.schema, compression="zstd")
+        else:
+            writer = pa.ipc.new_stream(
+                output,
+                spec.schema,
+                options=pa.ipc.IpcWriteOptions(compression="zstd"),
+            )
+
+        rows_written = 0
+        async with get_uow() as uow:
+            repo = await uow.get_repo(spec.model)
+            async for rows in repo.iter_columns(
+                spec.columns,
+                *expressions,
+                order_by=[spec.order_by],
+                chunk_size=self.chunk_size,
+            ):
+                await asyncio.to_thread(self._write_chunk, writer, spec, rows)
+                rows_written += len(rows)
+                data = sink.drain()
+                if data:
+                    yield data
+
+        await asyncio.to_thread(writer.close)
+        yield sink.drain()
+        logger.info(
+            f"Exported {rows_written} {table} rows of channel {channel_id} "
+            f"as {export_format}"
+        )
+
+    @staticmethod
+    def _write_chunk(writer, spec: ExportTable, rows: list[tuple]):
+        batch = spec.record_batch(rows)
+        if isinstance(writer, pq.ParquetWriter):
+            # каждая пачка — отдельная row group, чтобы её можно было сразу отдать
+            writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            writer.write_batch(batch)
@@ -0,0 +1,173 @@
+from datetime import datetime
+from typing import Any
+
+from telethon.tl.types import Message, MessageMediaDocument, MessageMediaPhoto
+
+
+def reaction_key(reaction) -> str:
+    """Ключ реакции: эмодзи, id кастомного эмодзи или строковое представление"""
+    emoticon = getattr(reaction, "emoticon", None)
+    if emoticon:
+        return emoticon
+    document_id = getattr(reaction, "document_id", None)
+    if document_id is not None:
+        return f"document_{document_id}"
+    return str(reaction)
+
+
+class MessageRecord:
+    """Metrics of one scraped post.
+
+    Slotted so a scrape of tens of thousands of posts holds compact records
+    instead of one dict per post; rows for the database and the response are
+    built from it directly.
+    """
+
+    __slots__ = (
+        "message_id",
+        "date",
+        "views",
+        "forwards",
+        "replies",
+        "reactions",
+        "text",
+        "media_type",
+        "has_media",
+    )
+
+    def __init__(
+        self,
+        message_id: int,
+        date: datetime,
+        views: int | None,
+        forwards: int | None,
+        replies: int,
+        reactions: dict[str, int],
+        text: str,
+        media_type: str | None,
+        has_media: int,
+    ):
+        self.message_id = message_id
+        self.date = date
+        self.views = views
+        self.forwards = forwards
+        self.replies = replies
+        self.reactions = reactions
+        self.text = text
+        self.media_type = media_type
+        self.has_media = has_media
+
+    @classmethod
+    def from_message(cls, message: Message) -> "MessageRecord":
+        """Извлекает статистику из сообщения Telethon"""
+        reactions = {}
+        if message.reactions is not None:
+            for reaction in message.reactions.results:
+                reactions[reaction_key(reaction.reaction)] = reaction.count
+
+        media = message.media
+        if media is None:
+            media_type = None
+        elif isinstance(media, MessageMediaPhoto):
+            media_type = "photo"
+        elif isinstance(media, MessageMediaDocument):
+            media_type = "document"
+        else:
+            media_type = None
+
+        date = message.date
+        if date.tzinfo is not None:
+            date = date.replace(tzinfo=None)
+
+        return cls(
+            message.id,
+            date,
+            message.views,
+            message.forwards,
+            message.replies.replies if message.replies is not None else 0,
+            reactions,
+            message.text or "",
+            media_type,
+            0 if media is None else 1,
+        )
+
+    def as_row(self, channel_id: int, scraped_at: datetime) -> dict[str, Any]:
+        """Строка message_stats"""
+        return {
+            "channel_id": channel_id,
+            "message_id": self.message_id,
+            "date": self.date,
+            "scraped_at": scraped_at,
+            "views": self.views,
+            "forwards": self.forwards,
+            "replies": self.replies,
+            "reactions": self.reactions,
+            "text": self.text[:1000],
+            "media_type": self.media_type,
+            "has_media": self.has_media,
+        }
+
+    def as_response(self, include_text: bool = True) -> dict[str, Any]:
+        """Сообщение в форме MessageStatsResponse"""
+        response = {
+            "message_id": self.message_id,
+            "date": self.date,
+            "views": self.views,
+            "forwards": self.forwards,
+            "replies": self.replies,
+            "reactions": self.reactions,
+            "text": self.text,
+            "media_type": self.media_type,
+            "has_media": bool(self.has_media),
+        }
+        if not include_text:
+            del response["text"]
+        return response
+
+
+class MessageBatch:
+    """Records of one scrape together with totals aggregated as they are added.
+
+    `drain()` hands out the collected records and forgets them while keeping
+    the totals, so streaming scrapes stay bounded by one chunk.
+    """
+
+    __slots__ = (
+        "records",
+        "count",
+        "total_views",
+        "total_forwards",
+        "total_reactions",
+        "messages_with_stats",
+        "last_message_id",
+    )
+
+    def __init__(self):
+        self.records: list[MessageRecord] = []
+        self.count = 0
+        self.total_views = 0
+        self.total_forwards = 0
+        self.total_reactions = 0
+        self.messages_with_stats = 0
+        self.last_message_id: int | None = None
+
+    def add(self, message: Message) -> MessageRecord:
+        record = MessageRecord.from_message(message)
+        self.records.append(record)
+        self.count += 1
+
+        if record.views:
+            self.total_views += record.views
+            self.messages_with_stats += 1
+        if record.forwards:
+            self.total_forwards += record.forwards
+        for count in record.reactions.values():
+            self.total_reactions += count
+        if self.last_message_id is None or record.message_id > self.last_message_id:
+            self.last_message_id = record.message_id
+        return record
+
+    def drain(self) -> list[MessageRecord]:
+        records = self.records
+        self.records = []
+        return records
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import time
+
+from core.config import (
+    TELEGRAM_RATE_RESOLVE,
+    TELEGRAM_RATE_FULL_INFO,
+    TELEGRAM_RATE_HISTORY,
+    TELEGRAM_RATE_VIEWS,
+    FLOOD_WAIT_BUDGET,
+)
+
+
+logger = logging.getLogger(__name__)
+
+METHOD_RESOLVE = "resolve"
+METHOD_FULL_INFO = "full_info"
+METHOD_HISTORY = "history"
+METHOD_VIEWS = "views"
+
+DEFAULT_RATES = {
+    METHOD_RESOLVE: TELEGRAM_RATE_RESOLVE,
+    METHOD_FULL_INFO: TELEGRAM_RATE_FULL_INFO,
+    METHOD_HISTORY: TELEGRAM_RATE_HISTORY,
+    METHOD_VIEWS: TELEGRAM_RATE_VIEWS,
+}
+
+BURST_SECONDS = 5
+DECREASE_FACTOR = 0.5
+LONG_WAIT_DECREASE_FACTOR = 0.25
+LONG_WAIT_SECONDS = 30
+INCREASE_EVERY = 50
+INCREASE_STEP = 0.1
+MIN_RATE_FACTOR = 0.05
+MAX_RATE_FACTOR = 2.0
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class MethodLimit:
+    """Adaptive limit for one class of MTProto methods"""
+
+    def __init__(self, base_rate: float):
+        self.base_rate = base_rate
+        self.bucket = TokenBucket(base_rate, max(1.0, base_rate * BURST_SECONDS))
+        self.blocked_until = 0.0
+        self.successes = 0
+        self.calls = 0
+        self.flood_waits = 0
+        self.flood_wait_seconds = 0
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+    @property
+    def blocked_for(self) -> float:
+        return max(0.0, self.blocked_until - time.monotonic())
+
+    def set_rate(self, rate: float):
+        rate = min(
+            self.base_rate * MAX_RATE_FACTOR,
+            max(self.base_rate * MIN_RATE_FACTOR, rate),
+        )
+        self.bucket.rate = rate
+        self.bucket.burst = max(1.0, rate * BURST_SECONDS)
+        self.bucket.tokens = min(self.bucket.tokens, self.bucket.burst)
+
+    def stats(self) -> dict:
+        return {
+            "rate": round(self.rate, 3),
+            "base_rate": self.base_rate,
+            "blocked_for": round(self.blocked_for, 1),
+            "calls": self.calls,
+            "flood_waits": self.flood_waits,
+            "flood_wait_seconds": self.flood_wait_seconds,
+        }
+
+
+class AdaptiveRateLimiter:
+    """Per-method-class token buckets for one Telegram account.
+
+    A FloodWait blocks the method class for the requested time and cuts its
+    rate (harder for long waits); a run of successful calls raises it back
+    step by step, up to twice the configured rate.
+    """
+
+    def __init__(self, rates: dict[str, float] = DEFAULT_RATES):
+        self.limits = {
+            method_class: MethodLimit(rate) for method_class, rate in rates.items()
+        }
+
+    async def acquire(self, method_class: str):
+        limit = self.limits[method_class]
+        while limit.blocked_for > 0:
+            await asyncio.sleep(limit.blocked_for)
+        await limit.bucket.acquire()
+        limit.calls += 1
+
+    def on_success(self, method_class: str):
+        limit = self.limits[method_class]
+        limit.successes += 1
+        if limit.successes >= INCREASE_EVERY:
+            limit.successes = 0
+            limit.set_rate(limit.rate + limit.base_rate * INCREASE_STEP)
+
+    def on_flood_wait(self, method_class: str, seconds: int):
+        limit = self.limits[method_class]
+        limit.successes = 0
+        limit.flood_waits += 1
+        limit.flood_wait_seconds += seconds
+        limit.blocked_until = max(limit.blocked_until, time.monotonic() + seconds)
+
+        factor = (
+            LONG_WAIT_DECREASE_FACTOR
+            if seconds >= LONG_WAIT_SECONDS
+            else DECREASE_FACTOR
+        )
+        limit.set_rate(limit.rate * factor)
+        logger.info(
+            f"FloodWait {seconds}s on {method_class}, rate lowered to {limit.rate:.3f}/s"
+        )
+
+    def is_tight(self) -> bool:
+        """True when some method class is blocked or running well below its rate"""
+        return any(
+            limit.blocked_for > 0 or limit.rate < limit.base_rate * DECREASE_FACTOR
+            for limit in self.limits.values()
+        )
+
+    def stats(self) -> dict:
+        return {
+            method_class: limit.stats() for method_class, limit in self.limits.items()
+        }
+
+
+class FloodWaitBudget:
+    """Total FloodWait seconds one operation may sleep through instead of failing"""
+
+    def __init__(self, seconds: int = FLOOD_WAIT_BUDGET):
+        self.remaining = seconds
+
+    def absorb(self, seconds: int) -> bool:
+        if seconds > self.remaining:
+            return False
+        self.remaining -= seconds
+        return True
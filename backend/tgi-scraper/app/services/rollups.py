@@ -0,0 +1,392 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+import logging
+from typing import Iterable
+
+from sqlalchemy import BigInteger, ColumnElement, and_, func, literal_column, or_
+
+from db.functions import epoch_seconds, json_values_sum
+from db.models.stats import ChannelRollup, ChannelStats, MessageStats
+from db.repository import DatabaseRepo
+from db.uow import get_uow
+
+
+logger = logging.getLogger(__name__)
+
+GRANULARITY_HOUR = "hour"
+GRANULARITY_DAY = "day"
+GRANULARITIES = {
+    GRANULARITY_HOUR: timedelta(hours=1),
+    GRANULARITY_DAY: timedelta(days=1),
+}
+
+ROLLUP_KEY = ["channel_id", "granularity", "bucket_start"]
+ROLLUP_UPDATE_COLUMNS = [
+    "snapshots",
+    "subscribers_open",
+    "subscribers_close",
+    "subscribers_delta",
+    "posts",
+    "views_sum",
+    "views_p50",
+    "views_p90",
+    "forwards_sum",
+    "reactions_total",
+    "updated_at",
+]
+
+EMPTY_POST_AGGREGATES = {
+    "posts": 0,
+    "views_sum": 0,
+    "views_p50": None,
+    "views_p90": None,
+    "forwards_sum": 0,
+    "reactions_total": 0,
+}
+
+BACKFILL_WINDOW = timedelta(days=7)
+# диапазонов бакетов в одном запросе: OR-цепочка не должна упереться в лимиты SQLite
+RANGES_PER_QUERY = 100
+EPOCH = datetime(1970, 1, 1)
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """Начало часового или суточного бакета, в который попадает момент"""
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if granularity == GRANULARITY_DAY:
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def bucket_ranges(
+    buckets: Iterable[datetime], size: timedelta
+) -> list[tuple[datetime, datetime]]:
+    """Склеивает соседние бакеты в диапазоны [start, end)"""
+    ranges = []
+    for bucket in sorted(buckets):
+        if ranges and ranges[-1][1] == bucket:
+            ranges[-1] = (ranges[-1][0], bucket + size)
+        else:
+            ranges.append((bucket, bucket + size))
+    return ranges
+
+
+def bucket_key(column: ColumnElement, size: timedelta) -> ColumnElement:
+    """SQL-выражение начала бакета в секундах от эпохи.
+
+    Размер подставляется литералом: на PostgreSQL выражение в SELECT и
+    GROUP BY должно совпадать текстуально, а не через разные параметры.
+    """
+    seconds = literal_column(str(int(size.total_seconds())), BigInteger)
+    return epoch_seconds(column) // seconds * seconds
+
+
+def from_epoch(seconds: int) -> datetime:
+    return EPOCH + timedelta(seconds=seconds)
+
+
+def in_ranges(
+    column: ColumnElement, ranges: list[tuple[datetime, datetime]]
+) -> ColumnElement:
+    return or_(*(and_(column >= start, column < end) for start, end in ranges))
+
+
+def percentile(values: list[int], q: float) -> int | None:
+    """Перцентиль отсортированного списка с линейной интерполяцией"""
+    if not values:
+        return None
+
+    position = (len(values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return round(values[lower] + (values[upper] - values[lower]) * (position - lower))
+
+
+class ChannelRollups:
+    """Maintains hourly and daily per-channel aggregates in `channel_rollups`.
+
+    After every save only the buckets touched by the new channel snapshot or
+    by written posts are recomputed from raw rows, so series reads never
+    touch `channel_stats` or `message_stats`.
+    """
+
+    async def update(
+        self,
+        channel_id: int,
+        snapshot_times: Iterable[datetime] = (),
+        post_dates: Iterable[datetime] = (),
+    ) -> int:
+        """Пересчитывает бакеты, затронутые снимками канала и записанными постами"""
+        moments = [*snapshot_times, *post_dates]
+        if not moments:
+            return 0
+
+        written = 0
+        for granularity in GRANULARITIES:
+            buckets = {bucket_start(moment, granularity) for moment in moments}
+            written += await self._recompute(channel_id, granularity, buckets)
+        return written
+
+    async def backfill(self, channel_ids: list[int] | None = None) -> int:
+        """Строит роллапы по всем сырым данным (всех или указанных каналов)"""
+        async with get_uow() as uow:
+            channel_stats_repo = await uow.get_repo(ChannelStats)
+            message_stats_repo = await uow.get_repo(MessageStats)
+            if channel_ids is None:
+                channel_ids = sorted(
+                    set(await channel_stats_repo.distinct(ChannelStats.channel_id))
+                    | set(await message_stats_repo.distinct(MessageStats.channel_id))
+                )
+
+        written = 0
+        for channel_id in channel_ids:
+            async with get_uow() as uow:
+                channel_stats_repo = await uow.get_repo(ChannelStats)
+                message_stats_repo = await uow.get_repo(MessageStats)
+                bounds = [
+                    await channel_stats_repo.scalar(
+                        func.min(ChannelStats.scraped_at),
+                        ChannelStats.channel_id == channel_id,
+                    ),
+                    await channel_stats_repo.scalar(
+                        func.max(ChannelStats.scraped_at),
+                        ChannelStats.channel_id == channel_id,
+                    ),
+                    await message_stats_repo.scalar(
+                        func.min(MessageStats.date),
+                        MessageStats.channel_id == channel_id,
+                    ),
+                    await message_stats_repo.scalar(
+                        func.max(MessageStats.date),
+                        MessageStats.channel_id == channel_id,
+                    ),
+                ]
+
+            bounds = [bound for bound in bounds if bound is not None]
+            if not bounds:
+                continue
+
+            start = bucket_start(min(bounds), GRANULARITY_DAY)
+            end = max(bounds) + timedelta(microseconds=1)
+            channel_written = 0
+            while start < end:
+                window_end = min(start + BACKFILL_WINDOW, end)
+                for granularity in GRANULARITIES:
+                    buckets = await self._data_buckets(
+                        channel_id, granularity, start, window_end
+                    )
+                    channel_written += await self._recompute(
+                        channel_id, granularity, buckets
+                    )
+                start += BACKFILL_WINDOW
+
+            logger.info(
+                f"Backfilled {channel_written} rollups for channel {channel_id}"
+            )
+            written += channel_written
+
+        return written
+
+    async def get_series(
+        self,
+        channel_id: int,
+        granularity: str,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        limit: int | None = None,
+    ) -> list[ChannelRollup]:
+        """Читает последние `limit` бакетов диапазона в хронологическом порядке"""
+        expressions = [
+            ChannelRollup.channel_id == channel_id,
+            ChannelRollup.granularity == granularity,
+        ]
+        if since is not None:
+            expressions.append(ChannelRollup.bucket_start >= since)
+        if until is not None:
+            expressions.append(ChannelRollup.bucket_start < until)
+
+        async with get_uow() as uow:
+            rollup_repo = await uow.get_repo(ChannelRollup)
+            rollups = await rollup_repo.filter(
+                *expressions, order_by=[ChannelRollup.bucket_start.desc()], limit=limit
+            )
+        return rollups[::-1]
+
+    async def _data_buckets(
+        self, channel_id: int, granularity: str, start: datetime, end: datetime
+    ) -> set[datetime]:
+        """Бакеты из [start, end), в которые попадают снимки канала или посты"""
+        size = GRANULARITIES[granularity]
+        async with get_uow() as uow:
+            channel_stats_repo = await uow.get_repo(ChannelStats)
+            message_stats_repo = await uow.get_repo(MessageStats)
+            keys = await channel_stats_repo.distinct(
+                bucket_key(ChannelStats.scraped_at, size),
+                ChannelStats.channel_id == channel_id,
+                ChannelStats.scraped_at >= start,
+                ChannelStats.scraped_at < end,
+            )
+            keys += await message_stats_repo.distinct(
+                bucket_key(MessageStats.date, size),
+                MessageStats.channel_id == channel_id,
+                MessageStats.date >= start,
+                MessageStats.date < end,
+            )
+        return {from_epoch(key) for key in keys}
+
+    async def _recompute(
+        self, channel_id: int, granularity: str, buckets: set[datetime]
+    ) -> int:
+        """Пересчитывает указанные бакеты, агрегируя каждый из них в SQL.
+
+        Соседние бакеты склеиваются в диапазоны, так что данные между
+        затронутыми бакетами не читаются; закрытие предыдущего бакета берётся
+        одним запросом по индексу на диапазон.
+        """
+        if not buckets:
+            return 0
+
+        size = GRANULARITIES[granularity]
+        ranges = bucket_ranges(buckets, size)
+        now = datetime.now()
+        written = 0
+
+        async with get_uow() as uow:
+            channel_stats_repo = await uow.get_repo(ChannelStats)
+            message_stats_repo = await uow.get_repo(MessageStats)
+            rollup_repo = await uow.get_repo(ChannelRollup)
+
+            for offset in range(0, len(ranges), RANGES_PER_QUERY):
+                chunk = ranges[offset : offset + RANGES_PER_QUERY]
+                posts = await self._post_aggregates(
+                    message_stats_repo, channel_id, size, chunk
+                )
+                subscribers = await self._subscribers(
+                    channel_stats_repo, channel_id, size, chunk
+                )
+
+                rows = []
+                for start, end in chunk:
+                    close = None
+                    bucket = start
+                    while bucket < end:
+                        snapshots = subscribers.get(bucket, [])
+                        counts = [count for count in snapshots if count is not None]
+                        if counts and close is None:
+                            close = await self._close_before(
+                                channel_stats_repo, channel_id, bucket
+                            )
+                        rows.append(
+                            {
+                                "channel_id": channel_id,
+                                "granularity": granularity,
+                                "bucket_start": bucket,
+                                "snapshots": len(snapshots),
+                                "subscribers_open": counts[0] if counts else None,
+                                "subscribers_close": counts[-1] if counts else None,
+                                "subscribers_delta": (
+                                    counts[-1]
+                                    - (close if close is not None else counts[0])
+                                    if counts
+                                    else None
+                                ),
+                                "updated_at": now,
+                                **posts.get(bucket, EMPTY_POST_AGGREGATES),
+                            }
+                        )
+                        if counts:
+                            close = counts[-1]
+                        bucket += size
+
+                written += await rollup_repo.upsert(
+                    rows, ROLLUP_KEY, ROLLUP_UPDATE_COLUMNS
+                )
+            await uow.commit()
+
+        return written
+
+    @staticmethod
+    async def _post_aggregates(
+        repo: DatabaseRepo,
+        channel_id: int,
+        size: timedelta,
+        ranges: list[tuple[datetime, datetime]],
+    ) -> dict[datetime, dict]:
+        """Агрегаты постов по бакетам: суммы в SQL, перцентили по колонке views"""
+        key = bucket_key(MessageStats.date, size)
+        expressions = [
+            MessageStats.channel_id == channel_id,
+            in_ranges(MessageStats.date, ranges),
+        ]
+        totals = await repo.columns(
+            [
+                key,
+                func.count(),
+                func.coalesce(func.sum(MessageStats.views), 0),
+                func.coalesce(func.sum(MessageStats.forwards), 0),
+                func.coalesce(func.sum(json_values_sum(MessageStats.reactions)), 0),
+            ],
+            *expressions,
+            group_by=[key],
+        )
+        views = await repo.columns(
+            [key, MessageStats.views],
+            *expressions,
+            MessageStats.views.is_not(None),
+            order_by=[key, MessageStats.views],
+        )
+
+        bucket_views = defaultdict(list)
+        for bucket, value in views:
+            bucket_views[bucket].append(value)
+
+        aggregates = {}
+        for bucket, posts, views_sum, forwards_sum, reactions_total in totals:
+            sorted_views = bucket_views[bucket]
+            aggregates[from_epoch(bucket)] = {
+                "posts": posts,
+                "views_sum": views_sum,
+                "views_p50": percentile(sorted_views, 0.5),
+                "views_p90": percentile(sorted_views, 0.9),
+                "forwards_sum": forwards_sum,
+                "reactions_total": reactions_total,
+            }
+        return aggregates
+
+    @staticmethod
+    async def _subscribers(
+        repo: DatabaseRepo,
+        channel_id: int,
+        size: timedelta,
+        ranges: list[tuple[datetime, datetime]],
+    ) -> dict[datetime, list[int | None]]:
+        """Подписчики снимков по бакетам в хронологическом порядке.
+
+        Инкрементальные снимки тоже входят: число подписчиков в них берётся из
+        полной информации о канале, неполны только агрегаты по постам.
+        """
+        snapshots = await repo.columns(
+            [bucket_key(ChannelStats.scraped_at, size), ChannelStats.subscribers_count],
+            ChannelStats.channel_id == channel_id,
+            in_ranges(ChannelStats.scraped_at, ranges),
+            order_by=[ChannelStats.scraped_at],
+        )
+        subscribers = defaultdict(list)
+        for bucket, count in snapshots:
+            subscribers[from_epoch(bucket)].append(count)
+        return subscribers
+
+    @staticmethod
+    async def _close_before(
+        repo: DatabaseRepo, channel_id: int, moment: datetime
+    ) -> int | None:
+        """Число подписчиков в последнем снимке до момента"""
+        previous = await repo.columns(
+            [ChannelStats.subscribers_count],
+            ChannelStats.channel_id == channel_id,
+            ChannelStats.scraped_at < moment,
+            ChannelStats.subscribers_count.is_not(None),
+            order_by=[ChannelStats.scraped_at.desc()],
+            limit=1,
+        )
+        return previous[0][0] if previous else None
@@ -1,5 +1,8 @@
+import asyncio
+import hashlib
 import os
 import logging
+import time
 
 import boto3
 
@@ -12,16 +15,63 @@ from core.config import (
     S3_BUCKET_NAME,
     S3_SESSION_KEY,
     S3_REGION,
+    S3_UPLOAD_INTERVAL,
     LOCAL_SESSION_PATH,
 )
+from core.metrics import S3_BYTES, stage_timer
 
 logger = logging.getLogger(__name__)
 
 
-class S3SessionManager:
+class SyncStats:
+    """Counters and timings of session transfers"""
+
     def __init__(self):
+        self.downloads = 0
+        self.download_seconds = 0.0
+        self.uploads = 0
+        self.upload_seconds = 0.0
+        self.last_upload_seconds = 0.0
+        self.uploaded_bytes = 0
+        self.skipped_unchanged = 0
+        self.scheduled = 0
+        self.coalesced = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "downloads": self.downloads,
+            "download_seconds": round(self.download_seconds, 3),
+            "uploads": self.uploads,
+            "upload_seconds": round(self.upload_seconds, 3),
+            "last_upload_seconds": round(self.last_upload_seconds, 3),
+            "uploaded_bytes": self.uploaded_bytes,
+            "skipped_unchanged": self.skipped_unchanged,
+            "scheduled": self.scheduled,
+            "coalesced": self.coalesced,
+        }
+
+
+class S3SessionManager:
+    """Syncs Telethon session files with S3.
+
+    boto3 calls run in a worker thread. Uploads are skipped when the file
+    hash matches the last synced one; `schedule_upload` coalesces requests
+    into at most one upload per key every `upload_interval` seconds. A
+    request that arrives while an upload is running marks the session dirty
+    and gets a follow-up upload, since the running one may have read the
+    file before the change.
+    """
+
+    def __init__(self, upload_interval: float = S3_UPLOAD_INTERVAL):
         self.s3_client = None
         self._initialized = False
+        self.upload_interval = upload_interval
+        self._synced_hashes: dict[str, str] = {}
+        self._last_upload: dict[str, float] = {}
+        self._pending: dict[str, asyncio.Task] = {}
+        self._uploading: dict[str, asyncio.Future] = {}
+        self._dirty: set[str] = set()
+        self.stats = SyncStats()
 
     def initialize(self):
         """Initialize S3 client"""
@@ -51,19 +101,32 @@ class S3SessionManager:
             logger.error(f"Unexpected error during S3 initialization: {e}")
             return False
 
-    async def download_session(self) -> bool:
+    async def download_session(self, session_key: str = S3_SESSION_KEY) -> bool:
         """Download session file from S3"""
         if not self._initialized:
             logger.warning("S3 not initialized, using local session")
             return False
 
+        local_path = self.get_session_path(session_key)
         try:
-            os.makedirs(os.path.dirname(LOCAL_SESSION_PATH), exist_ok=True)
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+
+            started = time.perf_counter()
+            with stage_timer("s3_download"):
+                await asyncio.to_thread(
+                    self.s3_client.download_file,
+                    S3_BUCKET_NAME,
+                    session_key,
+                    local_path,
+                )
+            S3_BYTES.labels("download").inc(os.path.getsize(local_path))
+            self.stats.downloads += 1
+            self.stats.download_seconds += time.perf_counter() - started
 
-            self.s3_client.download_file(
-                S3_BUCKET_NAME, S3_SESSION_KEY, LOCAL_SESSION_PATH
+            self._synced_hashes[session_key] = await asyncio.to_thread(
+                self._file_hash, local_path
             )
-            logger.info(f"Session downloaded from S3: {S3_SESSION_KEY}")
+            logger.info(f"Session downloaded from S3: {session_key}")
             return True
 
         except ClientError as e:
@@ -76,36 +139,122 @@ class S3SessionManager:
             logger.error(f"Unexpected error downloading session: {e}")
             return False
 
-    async def upload_session(self) -> bool:
-        """Upload session file to S3"""
+    async def upload_session(self, session_key: str = S3_SESSION_KEY) -> bool:
+        """Upload session file to S3 if it changed since the last sync"""
         if not self._initialized:
             logger.warning("S3 not initialized, session will be stored locally only")
             return False
 
-        if not os.path.exists(LOCAL_SESSION_PATH):
+        local_path = self.get_session_path(session_key)
+        if not os.path.exists(local_path):
             logger.warning("Local session file not found, nothing to upload")
             return False
 
         try:
-            self.s3_client.upload_file(
-                LOCAL_SESSION_PATH, S3_BUCKET_NAME, S3_SESSION_KEY
-            )
-            logger.info(f"Session uploaded to S3: {S3_SESSION_KEY}")
+            session_hash = await asyncio.to_thread(self._file_hash, local_path)
+            if self._synced_hashes.get(session_key) == session_hash:
+                self.stats.skipped_unchanged += 1
+                return True
+
+            started = time.perf_counter()
+            with stage_timer("s3_upload"):
+                await asyncio.to_thread(
+                    self.s3_client.upload_file, local_path, S3_BUCKET_NAME, session_key
+                )
+            elapsed = time.perf_counter() - started
+
+            self._synced_hashes[session_key] = session_hash
+            self._last_upload[session_key] = time.monotonic()
+            self.stats.uploads += 1
+            self.stats.upload_seconds += elapsed
+            self.stats.last_upload_seconds = elapsed
+            session_size = os.path.getsize(local_path)
+            self.stats.uploaded_bytes += session_size
+            S3_BYTES.labels("upload").inc(session_size)
+            logger.info(f"Session uploaded to S3: {session_key} in {elapsed:.3f}s")
             return True
 
         except Exception as e:
             logger.error(f"Error uploading session to S3: {e}")
             return False
 
-    def get_session_path(self) -> str:
-        """Get local session file path"""
-        return LOCAL_SESSION_PATH
+    def schedule_upload(self, session_key: str = S3_SESSION_KEY):
+        """Queue a debounced background upload; repeated calls are coalesced"""
+        if not self._initialized:
+            return
+
+        self.stats.scheduled += 1
+        if session_key in self._pending:
+            self.stats.coalesced += 1
+            if session_key in self._uploading:
+                self._dirty.add(session_key)
+            return
+
+        task = asyncio.create_task(self._delayed_upload(session_key))
+        self._pending[session_key] = task
+        task.add_done_callback(lambda _: self._pending.pop(session_key, None))
+
+    async def _delayed_upload(self, session_key: str):
+        while True:
+            last_upload = self._last_upload.get(session_key)
+            if last_upload is not None:
+                delay = last_upload + self.upload_interval - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            # отмена (flush) прерывает только ожидание: начатая загрузка
+            # доходит до конца, flush дожидается её через _uploading
+            self._dirty.discard(session_key)
+            upload = asyncio.ensure_future(self.upload_session(session_key))
+            self._uploading[session_key] = upload
+            upload.add_done_callback(lambda _: self._uploading.pop(session_key, None))
+            await asyncio.shield(upload)
+
+            if session_key not in self._dirty:
+                return
+
+    async def flush(self, session_keys: list[str] | None = None):
+        """Upload pending (or the given) sessions right away, e.g. on shutdown"""
+        keys = set(self._pending)
+        if session_keys is not None:
+            keys.update(session_keys)
+
+        pending = list(self._pending.values())
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        # загрузки, начатые до flush, завершаются раньше новых тех же файлов
+        await asyncio.gather(*self._uploading.values(), return_exceptions=True)
+        self._dirty.difference_update(keys)
+
+        for session_key in keys:
+            await self.upload_session(session_key)
+
+    @staticmethod
+    def _file_hash(path: str) -> str:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def get_session_path(self, session_key: str = S3_SESSION_KEY) -> str:
+        """Локальный путь файла сессии, повторяющий полный ключ объекта в S3.
+
+        a/x.session и b/x.session — разные аккаунты, поэтому одного имени
+        файла для различения недостаточно.
+        """
+        if session_key == S3_SESSION_KEY:
+            return LOCAL_SESSION_PATH
+
+        parts = [part for part in session_key.split("/") if part not in ("", ".")]
+        if not parts or ".." in parts:
+            raise ValueError(f"Invalid session key: {session_key}")
+        return os.path.join(os.path.dirname(LOCAL_SESSION_PATH), *parts)
 
-    async def cleanup_local_session(self):
+    async def cleanup_local_session(self, session_key: str = S3_SESSION_KEY):
         """Remove local session file (for security)"""
+        local_path = self.get_session_path(session_key)
         try:
-            if os.path.exists(LOCAL_SESSION_PATH):
-                os.remove(LOCAL_SESSION_PATH)
+            if os.path.exists(local_path):
+                os.remove(local_path)
                 logger.info("Local session file cleaned up")
         except Exception as e:
             logger.error(f"Error cleaning up local session: {e}")
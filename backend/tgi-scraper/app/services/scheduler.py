@@ -0,0 +1,282 @@
+import asyncio
+from datetime import datetime, timedelta
+import logging
+import math
+import random
+
+from sqlalchemy import func
+
+from core.config import (
+    SCHEDULER_CONCURRENCY,
+    SCHEDULER_DEFAULT_INTERVAL,
+    SCHEDULER_FULL_REFRESH_EVERY,
+    SCHEDULER_JITTER,
+    SCHEDULER_MIN_INTERVAL,
+    SCHEDULER_TICK,
+)
+from db.models.stats import MessageStats
+from db.models.watchlist import WatchedChannel
+from db.uow import get_uow
+
+from app.services.entity_cache import normalize_channel_identifier
+from app.services.telegram_scraper import TelegramScraper
+
+
+logger = logging.getLogger(__name__)
+
+# окно, по которому считается частота постинга канала
+VELOCITY_WINDOW = timedelta(days=7)
+# после неудачи следующий запуск откладывается на interval * 2^failures, не больше
+MAX_BACKOFF_FACTOR = 8
+
+
+def channel_priority(subscribers: int | None, posts_per_day: float | None) -> float:
+    """Крупные и часто постящие каналы обновляются первыми"""
+    return math.log10(1 + (subscribers or 0)) + math.log2(1 + (posts_per_day or 0))
+
+
+class WatchlistScheduler:
+    """Refreshes channels from the persisted watchlist in the background.
+
+    Due channels are dispatched highest priority first, at most `concurrency`
+    at a time, and dispatching pauses while every Telegram account is close
+    to its rate limits. Each next run gets random jitter so refreshes of
+    channels added together drift apart instead of arriving in bursts.
+
+    Refreshes are incremental except the first one and every
+    `full_refresh_every`-th after it: only full snapshots are served from
+    the snapshot cache, so a watched channel needs one regularly.
+    """
+
+    def __init__(
+        self,
+        scraper: TelegramScraper,
+        concurrency: int = SCHEDULER_CONCURRENCY,
+        tick: float = SCHEDULER_TICK,
+        jitter: float = SCHEDULER_JITTER,
+        full_refresh_every: int = SCHEDULER_FULL_REFRESH_EVERY,
+    ):
+        self.scraper = scraper
+        self.concurrency = concurrency
+        self.tick = tick
+        self.jitter = jitter
+        self.full_refresh_every = full_refresh_every
+        self._loop_task: asyncio.Task | None = None
+        self._running: dict[str, asyncio.Task] = {}
+        self.dispatched = 0
+        self.failed = 0
+        self.paused_ticks = 0
+
+    async def start(self):
+        """Start the dispatch loop"""
+        self._loop_task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """Stop dispatching and cancel refreshes in progress"""
+        tasks = [*self._running.values()]
+        if self._loop_task is not None:
+            tasks.append(self._loop_task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop_task = None
+
+    async def add(
+        self,
+        channel_identifier: str,
+        interval_seconds: int | None = None,
+        limit_messages: int = 100,
+    ) -> WatchedChannel:
+        """Добавляет канал в вотчлист или меняет его настройки.
+
+        Канал хранится под нормализованным идентификатором, так что @name,
+        name и t.me/name — одна запись.
+        """
+        channel_identifier = normalize_channel_identifier(channel_identifier)
+        if not channel_identifier:
+            raise ValueError("Channel identifier is empty")
+
+        interval_seconds = interval_seconds or SCHEDULER_DEFAULT_INTERVAL
+        if interval_seconds < SCHEDULER_MIN_INTERVAL:
+            raise ValueError(
+                f"Refresh interval must be at least {SCHEDULER_MIN_INTERVAL} seconds"
+            )
+
+        async with get_uow() as uow:
+            repo = await uow.get_repo(WatchedChannel)
+            channel = await repo.get(channel_identifier)
+            if channel is not None:
+                data = {
+                    "interval_seconds": interval_seconds,
+                    "limit_messages": limit_messages,
+                }
+                # снимок с прежним лимитом может не покрывать новый
+                if limit_messages != channel.limit_messages:
+                    data["incremental_runs"] = None
+                return await repo.update(channel, data)
+
+            # первый запуск размазывается по доле интервала, а не приходится на один тик
+            now = datetime.now()
+            return await repo.create(
+                {
+                    "channel_identifier": channel_identifier,
+                    "interval_seconds": interval_seconds,
+                    "limit_messages": limit_messages,
+                    "next_run_at": now
+                    + timedelta(
+                        seconds=random.uniform(0, interval_seconds * self.jitter)
+                    ),
+                    "created_at": now,
+                }
+            )
+
+    async def remove(self, channel_identifier: str) -> bool:
+        """Удаляет канал из вотчлиста (идентификатор в любом написании)"""
+        async with get_uow() as uow:
+            repo = await uow.get_repo(WatchedChannel)
+            channel = await repo.get(normalize_channel_identifier(channel_identifier))
+            if channel is None:
+                return False
+            await repo.delete_instance(channel)
+        return True
+
+    async def channels(self) -> list[WatchedChannel]:
+        async with get_uow() as uow:
+            repo = await uow.get_repo(WatchedChannel)
+            return await repo.filter(
+                order_by=[
+                    WatchedChannel.priority.desc(),
+                    WatchedChannel.next_run_at,
+                ]
+            )
+
+    def stats(self) -> dict:
+        return {
+            "running": len(self._running),
+            "concurrency": self.concurrency,
+            "dispatched": self.dispatched,
+            "failed": self.failed,
+            "paused_ticks": self.paused_ticks,
+        }
+
+    async def _loop(self):
+        while True:
+            try:
+                await self._dispatch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Watchlist dispatch failed: {e}")
+            await asyncio.sleep(self.tick)
+
+    async def _dispatch(self) -> int:
+        """Запускает обновление каналов, срок которых подошёл, в пределах лимита"""
+        free = self.concurrency - len(self._running)
+        if free <= 0:
+            return 0
+        if self.scraper.pool.is_tight():
+            self.paused_ticks += 1
+            return 0
+
+        expressions = [WatchedChannel.next_run_at <= datetime.now()]
+        if self._running:
+            expressions.append(
+                WatchedChannel.channel_identifier.not_in(list(self._running))
+            )
+
+        async with get_uow() as uow:
+            repo = await uow.get_repo(WatchedChannel)
+            due = await repo.filter(
+                *expressions,
+                order_by=[WatchedChannel.priority.desc(), WatchedChannel.next_run_at],
+                limit=free,
+            )
+
+        for channel in due:
+            identifier = channel.channel_identifier
+            task = asyncio.create_task(
+                self._refresh(
+                    identifier, channel.limit_messages, channel.incremental_runs
+                )
+            )
+            self._running[identifier] = task
+            task.add_done_callback(
+                lambda _, identifier=identifier: self._running.pop(identifier, None)
+            )
+
+        self.dispatched += len(due)
+        return len(due)
+
+    async def _refresh(
+        self,
+        channel_identifier: str,
+        limit_messages: int,
+        incremental_runs: int | None = None,
+    ):
+        """Полностью обновляется первый запуск и каждый full_refresh_every-й"""
+        incremental = (
+            incremental_runs is not None
+            and incremental_runs + 1 < self.full_refresh_every
+        )
+        try:
+            result = await self.scraper.scrape_channel_stats(
+                channel_identifier,
+                limit_messages,
+                incremental=incremental,
+                include_text=False,
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            logger.warning(f"Scheduled refresh of {channel_identifier} failed: {e}")
+            await self._reschedule(channel_identifier, {"last_error": str(e)})
+            return
+
+        posts_per_day = await self._posts_per_day(result["channel_id"])
+        await self._reschedule(
+            channel_identifier,
+            {
+                "channel_id": result["channel_id"],
+                "subscribers_count": result["subscribers_count"],
+                "posts_per_day": posts_per_day,
+                "priority": channel_priority(
+                    result["subscribers_count"], posts_per_day
+                ),
+                "incremental_runs": incremental_runs + 1 if incremental else 0,
+                "last_error": None,
+            },
+        )
+
+    async def _posts_per_day(self, channel_id: int) -> float:
+        async with get_uow() as uow:
+            repo = await uow.get_repo(MessageStats)
+            posts = await repo.scalar(
+                func.count(MessageStats.id),
+                MessageStats.channel_id == channel_id,
+                MessageStats.date >= datetime.now() - VELOCITY_WINDOW,
+            )
+        return posts / VELOCITY_WINDOW.days
+
+    async def _reschedule(self, channel_identifier: str, data: dict):
+        """Записывает итог запуска и назначает следующий с джиттером"""
+        async with get_uow() as uow:
+            repo = await uow.get_repo(WatchedChannel)
+            channel = await repo.get(channel_identifier)
+            if channel is None:
+                return
+
+            failures = channel.failures + 1 if data.get("last_error") else 0
+            delay = channel.interval_seconds * min(2**failures, MAX_BACKOFF_FACTOR)
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+
+            now = datetime.now()
+            await repo.update(
+                channel,
+                {
+                    **data,
+                    "failures": failures,
+                    "last_run_at": now,
+                    "next_run_at": now + timedelta(seconds=delay),
+                },
+            )
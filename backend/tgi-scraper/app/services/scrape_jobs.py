@@ -0,0 +1,222 @@
+import asyncio
+from datetime import datetime
+from functools import partial
+import logging
+import uuid
+
+from core.config import SCRAPE_JOB_WORKERS
+from db.models.jobs import ScrapeJob
+from db.uow import get_uow
+
+from app.schemas.stats import ScrapeResponse
+from app.services.telegram_scraper import TelegramScraper
+
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISHED_STATUSES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+
+class ScrapeJobManager:
+    """Runs scrape jobs on a bounded pool of asyncio workers.
+
+    Jobs are persisted in `scrape_jobs`; queued and interrupted jobs are
+    picked up again on the next start. Status transitions (start, finish,
+    cancel) run under one lock, so a cancel cannot overwrite a result that is
+    being written, and the reverse.
+    """
+
+    def __init__(self, scraper: TelegramScraper, workers: int = SCRAPE_JOB_WORKERS):
+        self.scraper = scraper
+        self.workers = workers
+        self._queue: asyncio.Queue[uuid.UUID] = asyncio.Queue()
+        self._worker_tasks: list[asyncio.Task] = []
+        self._running: dict[uuid.UUID, asyncio.Task] = {}
+        self._progress: dict[uuid.UUID, int] = {}
+        self._cancelled: set[uuid.UUID] = set()
+        self._status_lock = asyncio.Lock()
+
+    async def start(self):
+        """Requeue unfinished jobs and start the workers"""
+        async with get_uow() as uow:
+            repo = await uow.get_repo(ScrapeJob)
+            pending = await repo.filter(
+                ScrapeJob.status.in_([JOB_QUEUED, JOB_RUNNING]),
+                order_by=[ScrapeJob.created_at],
+            )
+            for job in pending:
+                if job.status == JOB_RUNNING:
+                    await repo.update(
+                        job, {"status": JOB_QUEUED, "started_at": None, "progress": 0}
+                    )
+                self._queue.put_nowait(job.id)
+
+        if pending:
+            logger.info(f"Requeued {len(pending)} unfinished scrape jobs")
+
+        self._worker_tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+
+    async def stop(self):
+        """Stop the workers; interrupted jobs stay `running` and are requeued on start"""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    async def submit(self, request: dict) -> ScrapeJob:
+        async with get_uow() as uow:
+            repo = await uow.get_repo(ScrapeJob)
+            job = await repo.create(
+                {
+                    "status": JOB_QUEUED,
+                    "request": request,
+                    "progress": 0,
+                    "created_at": datetime.now(),
+                }
+            )
+
+        self._queue.put_nowait(job.id)
+        return job
+
+    async def get(self, job_id: uuid.UUID) -> ScrapeJob | None:
+        async with get_uow() as uow:
+            repo = await uow.get_repo(ScrapeJob)
+            job = await repo.get(job_id)
+
+        if job is not None and job_id in self._progress:
+            job.progress = self._progress[job_id]
+        return job
+
+    async def cancel(self, job_id: uuid.UUID) -> ScrapeJob | None:
+        """Отменяет задачу в очереди или в работе.
+
+        Если скрапинг уже завершился, а итог ещё не записан, задача не
+        отменяется: её статус запишет _finish.
+        """
+        async with self._status_lock:
+            async with get_uow() as uow:
+                repo = await uow.get_repo(ScrapeJob)
+                job = await repo.get(job_id)
+                if job is None or job.status in FINISHED_STATUSES:
+                    return job
+
+                task = self._running.get(job_id)
+                if task is not None:
+                    if task.done():
+                        return job
+                    self._cancelled.add(job_id)
+                    task.cancel()
+
+                return await repo.update(
+                    job,
+                    {
+                        "status": JOB_CANCELLED,
+                        "progress": self._progress.get(job_id, job.progress),
+                        "finished_at": datetime.now(),
+                    },
+                )
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._worker_tasks),
+            "queued": self._queue.qsize(),
+            "running": len(self._running),
+        }
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Scrape job {job_id} crashed: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: uuid.UUID):
+        async with self._status_lock:
+            async with get_uow() as uow:
+                repo = await uow.get_repo(ScrapeJob)
+                job = await repo.get(job_id)
+                if job is None or job.status != JOB_QUEUED:
+                    return
+                await repo.update(
+                    job, {"status": JOB_RUNNING, "started_at": datetime.now()}
+                )
+                request = dict(job.request)
+
+            self._progress[job_id] = 0
+            task = asyncio.create_task(
+                self.scraper.scrape_channel_stats(
+                    request["channel_identifier"],
+                    request["limit_messages"],
+                    incremental=request.get("incremental", False),
+                    hot_window_hours=request.get("hot_window_hours"),
+                    progress=partial(self._report_progress, job_id),
+                )
+            )
+            self._running[job_id] = task
+
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if job_id in self._cancelled:
+                logger.info(f"Scrape job {job_id} cancelled")
+                return
+            raise
+        except Exception as e:
+            await self._finish(job_id, JOB_FAILED, error=str(e))
+        else:
+            await self._finish(
+                job_id,
+                JOB_DONE,
+                result=ScrapeResponse(**result).model_dump(mode="json"),
+            )
+        finally:
+            self._running.pop(job_id, None)
+            self._progress.pop(job_id, None)
+            self._cancelled.discard(job_id)
+
+    def _report_progress(self, job_id: uuid.UUID, count: int):
+        self._progress[job_id] = count
+
+    async def _finish(
+        self,
+        job_id: uuid.UUID,
+        status: str,
+        result: dict | None = None,
+        error: str | None = None,
+    ):
+        async with self._status_lock:
+            async with get_uow() as uow:
+                repo = await uow.get_repo(ScrapeJob)
+                job = await repo.get(job_id)
+                if job is None or job.status != JOB_RUNNING:
+                    return
+
+                progress = self._progress.get(job_id, job.progress)
+                if result is not None:
+                    progress = len(result["messages"])
+
+                await repo.update(
+                    job,
+                    {
+                        "status": status,
+                        "progress": progress,
+                        "result": result,
+                        "error": error,
+                        "finished_at": datetime.now(),
+                    },
+                )
+
+        logger.info(f"Scrape job {job_id} finished: {status}")
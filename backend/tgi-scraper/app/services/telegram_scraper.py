@@ -1,315 +1,1093 @@
-from datetime import datetime
+import asyncio
+import base64
+from datetime import datetime, timedelta, timezone
+import json
 import logging
-from typing import Any
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, TypeVar
 
-from telethon import TelegramClient
-from telethon.tl.types import (
-    Message,
-    MessageMediaPhoto,
-    MessageMediaDocument,
-)
+from telethon.tl.types import Message
 from telethon.errors import (
     FloodWaitError,
     ChannelPrivateError,
     UsernameNotOccupiedError,
 )
 from telethon.tl.functions.channels import GetFullChannelRequest
-from telethon.tl.functions.messages import GetFullChatRequest
+from telethon.tl.functions.messages import GetFullChatRequest, GetMessagesViewsRequest
+
+from sqlalchemy import ColumnElement, func
 
-from core.config import TELEGRAM_API_ID, TELEGRAM_API_HASH
-from db.models.stats import ChannelStats, MessageStats
-from db.uow import get_uow
+from core.config import (
+    SCRAPE_BATCH_CONCURRENCY,
+    SCRAPE_HOT_WINDOW_HOURS,
+    SCRAPE_STREAM_CHUNK_SIZE,
+)
+from db.models.stats import (
+    ChannelStats,
+    MessageStats,
+    MessageStatsHistory,
+    ChannelWatermark,
+)
+from core.metrics import MESSAGES_SCRAPED, stage_timer, timed_stage
+from db.uow import UOW, get_uow
 
 from app.services.s3_session_manager import s3_manager
+from app.services.entity_cache import EntityCache, normalize_channel_identifier
+from app.services.single_flight import SingleFlight
+from app.services.rollups import ChannelRollups, GRANULARITY_HOUR, bucket_start
+from app.services.client_pool import TelegramAccount, TelegramClientPool
+from app.services.message_records import MessageBatch, MessageRecord
+from app.services.rate_limiter import (
+    METHOD_RESOLVE,
+    METHOD_FULL_INFO,
+    METHOD_HISTORY,
+    METHOD_VIEWS,
+    FloodWaitBudget,
+)
 
 
 logger = logging.getLogger(__name__)
 
+VIEWS_BATCH_SIZE = 100
+METRIC_COLUMNS = ["views", "forwards", "replies", "reactions"]
+METRIC_UPDATE_COLUMNS = ["scraped_at", *METRIC_COLUMNS]
+HISTORY_PAGE_SIZE = 100
+
+T = TypeVar("T")
+
 
 class TelegramScraper:
     def __init__(self):
-        self.client: TelegramClient | None = None
         self.session_manager = s3_manager
+        self.pool = TelegramClientPool(self.session_manager)
+        self.entity_cache = EntityCache()
+        self._background_refreshes: dict[str, asyncio.Task] = {}
+        self.scrape_flights = SingleFlight()
+        self.rollups = ChannelRollups()
 
     async def initialize(self):
-        """Initialize Telegram client with S3 session management"""
-        if not TELEGRAM_API_ID or not TELEGRAM_API_HASH:
-            raise ValueError("Telegram API credentials not configured")
-
+        """Initialize Telegram client pool with S3 session management"""
         self.session_manager.initialize()
+        self.entity_cache.load()
 
-        await self.session_manager.download_session()
+        await self.pool.initialize()
 
-        session_path = self.session_manager.get_session_path()
+    async def _with_account(
+        self, operation: Callable[[TelegramAccount, FloodWaitBudget], Awaitable[T]]
+    ) -> T:
+        """Выполняет операцию на наименее загруженном аккаунте.
 
-        self.client = TelegramClient(
-            session_path, int(TELEGRAM_API_ID), TELEGRAM_API_HASH
-        )
+        Короткие FloodWait поглощаются лимитером в пределах общего бюджета
+        операции. Аккаунт, получивший более длинный FloodWait, паркуется ровно
+        на e.seconds, а операция повторяется на другом свободном аккаунте.
+        """
+        if not self.pool.ready:
+            await self.initialize()
 
-        await self.client.connect()
+        budget = FloodWaitBudget()
+        while True:
+            async with self.pool.acquire() as account:
+                try:
+                    result = await operation(account, budget)
+                except FloodWaitError as e:
+                    account.park(e.seconds)
+                    logger.warning(
+                        f"Account {account.session_key} parked for {e.seconds}s by FloodWait"
+                    )
+                    if not self.pool.has_available():
+                        raise
+                    continue
 
-        if not await self.client.is_user_authorized():
-            logger.warning("Telegram client not authorized. Please authenticate.")
-            raise ValueError(
-                "Telegram client not authorized. Please authenticate first."
-            )
-        else:
-            logger.info("Telegram client authorized successfully")
-            await self.session_manager.upload_session()
+                self.session_manager.schedule_upload(account.session_key)
+                return result
 
     async def scrape_channel_stats(
-        self, channel_identifier: str, limit_messages: int = 100
+        self,
+        channel_identifier: str,
+        limit_messages: int = 100,
+        incremental: bool = False,
+        hot_window_hours: int | None = None,
+        progress: Callable[[int], None] | None = None,
+        include_text: bool = True,
     ) -> dict[str, Any]:
-        """Основной метод скрапинга статистики канала"""
-        if not self.client:
-            await self.initialize()
+        """Скрапит канал; одновременные одинаковые запросы выполняются один раз.
+
+        `progress` получает число уже скачанных сообщений (только у запроса,
+        который фактически выполняет скрапинг). Ответ каждый запрос строит
+        сам из общих записей, поэтому `include_text` в ключ не входит.
+        """
+        scraped = await self._scrape_shared(
+            channel_identifier, limit_messages, incremental, hot_window_hours, progress
+        )
+        return self._scrape_response(scraped, include_text)
+
+    async def _scrape_shared(
+        self,
+        channel_identifier: str,
+        limit_messages: int,
+        incremental: bool,
+        hot_window_hours: int | None,
+        progress: Callable[[int], None] | None = None,
+    ) -> dict[str, Any]:
+        """Скачивает и сохраняет снимок под общим для всех запросов ключом single-flight"""
+        key = (
+            normalize_channel_identifier(channel_identifier),
+            limit_messages,
+            incremental,
+            hot_window_hours,
+        )
+        return await self.scrape_flights.run(
+            key,
+            lambda: self._scrape_channel_stats(
+                channel_identifier,
+                limit_messages,
+                incremental,
+                hot_window_hours,
+                progress,
+            ),
+        )
 
+    async def _scrape_channel_stats(
+        self,
+        channel_identifier: str,
+        limit_messages: int = 100,
+        incremental: bool = False,
+        hot_window_hours: int | None = None,
+        progress: Callable[[int], None] | None = None,
+    ) -> dict[str, Any]:
+        """Основной метод скрапинга статистики канала: скачивает и сохраняет снимок.
+
+        В инкрементальном режиме скачиваются только посты новее сохранённого
+        watermark'а и посты из «горячего» окна, у которых ещё растут счётчики.
+        """
+        scraped = await self._fetch_channel_stats(
+            channel_identifier,
+            limit_messages,
+            incremental,
+            hot_window_hours,
+            progress,
+        )
         try:
-            entity = await self.client.get_entity(channel_identifier)
+            await self._save_to_database(scraped)
+        except Exception as e:
+            logger.error(f"Scraping error: {e}")
+            raise ValueError(f"Scraping failed: {str(e)}")
 
-            channel_data = {
-                "channel_id": entity.id,
-                "username": getattr(entity, "username", None),
-                "title": getattr(
-                    entity, "title", getattr(entity, "first_name", "Unknown")
-                ),
-            }
+        return scraped
 
-            try:
-                if hasattr(entity, "broadcast") and entity.broadcast:
-                    full_channel = await self.client(GetFullChannelRequest(entity))
-                    channel_data.update(
-                        {
-                            "subscribers_count": getattr(
-                                full_channel.full_chat, "participants_count", None
-                            ),
-                            "description": getattr(
-                                full_channel.full_chat, "about", None
-                            ),
-                            "participants_count": getattr(
-                                full_channel.full_chat, "participants_count", None
-                            ),
-                        }
-                    )
-                else:
-                    full_chat = await self.client(GetFullChatRequest(entity.id))
-                    channel_data.update(
-                        {
-                            "subscribers_count": getattr(
-                                full_chat.full_chat, "participants_count", None
-                            ),
-                            "description": getattr(full_chat.full_chat, "about", None),
-                            "participants_count": getattr(
-                                full_chat.full_chat, "participants_count", None
-                            ),
-                        }
+    async def scrape_batch(
+        self,
+        requests: list[dict],
+        concurrency: int = SCRAPE_BATCH_CONCURRENCY,
+        include_text: bool = True,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Скрапит несколько каналов параллельно, отдавая итог каждого по готовности.
+
+        Не больше `concurrency` каналов скрапятся одновременно. Каждый канал
+        идёт через тот же single-flight, что и одиночный скрап, и сохраняется
+        своей транзакцией до того, как отдаётся его строка `result`: ошибка
+        одного канала не откатывает остальные и приходит строкой `error`.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def scrape(index: int, request: dict):
+            async with semaphore:
+                try:
+                    scraped = await self._scrape_shared(
+                        request["channel_identifier"],
+                        request.get("limit_messages", 100),
+                        request.get("incremental", False),
+                        request.get("hot_window_hours"),
                     )
-            except Exception as e:
-                logger.warning(f"Could not get full channel info: {e}")
-                channel_data.update(
-                    {
-                        "subscribers_count": getattr(
-                            entity, "participants_count", None
-                        ),
-                        "participants_count": getattr(
-                            entity, "participants_count", None
-                        ),
-                        "description": getattr(entity, "about", None),
+                except Exception as e:
+                    return index, None, e
+            return index, scraped, None
+
+        tasks = [
+            asyncio.create_task(scrape(index, request))
+            for index, request in enumerate(requests)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, scraped, error = await next_done
+                identifier = requests[index]["channel_identifier"]
+                if error is not None:
+                    yield {
+                        "type": "error",
+                        "index": index,
+                        "channel_identifier": identifier,
+                        "detail": str(error),
                     }
+                    continue
+
+                yield {
+                    "type": "result",
+                    "index": index,
+                    "channel_identifier": identifier,
+                    **self._scrape_response(scraped, include_text),
+                }
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @timed_stage("fetch")
+    async def _fetch_channel_stats(
+        self,
+        channel_identifier: str,
+        limit_messages: int = 100,
+        incremental: bool = False,
+        hot_window_hours: int | None = None,
+        progress: Callable[[int], None] | None = None,
+    ) -> dict[str, Any]:
+        """Скачивает канал и его сообщения, ничего не сохраняя"""
+        try:
+            return await self._with_account(
+                lambda account, budget: self._fetch_with_account(
+                    account,
+                    budget,
+                    channel_identifier,
+                    limit_messages,
+                    incremental,
+                    hot_window_hours,
+                    progress,
                 )
+            )
 
-            messages_data = []
-            total_views = 0
-            total_reactions = 0
-            total_forwards = 0
-            messages_with_stats = 0
+        except (ChannelPrivateError, UsernameNotOccupiedError) as e:
+            raise ValueError(f"Channel error: {str(e)}")
+        except FloodWaitError as e:
+            raise ValueError(f"Flood wait: {e.seconds} seconds")
+        except Exception as e:
+            logger.error(f"Scraping error: {e}")
+            raise ValueError(f"Scraping failed: {str(e)}")
 
-            async for message in self.client.iter_messages(
-                entity, limit=limit_messages
-            ):
-                if not isinstance(message, Message):
-                    continue
+    async def _fetch_with_account(
+        self,
+        account: TelegramAccount,
+        budget: FloodWaitBudget,
+        channel_identifier: str,
+        limit_messages: int,
+        incremental: bool,
+        hot_window_hours: int | None,
+        progress: Callable[[int], None] | None,
+    ) -> dict[str, Any]:
+        entity = await self._resolve_entity(account, budget, channel_identifier)
+        channel_data = await self._get_channel_data(account, budget, entity)
 
-                message_stats = await self._extract_message_stats(message)
-                messages_data.append(message_stats)
+        min_id = 0
+        if incremental:
+            if hot_window_hours is None:
+                hot_window_hours = SCRAPE_HOT_WINDOW_HOURS
+            min_id = await self._get_incremental_min_id(entity.id, hot_window_hours)
 
-                if message_stats["views"]:
-                    total_views += message_stats["views"]
-                    messages_with_stats += 1
+        messages = MessageBatch()
+        async for message in self._iter_history(
+            account, budget, entity, limit_messages, min_id
+        ):
+            if not isinstance(message, Message):
+                continue
 
-                total_forwards += message_stats["forwards"] or 0
-                total_reactions += sum(message_stats["reactions"].values())
+            messages.add(message)
+            if progress is not None:
+                progress(messages.count)
 
-            await self._save_to_database(
-                channel_data,
-                messages_data,
-                total_views,
-                total_forwards,
-                total_reactions,
-                messages_with_stats,
-            )
+        return {
+            "channel_data": channel_data,
+            "messages": messages,
+            "limit_messages": limit_messages,
+            "incremental": incremental,
+            "scraped_at": datetime.now(),
+        }
 
-            messages_response = []
-            for msg in messages_data:
-                messages_response.append(
-                    {
-                        "message_id": msg["message_id"],
-                        "date": msg["date"],
-                        "views": msg["views"],
-                        "forwards": msg["forwards"],
-                        "replies": msg["replies"],
-                        "reactions": msg["reactions"],
-                        "text": msg["text"],
-                        "media_type": msg["media_type"],
-                        "has_media": msg["has_media"],
-                    }
+    @staticmethod
+    def _scrape_response(scraped: dict, include_text: bool = True) -> dict[str, Any]:
+        channel_data = scraped["channel_data"]
+        return {
+            "channel_id": channel_data["channel_id"],
+            "username": channel_data["username"],
+            "title": channel_data["title"],
+            "description": channel_data.get("description"),
+            "subscribers_count": channel_data["subscribers_count"],
+            "participants_count": channel_data["participants_count"],
+            "messages": [
+                record.as_response(include_text)
+                for record in scraped["messages"].records
+            ],
+            "scraped_at": scraped["scraped_at"],
+            "data_age": 0.0,
+            "from_cache": False,
+        }
+
+    async def stream_channel_stats(
+        self,
+        channel_identifier: str,
+        limit_messages: int = 100,
+        incremental: bool = False,
+        hot_window_hours: int | None = None,
+        include_text: bool = True,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Стримит статистику канала: заголовок, по записи на сообщение, итог.
+
+        Сообщения сохраняются в базу пачками по SCRAPE_STREAM_CHUNK_SIZE, поэтому
+        память не растёт с числом сообщений. Строка channel_stats пишется
+        последней, так что оборванный стрим не считается полным снимком.
+        """
+        if not self.pool.ready:
+            await self.initialize()
+
+        budget = FloodWaitBudget()
+        try:
+            while True:
+                async with self.pool.acquire() as account:
+                    try:
+                        entity = await self._resolve_entity(
+                            account, budget, channel_identifier
+                        )
+                        channel_data = await self._get_channel_data(
+                            account, budget, entity
+                        )
+                    except FloodWaitError as e:
+                        account.park(e.seconds)
+                        if not self.pool.has_available():
+                            raise
+                        continue
+
+                    try:
+                        async for item in self._stream_with_account(
+                            account,
+                            budget,
+                            entity,
+                            channel_data,
+                            limit_messages,
+                            incremental,
+                            hot_window_hours,
+                            include_text,
+                        ):
+                            yield item
+                    except FloodWaitError as e:
+                        # после первой строки стрим уже не перезапустить на другом аккаунте
+                        account.park(e.seconds)
+                        raise
+
+                self.session_manager.schedule_upload(account.session_key)
+                return
+
+        except (ChannelPrivateError, UsernameNotOccupiedError) as e:
+            raise ValueError(f"Channel error: {str(e)}")
+        except FloodWaitError as e:
+            raise ValueError(f"Flood wait: {e.seconds} seconds")
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error(f"Streaming scrape error: {e}")
+            raise ValueError(f"Scraping failed: {str(e)}")
+
+    async def _stream_with_account(
+        self,
+        account: TelegramAccount,
+        budget: FloodWaitBudget,
+        entity,
+        channel_data: dict,
+        limit_messages: int,
+        incremental: bool,
+        hot_window_hours: int | None,
+        include_text: bool,
+    ) -> AsyncIterator[dict[str, Any]]:
+        min_id = 0
+        if incremental:
+            if hot_window_hours is None:
+                hot_window_hours = SCRAPE_HOT_WINDOW_HOURS
+            min_id = await self._get_incremental_min_id(entity.id, hot_window_hours)
+
+        scraped_at = datetime.now()
+        yield {
+            "type": "channel",
+            "channel_id": channel_data["channel_id"],
+            "username": channel_data["username"],
+            "title": channel_data["title"],
+            "description": channel_data.get("description"),
+            "subscribers_count": channel_data["subscribers_count"],
+            "participants_count": channel_data["participants_count"],
+            "scraped_at": scraped_at,
+        }
+
+        messages = MessageBatch()
+        post_hours = set()
+
+        async for message in self._iter_history(
+            account, budget, entity, limit_messages, min_id
+        ):
+            if not isinstance(message, Message):
+                continue
+
+            record = messages.add(message)
+            yield {"type": "message", **record.as_response(include_text)}
+
+            if len(messages.records) >= SCRAPE_STREAM_CHUNK_SIZE:
+                post_hours |= await self._save_messages_chunk(
+                    entity.id, messages.drain(), scraped_at
                 )
 
-            await self.session_manager.upload_session()
+        if messages.records:
+            post_hours |= await self._save_messages_chunk(
+                entity.id, messages.drain(), scraped_at
+            )
+
+        channel_row = self._channel_stats_row(
+            channel_data,
+            scraped_at,
+            messages,
+            limit_messages,
+            incremental,
+        )
+        await self._save_stream_summary(channel_row, messages.last_message_id)
+        await self._update_rollups(entity.id, [scraped_at], post_hours)
+        logger.info(f"Streamed {messages.count} messages for channel {entity.id}")
+
+        yield {
+            "type": "summary",
+            "channel_id": entity.id,
+            "messages_count": messages.count,
+            "total_views": messages.total_views,
+            "total_forwards": messages.total_forwards,
+            "total_reactions": messages.total_reactions,
+            "avg_views": channel_row["avg_views"],
+            "avg_reactions": channel_row["avg_reactions"],
+            "avg_forwards": channel_row["avg_forwards"],
+            "scraped_at": scraped_at,
+        }
+
+    @timed_stage("get_entity")
+    async def _resolve_entity(
+        self, account: TelegramAccount, budget: FloodWaitBudget, channel_identifier: str
+    ):
+        """Получает entity канала, по возможности из кэша аккаунта"""
+        entity = self.entity_cache.get_entity(channel_identifier, account.session_key)
+        if entity is None:
+            entity = await account.call(
+                METHOD_RESOLVE,
+                lambda: account.client.get_entity(channel_identifier),
+                budget,
+            )
+            self.entity_cache.set_entity(
+                channel_identifier, entity, account.session_key
+            )
+        return entity
+
+    @timed_stage("full_info")
+    async def _get_channel_data(
+        self, account: TelegramAccount, budget: FloodWaitBudget, entity
+    ) -> dict[str, Any]:
+        """Собирает данные канала; счётчики из full info кэшируются на короткий TTL"""
+        channel_data = {
+            "channel_id": entity.id,
+            "username": getattr(entity, "username", None),
+            "title": getattr(entity, "title", getattr(entity, "first_name", "Unknown")),
+        }
+
+        full_info = self.entity_cache.get_full_info(entity.id)
+        if full_info is not None:
+            channel_data.update(full_info)
+            return channel_data
+
+        try:
+            if hasattr(entity, "broadcast") and entity.broadcast:
+                request = GetFullChannelRequest(entity)
+            else:
+                request = GetFullChatRequest(entity.id)
+            full = await account.call(
+                METHOD_FULL_INFO, lambda: account.client(request), budget
+            )
 
-            return {
-                "channel_id": channel_data["channel_id"],
-                "username": channel_data["username"],
-                "title": channel_data["title"],
-                "description": channel_data.get("description"),
-                "subscribers_count": channel_data["subscribers_count"],
-                "participants_count": channel_data["participants_count"],
-                "messages": messages_response,
+            full_info = {
+                "subscribers_count": getattr(
+                    full.full_chat, "participants_count", None
+                ),
+                "description": getattr(full.full_chat, "about", None),
+                "participants_count": getattr(
+                    full.full_chat, "participants_count", None
+                ),
             }
+            self.entity_cache.set_full_info(entity.id, full_info)
+            channel_data.update(full_info)
+        except FloodWaitError:
+            raise
+        except Exception as e:
+            logger.warning(f"Could not get full channel info: {e}")
+            channel_data.update(
+                {
+                    "subscribers_count": getattr(entity, "participants_count", None),
+                    "participants_count": getattr(entity, "participants_count", None),
+                    "description": getattr(entity, "about", None),
+                }
+            )
+
+        return channel_data
+
+    async def _iter_history(
+        self,
+        account: TelegramAccount,
+        budget: FloodWaitBudget,
+        entity,
+        limit: int,
+        min_id: int = 0,
+    ) -> AsyncIterator[Message]:
+        """Читает историю постранично, каждая страница — отдельный запрос под лимитером.
+
+        После поглощённого FloodWait чтение продолжается с offset_id последней
+        полученной страницы, а не с начала.
+        """
+        fetched = 0
+        offset_id = 0
+        while fetched < limit:
+            page_size = min(HISTORY_PAGE_SIZE, limit - fetched)
+            with stage_timer("iter_messages"):
+                page = await account.call(
+                    METHOD_HISTORY,
+                    lambda: account.client.get_messages(
+                        entity, limit=page_size, offset_id=offset_id, min_id=min_id
+                    ),
+                    budget,
+                )
+            MESSAGES_SCRAPED.inc(len(page))
+            for message in page:
+                yield message
+
+            fetched += len(page)
+            if len(page) < page_size:
+                break
+            offset_id = page[-1].id
+
+    async def refresh_channel_metrics(
+        self, channel_identifier: str, limit_messages: int = 100
+    ) -> dict[str, Any]:
+        """Обновляет просмотры/репосты уже сохранённых постов без загрузки тел сообщений"""
+        try:
+            return await self._with_account(
+                lambda account, budget: self._refresh_metrics_with_account(
+                    account, budget, channel_identifier, limit_messages
+                )
+            )
 
         except (ChannelPrivateError, UsernameNotOccupiedError) as e:
             raise ValueError(f"Channel error: {str(e)}")
         except FloodWaitError as e:
             raise ValueError(f"Flood wait: {e.seconds} seconds")
         except Exception as e:
-            logger.error(f"Scraping error: {e}")
-            raise ValueError(f"Scraping failed: {str(e)}")
+            logger.error(f"Metrics refresh error: {e}")
+            raise ValueError(f"Metrics refresh failed: {str(e)}")
 
-    async def _extract_message_stats(self, message: Message) -> dict[str, Any]:
-        """Извлекает статистику из сообщения"""
-        reactions = {}
-        if message.reactions:
-            if hasattr(message.reactions, "results"):
-                for reaction in message.reactions.results:
-                    if hasattr(reaction, "count"):
-                        reaction_key = self._get_reaction_key(reaction)
-                        reactions[reaction_key] = reaction.count
-
-        replies_count = 0
-        if message.replies:
-            if hasattr(message.replies, "replies"):
-                replies_count = message.replies.replies
-            elif hasattr(message.replies, "replies_count"):
-                replies_count = message.replies.replies_count
-
-        media_type = None
-        has_media = 0
-        if message.media:
-            has_media = 1
-            if isinstance(message.media, MessageMediaPhoto):
-                media_type = "photo"
-            elif isinstance(message.media, MessageMediaDocument):
-                media_type = "document"
-
-        message_date = message.date
-        if message_date.tzinfo is not None:
-            message_date = message_date.replace(tzinfo=None)
+    async def _refresh_metrics_with_account(
+        self,
+        account: TelegramAccount,
+        budget: FloodWaitBudget,
+        channel_identifier: str,
+        limit_messages: int,
+    ) -> dict[str, Any]:
+        entity = await self._resolve_entity(account, budget, channel_identifier)
+        latest_stats = await self._get_latest_message_stats(entity.id, limit_messages)
+
+        message_ids = [stat.message_id for stat in latest_stats]
+        metrics = {}
+        for start in range(0, len(message_ids), VIEWS_BATCH_SIZE):
+            batch = message_ids[start : start + VIEWS_BATCH_SIZE]
+            with stage_timer("views"):
+                result = await account.call(
+                    METHOD_VIEWS,
+                    lambda: account.client(
+                        GetMessagesViewsRequest(peer=entity, id=batch, increment=False)
+                    ),
+                    budget,
+                )
+            for message_id, views in zip(batch, result.views):
+                metrics[message_id] = {
+                    "message_id": message_id,
+                    "views": views.views,
+                    "forwards": views.forwards,
+                    "replies": views.replies.replies if views.replies else 0,
+                }
+
+        changed = [
+            (stat, metrics[stat.message_id])
+            for stat in latest_stats
+            if stat.message_id in metrics
+            and (stat.views, stat.forwards, stat.replies)
+            != (
+                metrics[stat.message_id]["views"],
+                metrics[stat.message_id]["forwards"],
+                metrics[stat.message_id]["replies"],
+            )
+        ]
+        rows = await self._save_metric_snapshots(entity.id, changed)
+        if rows:
+            await self._update_rollups(
+                entity.id, post_dates=[row["date"] for row in rows]
+            )
 
         return {
-            "message_id": message.id,
-            "date": message_date,
-            "views": getattr(message, "views", None),
-            "forwards": getattr(message, "forwards", None),
-            "replies": replies_count,
-            "reactions": reactions,
-            "text": message.text or "",
-            "media_type": media_type,
-            "has_media": has_media,
+            "channel_id": entity.id,
+            "requested": len(message_ids),
+            "updated": len(changed),
+            "messages": [metric for _, metric in changed],
         }
 
-    def _get_reaction_key(self, reaction) -> str:
-        """Получает ключ для реакции"""
-        if hasattr(reaction.reaction, "emoticon") and reaction.reaction.emoticon:
-            return reaction.reaction.emoticon
-        elif hasattr(reaction.reaction, "document_id"):
-            return f"document_{reaction.reaction.document_id}"
-        else:
-            return str(reaction.reaction)
+    @staticmethod
+    def _channel_stats_row(
+        channel_data: dict,
+        scraped_at: datetime,
+        messages: MessageBatch,
+        limit_messages: int | None,
+        incremental: bool,
+    ) -> dict:
+        """Строка channel_stats с агрегатами по снимку"""
+        messages_count = messages.count
+        avg_views = (
+            messages.total_views / messages.messages_with_stats
+            if messages.messages_with_stats > 0
+            else 0
+        )
+        avg_reactions = (
+            messages.total_reactions / messages_count if messages_count else 0
+        )
+        avg_forwards = messages.total_forwards / messages_count if messages_count else 0
+
+        return {
+            "channel_id": channel_data["channel_id"],
+            "username": channel_data["username"],
+            "title": channel_data["title"],
+            "scraped_at": scraped_at,
+            "subscribers_count": channel_data["subscribers_count"],
+            "participants_count": channel_data["participants_count"],
+            "description": (channel_data.get("description") or "")[:500],
+            "total_messages": messages_count,
+            "avg_views": int(avg_views),
+            "avg_reactions": int(avg_reactions),
+            "avg_forwards": int(avg_forwards),
+            "messages_analyzed": messages_count,
+            "incremental": incremental,
+            "recent_activity": {
+                "last_scrape": scraped_at.isoformat(),
+                "messages_count": messages_count,
+                "limit_messages": limit_messages,
+                "incremental": incremental,
+                "last_message_id": messages.last_message_id,
+            },
+        }
+
+    @staticmethod
+    def _message_stats_rows(
+        channel_id: int, records: list[MessageRecord], scraped_at: datetime
+    ) -> list[dict]:
+        """Строки message_stats для пачки сообщений одного снимка"""
+        return [record.as_row(channel_id, scraped_at) for record in records]
+
+    @staticmethod
+    def _history_rows(rows: list[dict]) -> list[dict]:
+        """Снимки счётчиков для message_stats_history из строк message_stats"""
+        return [
+            {
+                "channel_id": row["channel_id"],
+                "message_id": row["message_id"],
+                "scraped_at": row["scraped_at"],
+                "views": row["views"],
+                "forwards": row["forwards"],
+                "replies": row["replies"],
+                "reactions": row["reactions"],
+            }
+            for row in rows
+        ]
 
-    async def _save_to_database(
+    async def _save_messages(
         self,
-        channel_data: dict,
-        messages_data: list[dict],
-        total_views: int,
-        total_forwards: int,
-        total_reactions: int,
-        messages_with_stats: int,
+        uow: UOW,
+        channel_id: int,
+        records: list[MessageRecord],
+        scraped_at: datetime,
+    ) -> list[dict]:
+        """Пишет только новые посты и посты с изменившимися счётчиками.
+
+        Контент поста записывается один раз; у известных постов на месте
+        обновляются последние метрики, а в историю попадает снимок только
+        тех, у кого они изменились. Возвращает записанные строки.
+        """
+        if not records:
+            return []
+
+        message_stats_repo = await uow.get_repo(MessageStats)
+        history_repo = await uow.get_repo(MessageStatsHistory)
+
+        message_ids = [record.message_id for record in records]
+        known = await message_stats_repo.filter(
+            MessageStats.channel_id == channel_id,
+            MessageStats.message_id.between(min(message_ids), max(message_ids)),
+        )
+        latest = {
+            stat.message_id: [getattr(stat, column) for column in METRIC_COLUMNS]
+            for stat in known
+        }
+
+        rows = [
+            row
+            for row in self._message_stats_rows(channel_id, records, scraped_at)
+            if latest.get(row["message_id"])
+            != [row[column] for column in METRIC_COLUMNS]
+        ]
+        await message_stats_repo.upsert(
+            rows, ["channel_id", "message_id"], METRIC_UPDATE_COLUMNS
+        )
+        await history_repo.bulk_create(self._history_rows(rows))
+        return rows
+
+    async def _save_to_database(self, scraped: dict) -> datetime:
+        """Сохраняет скачанный снимок канала и возвращает его время"""
+        await self._save_batch([scraped])
+        return scraped["scraped_at"]
+
+    async def _save_batch(self, batch: list[dict]) -> int:
+        """Сохраняет снимки нескольких каналов одной транзакцией и обновляет роллапы.
+
+        Возвращает число записанных (новых или изменившихся) сообщений.
+        """
+        written = await self._write_batch(batch)
+        for scraped, rows in zip(batch, written):
+            await self._update_rollups(
+                scraped["channel_data"]["channel_id"],
+                [scraped["scraped_at"]],
+                [row["date"] for row in rows],
+            )
+        return sum(len(rows) for rows in written)
+
+    @timed_stage("save")
+    async def _write_batch(self, batch: list[dict]) -> list[list[dict]]:
+        """Пишет снимки одной транзакцией; возвращает записанные строки по каналам"""
+        written = []
+        async with get_uow() as uow:
+            for scraped in batch:
+                written.append(await self._write_snapshot(uow, scraped))
+            await uow.commit()
+        return written
+
+    async def _write_snapshot(self, uow: UOW, scraped: dict) -> list[dict]:
+        """Пишет строку channel_stats, сообщения и watermark без коммита"""
+        channel_data = scraped["channel_data"]
+        messages = scraped["messages"]
+        scraped_at = scraped["scraped_at"]
+        channel_stats_repo = await uow.get_repo(ChannelStats)
+
+        await channel_stats_repo.bulk_create(
+            [
+                self._channel_stats_row(
+                    channel_data,
+                    scraped_at,
+                    messages,
+                    scraped["limit_messages"],
+                    scraped["incremental"],
+                )
+            ]
+        )
+
+        written = await self._save_messages(
+            uow, channel_data["channel_id"], messages.records, scraped_at
+        )
+
+        if messages.last_message_id is not None:
+            await self._update_watermark(
+                uow, channel_data["channel_id"], messages.last_message_id, scraped_at
+            )
+
+        logger.info(
+            f"Saved {len(written)} new or changed of {messages.count} messages "
+            f"for channel {channel_data['channel_id']}"
+        )
+        return written
+
+    @timed_stage("save")
+    async def _save_messages_chunk(
+        self, channel_id: int, records: list[MessageRecord], scraped_at: datetime
+    ) -> set[datetime]:
+        """Сохраняет очередную пачку сообщений стримингового снимка.
+
+        Возвращает часы публикации записанных постов для пересчёта роллапов.
+        """
+        async with get_uow() as uow:
+            written = await self._save_messages(uow, channel_id, records, scraped_at)
+            await uow.commit()
+        return {bucket_start(row["date"], GRANULARITY_HOUR) for row in written}
+
+    @timed_stage("save")
+    async def _save_stream_summary(
+        self, channel_row: dict, last_message_id: int | None
     ):
-        """Сохраняет данные в базу"""
+        """Завершает стриминговый снимок: строка канала и сдвиг watermark'а"""
         async with get_uow() as uow:
             channel_stats_repo = await uow.get_repo(ChannelStats)
-            message_stats_repo = await uow.get_repo(MessageStats)
+            await channel_stats_repo.bulk_create([channel_row])
+            if last_message_id is not None:
+                await self._update_watermark(
+                    uow,
+                    channel_row["channel_id"],
+                    last_message_id,
+                    channel_row["scraped_at"],
+                )
+            await uow.commit()
 
-            avg_views = (
-                total_views / messages_with_stats if messages_with_stats > 0 else 0
+    async def _get_latest_message_stats(
+        self, channel_id: int, limit: int
+    ) -> list[MessageStats]:
+        """Последние метрики `limit` самых новых сохранённых постов канала"""
+        async with get_uow() as uow:
+            message_stats_repo = await uow.get_repo(MessageStats)
+            return await message_stats_repo.filter(
+                MessageStats.channel_id == channel_id,
+                order_by=[MessageStats.message_id.desc()],
+                limit=limit,
             )
-            avg_reactions = total_reactions / len(messages_data) if messages_data else 0
-            avg_forwards = total_forwards / len(messages_data) if messages_data else 0
 
-            await channel_stats_repo.create(
+    @timed_stage("save")
+    async def _save_metric_snapshots(
+        self, channel_id: int, changed: list[tuple[MessageStats, dict]]
+    ) -> list[dict]:
+        """Сохраняет снимки счётчиков только для постов, у которых они изменились.
+
+        Возвращает записанные строки message_stats.
+        """
+        if not changed:
+            return []
+
+        async with get_uow() as uow:
+            message_stats_repo = await uow.get_repo(MessageStats)
+            history_repo = await uow.get_repo(MessageStatsHistory)
+            scraped_at = datetime.now()
+
+            rows = [
                 {
-                    "channel_id": channel_data["channel_id"],
-                    "username": channel_data["username"],
-                    "title": channel_data["title"],
-                    "scraped_at": datetime.now(),
-                    "subscribers_count": channel_data["subscribers_count"],
-                    "participants_count": channel_data["participants_count"],
-                    "description": channel_data.get("description", "")[:500],
-                    "total_messages": len(messages_data),
-                    "avg_views": int(avg_views),
-                    "avg_reactions": int(avg_reactions),
-                    "avg_forwards": int(avg_forwards),
-                    "messages_analyzed": len(messages_data),
-                    "recent_activity": {
-                        "last_scrape": datetime.now().isoformat(),
-                        "messages_count": len(messages_data),
-                    },
+                    "channel_id": channel_id,
+                    "message_id": stat.message_id,
+                    "date": stat.date,
+                    "scraped_at": scraped_at,
+                    "views": metric["views"],
+                    "forwards": metric["forwards"],
+                    "replies": metric["replies"],
+                    "reactions": stat.reactions,
+                    "text": stat.text,
+                    "media_type": stat.media_type,
+                    "has_media": stat.has_media,
                 }
+                for stat, metric in changed
+            ]
+            await message_stats_repo.upsert(
+                rows, ["channel_id", "message_id"], METRIC_UPDATE_COLUMNS
             )
-
-            for msg_data in messages_data:
-                await message_stats_repo.create(
-                    {
-                        "channel_id": channel_data["channel_id"],
-                        "message_id": msg_data["message_id"],
-                        "date": msg_data["date"],
-                        "scraped_at": datetime.now(),
-                        "views": msg_data["views"],
-                        "forwards": msg_data["forwards"],
-                        "replies": msg_data["replies"],
-                        "reactions": msg_data["reactions"],
-                        "text": (msg_data["text"] or "")[:1000],
-                        "media_type": msg_data["media_type"],
-                        "has_media": msg_data["has_media"],
-                    }
-                )
+            await history_repo.bulk_create(self._history_rows(rows))
 
             await uow.commit()
             logger.info(
-                f"Saved {len(messages_data)} messages for channel {channel_data['channel_id']}"
+                f"Saved {len(changed)} metric snapshots for channel {channel_id}"
             )
+        return rows
 
-    async def get_channel_history(self, channel_id: int, limit: int = 10):
-        """Получает историю статистики канала"""
+    @timed_stage("rollups")
+    async def _update_rollups(
+        self,
+        channel_id: int,
+        snapshot_times: Iterable[datetime] = (),
+        post_dates: Iterable[datetime] = (),
+    ):
+        """Обновляет роллапы; это производные данные, поэтому ошибка не ломает скрапинг"""
+        try:
+            await self.rollups.update(channel_id, snapshot_times, post_dates)
+        except Exception as e:
+            logger.error(f"Rollup update failed for channel {channel_id}: {e}")
+
+    async def _get_incremental_min_id(
+        self, channel_id: int, hot_window_hours: int
+    ) -> int:
+        """Возвращает min_id для iter_messages: watermark или начало горячего окна"""
+        async with get_uow() as uow:
+            watermark_repo = await uow.get_repo(ChannelWatermark)
+            watermark = await watermark_repo.get(channel_id)
+            if watermark is None:
+                return 0
+
+            message_stats_repo = await uow.get_repo(MessageStats)
+            hot_since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(
+                hours=hot_window_hours
+            )
+            hot_from_id = await message_stats_repo.scalar(
+                func.min(MessageStats.message_id),
+                MessageStats.channel_id == channel_id,
+                MessageStats.date >= hot_since,
+            )
+
+            if hot_from_id is not None:
+                return min(watermark.last_message_id, hot_from_id - 1)
+            return watermark.last_message_id
+
+    async def _update_watermark(
+        self, uow: UOW, channel_id: int, last_message_id: int, scraped_at: datetime
+    ):
+        """Сдвигает watermark канала на максимальный увиденный message_id.
+
+        Один upsert вместо чтения и вставки: параллельные скрапы канала не
+        столкнутся на первичном ключе, а watermark никогда не откатится назад.
+        """
+        watermark_repo = await uow.get_repo(ChannelWatermark)
+        await watermark_repo.upsert(
+            [
+                {
+                    "channel_id": channel_id,
+                    "last_message_id": last_message_id,
+                    "updated_at": scraped_at,
+                }
+            ],
+            ["channel_id"],
+            ["last_message_id", "updated_at"],
+            where=lambda excluded: ChannelWatermark.last_message_id
+            < excluded.last_message_id,
+        )
+
+    async def get_recent_snapshot(
+        self,
+        channel_identifier: str,
+        limit_messages: int,
+        max_age: int,
+        include_text: bool = True,
+    ) -> dict[str, Any] | None:
+        """Возвращает сохранённый полный снимок канала не старше max_age секунд.
+
+        История хранит только изменения, поэтому посты снимка отдаются с
+        последними известными метриками (они не старше самого снимка).
+        """
+        channel_id = self.entity_cache.get_channel_id(channel_identifier)
+        if channel_id is not None:
+            channel_filter = ChannelStats.channel_id == channel_id
+        else:
+            channel_filter = func.lower(
+                ChannelStats.username
+            ) == normalize_channel_identifier(channel_identifier)
+
+        now = datetime.now()
+        async with get_uow() as uow:
+            channel_stats_repo = await uow.get_repo(ChannelStats)
+            snapshots = await channel_stats_repo.filter(
+                channel_filter,
+                ChannelStats.scraped_at >= now - timedelta(seconds=max_age),
+                *self._snapshot_covers(limit_messages),
+                order_by=[ChannelStats.scraped_at.desc()],
+                limit=1,
+            )
+            if not snapshots:
+                return None
+            snapshot = snapshots[0]
+
+            message_filters = [MessageStats.channel_id == snapshot.channel_id]
+            last_message_id = snapshot.recent_activity.get("last_message_id")
+            if last_message_id is not None:
+                message_filters.append(MessageStats.message_id <= last_message_id)
+
+            message_stats_repo = await uow.get_repo(MessageStats)
+            messages = await message_stats_repo.filter(
+                *message_filters,
+                order_by=[MessageStats.message_id.desc()],
+                limit=limit_messages,
+            )
+
+        return {
+            "channel_id": snapshot.channel_id,
+            "username": snapshot.username,
+            "title": snapshot.title,
+            "description": snapshot.description,
+            "subscribers_count": snapshot.subscribers_count,
+            "participants_count": snapshot.participants_count,
+            "messages": [self._snapshot_message(msg, include_text) for msg in messages],
+            "scraped_at": snapshot.scraped_at,
+            "data_age": (now - snapshot.scraped_at).total_seconds(),
+            "from_cache": True,
+        }
+
+    @staticmethod
+    def _snapshot_message(msg: MessageStats, include_text: bool) -> dict[str, Any]:
+        """Сохранённый пост в форме MessageStatsResponse"""
+        message = {
+            "message_id": msg.message_id,
+            "date": msg.date,
+            "views": msg.views,
+            "forwards": msg.forwards,
+            "replies": msg.replies,
+            "reactions": msg.reactions or {},
+            "text": msg.text or "",
+            "media_type": msg.media_type,
+            "has_media": bool(msg.has_media),
+        }
+        if not include_text:
+            del message["text"]
+        return message
+
+    @staticmethod
+    def _snapshot_covers(limit_messages: int) -> list[ColumnElement[bool]]:
+        """Условия подходящего снимка: полный и снят с лимитом не меньше запрошенного"""
+        return [
+            ChannelStats.incremental.is_(False),
+            ChannelStats.recent_activity["limit_messages"].as_integer()
+            >= limit_messages,
+        ]
+
+    def schedule_refresh(self, channel_identifier: str, limit_messages: int):
+        """Запускает фоновое обновление канала, если оно ещё не идёт"""
+        key = normalize_channel_identifier(channel_identifier)
+        if key in self._background_refreshes:
+            return
+
+        task = asyncio.create_task(
+            self.scrape_channel_stats(channel_identifier, limit_messages)
+        )
+        self._background_refreshes[key] = task
+        task.add_done_callback(lambda t: self._on_background_refresh_done(key, t))
+
+    def _on_background_refresh_done(self, key: str, task: asyncio.Task):
+        self._background_refreshes.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Background refresh of {key} failed: {task.exception()}")
+
+    async def get_channel_history(
+        self, channel_id: int, limit: int = 10, cursor: str | None = None
+    ) -> tuple[list[ChannelStats], str | None]:
+        """Получает страницу истории статистики канала (новые снимки первыми).
+
+        Инкрементальные снимки не входят: их агрегаты посчитаны лишь по части
+        постов. Возвращает снимки и курсор следующей страницы, если она есть.
+        """
+        after = self._decode_history_cursor(cursor) if cursor else None
         async with get_uow() as uow:
             repo = await uow.get_repo(ChannelStats)
-            stats = await repo.filter(ChannelStats.channel_id == channel_id)
-            stats = sorted(stats, key=lambda x: x.scraped_at, reverse=True)[:limit]
-            return stats
+            stats, last_key = await repo.paginate(
+                ChannelStats.channel_id == channel_id,
+                ChannelStats.incremental.is_(False),
+                key=[ChannelStats.scraped_at, ChannelStats.id],
+                limit=limit,
+                after=after,
+            )
+
+        if last_key is None:
+            return stats, None
+        return stats, self._encode_history_cursor(*last_key)
+
+    @staticmethod
+    def _encode_history_cursor(scraped_at: datetime, stat_id: uuid.UUID) -> str:
+        payload = json.dumps([scraped_at.isoformat(), str(stat_id)])
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    @staticmethod
+    def _decode_history_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+        try:
+            scraped_at, stat_id = json.loads(base64.urlsafe_b64decode(cursor))
+            return datetime.fromisoformat(scraped_at), uuid.UUID(stat_id)
+        except (ValueError, TypeError, AttributeError) as e:
+            # AttributeError: uuid.UUID от не-строки (например, числа из JSON)
+            raise ValueError(f"Invalid cursor: {cursor}") from e
 
     async def disconnect(self):
-        """Отключает клиент и сохраняет сессию в S3"""
-        if self.client:
-            await self.session_manager.upload_session()
-            await self.client.disconnect()
-            logger.info("Telegram client disconnected and session saved to S3")
+        """Отключает клиенты и сохраняет сессии в S3"""
+        self.entity_cache.save()
+        await self.pool.disconnect()
+        logger.info("Telegram clients disconnected and sessions saved to S3")
@@ -0,0 +1,231 @@
+"""Бенчмарк аналитики вовлечённости: путь сервиса против построчного Python.
+
+Запуск из каталога сервиса:
+
+    python -m benchmarks.analytics
+    python -m benchmarks.analytics --rows 100000 500000 --history 3
+    python -m benchmarks.analytics --db-url postgresql+asyncpg://... --create-schema
+
+Без --db-url данные пишутся во временную SQLite-базу, которая удаляется
+после прогона. Оба варианта меряются от запроса к базе до результата:
+сервис получает колонки JSON-массивами и считает всё векторно, построчный
+вариант читает строки кортежами и считает в цикле. Построчный вариант
+считает основные метрики (ER, медиану/p90 просмотров, тепловую карту, типы
+медиа, доли реакций и набор просмотров по возрасту), но без топа постов и
+перцентилей ER, поэтому сравнение в его пользу.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+
+from app.services.analytics import DECAY_EDGES_HOURS, ChannelAnalytics
+from db.models.stats import Base, MessageStats, MessageStatsHistory
+from db.session import dispose_engine, init_engine
+from db.uow import get_uow
+
+
+REACTIONS = ["👍", "❤", "🔥", "😁", "😢", "🤔"]
+MEDIA_TYPES = [None, None, "photo", "document"]
+INSERT_BATCH = 10_000
+RAW_COLUMNS = [
+    MessageStats.message_id,
+    MessageStats.date,
+    MessageStats.views,
+    MessageStats.forwards,
+    MessageStats.replies,
+    MessageStats.reactions,
+    MessageStats.media_type,
+]
+HISTORY_RAW_COLUMNS = [
+    MessageStatsHistory.message_id,
+    MessageStatsHistory.scraped_at,
+    MessageStatsHistory.views,
+]
+
+
+def make_rows(
+    channel_id: int, count: int, history: int
+) -> tuple[list[dict], list[dict]]:
+    """Посты канала и снимки их метрик"""
+    rng = random.Random(42)
+    now = datetime(2025, 1, 1)
+    rows = []
+    history_rows = []
+    for message_id in range(count, 0, -1):
+        date = now - timedelta(minutes=37 * message_id)
+        views = rng.randint(100, 50_000)
+        rows.append(
+            {
+                "channel_id": channel_id,
+                "message_id": message_id,
+                "date": date,
+                "scraped_at": now,
+                "views": views,
+                "forwards": rng.randint(0, 100),
+                "replies": rng.randint(0, 50),
+                "reactions": {
+                    reaction: rng.randint(1, 200)
+                    for reaction in rng.sample(REACTIONS, rng.randint(0, 3))
+                },
+                "media_type": rng.choice(MEDIA_TYPES),
+            }
+        )
+        for snapshot in range(1, history + 1):
+            history_rows.append(
+                {
+                    "channel_id": channel_id,
+                    "message_id": message_id,
+                    "scraped_at": date + timedelta(hours=4**snapshot),
+                    "views": views * snapshot // (history + 1),
+                }
+            )
+    return rows, history_rows
+
+
+async def seed(channel_id: int, count: int, history: int) -> int:
+    rows, history_rows = make_rows(channel_id, count, history)
+    async with get_uow() as uow:
+        message_stats_repo = await uow.get_repo(MessageStats)
+        history_repo = await uow.get_repo(MessageStatsHistory)
+        for start in range(0, len(rows), INSERT_BATCH):
+            await message_stats_repo.bulk_create(rows[start : start + INSERT_BATCH])
+        for start in range(0, len(history_rows), INSERT_BATCH):
+            await history_repo.bulk_create(history_rows[start : start + INSERT_BATCH])
+        await uow.commit()
+    return len(history_rows)
+
+
+async def python_engagement(channel_id: int, limit: int) -> dict:
+    """Строки кортежами и построчный расчёт тех же основных метрик — ориентир"""
+    async with get_uow() as uow:
+        repo = await uow.get_repo(MessageStats)
+        rows = await repo.columns(
+            RAW_COLUMNS,
+            MessageStats.channel_id == channel_id,
+            order_by=[MessageStats.message_id.desc()],
+            limit=limit,
+        )
+        history_repo = await uow.get_repo(MessageStatsHistory)
+        history_rows = await history_repo.columns(
+            HISTORY_RAW_COLUMNS,
+            MessageStatsHistory.channel_id == channel_id,
+            MessageStatsHistory.message_id.between(rows[-1][0], rows[0][0]),
+        )
+
+    rates = []
+    views = []
+    cells = defaultdict(list)
+    media = defaultdict(list)
+    reaction_counts = Counter()
+    posts = {}
+    for message_id, date, post_views, forwards, replies, reactions, kind in rows:
+        reaction_counts.update(reactions or {})
+        if post_views is None:
+            continue
+        interactions = (
+            (forwards or 0) + (replies or 0) + sum((reactions or {}).values())
+        )
+        rate = interactions / post_views * 100 if post_views else None
+        views.append(post_views)
+        if rate is not None:
+            rates.append(rate)
+        cells[(date.weekday(), date.hour)].append(post_views)
+        media[kind or "text"].append(post_views)
+        posts[message_id] = (date.replace(tzinfo=timezone.utc), post_views)
+
+    shares = defaultdict(list)
+    for message_id, scraped_at, snapshot_views in history_rows:
+        post = posts.get(message_id)
+        if post is None or not post[1] or snapshot_views is None:
+            continue
+        age = (scraped_at.astimezone(timezone.utc) - post[0]) / timedelta(hours=1)
+        if age < 0:
+            continue
+        edge = bisect_left(DECAY_EDGES_HOURS, age)
+        shares[edge].append(min(snapshot_views / post[1], 1.0))
+
+    views.sort()
+    total_reactions = sum(reaction_counts.values())
+    return {
+        "er_mean": statistics.fmean(rates),
+        "median": statistics.median(views),
+        "p90": views[int(len(views) * 0.9)],
+        "heatmap": {cell: statistics.fmean(values) for cell, values in cells.items()},
+        "media": {kind: statistics.median(values) for kind, values in media.items()},
+        "view_decay": {
+            edge: statistics.median(values) for edge, values in shares.items()
+        },
+        "reaction_mix": {
+            reaction: count / total_reactions
+            for reaction, count in reaction_counts.most_common()
+        },
+    }
+
+
+async def timed(function, *args) -> tuple[float, object]:
+    started = time.perf_counter()
+    result = await function(*args)
+    return time.perf_counter() - started, result
+
+
+async def main(args: argparse.Namespace):
+    work_dir = None
+    db_url = args.db_url
+    if db_url is None:
+        work_dir = tempfile.mkdtemp(prefix="analytics-")
+        db_url = f"sqlite+aiosqlite:///{os.path.join(work_dir, 'analytics.db')}"
+
+    engine = init_engine(db_url)
+    try:
+        if args.create_schema or work_dir is not None:
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+
+        analytics = ChannelAnalytics()
+        print(
+            f"{'rows':>9} {'history':>9} {'numpy, ms':>10} "
+            f"{'python, ms':>11} {'speedup':>8}"
+        )
+        for channel_id, count in enumerate(args.rows, start=1):
+            history = await seed(channel_id, count, args.history)
+
+            numpy_time, result = await timed(
+                analytics.get_engagement, channel_id, None, None, count
+            )
+            python_time, baseline = await timed(python_engagement, channel_id, count)
+
+            assert result["views"]["median"] == round(baseline["median"], 4)
+            assert [point["views_share_median"] for point in result["view_decay"]] == [
+                (
+                    round(baseline["view_decay"][index], 4)
+                    if index in baseline["view_decay"]
+                    else None
+                )
+                for index in range(len(DECAY_EDGES_HOURS))
+            ]
+            print(
+                f"{count:>9} {history:>9} {numpy_time * 1000:>10.1f} "
+                f"{python_time * 1000:>11.1f} {python_time / numpy_time:>7.1f}x"
+            )
+    finally:
+        await dispose_engine()
+        if work_dir is not None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 500_000])
+    parser.add_argument("--history", type=int, default=3)
+    parser.add_argument("--db-url", default=None)
+    parser.add_argument("--create-schema", action="store_true")
+    asyncio.run(main(parser.parse_args()))
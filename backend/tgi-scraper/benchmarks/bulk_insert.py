@@ -0,0 +1,89 @@
+"""Бенчмарк записи MessageStats: построчный create против bulk_create.
+
+Запуск из каталога сервиса:
+
+    python -m benchmarks.bulk_insert --rows 100 1000 5000
+    python -m benchmarks.bulk_insert --db-url sqlite+aiosqlite:///bench.db --create-schema
+
+По умолчанию используется DB_URL из окружения. Все вставки откатываются.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from core.config import DB_URL
+from db.models.stats import Base, MessageStats
+from db.repository import DatabaseRepo
+
+
+def make_rows(count: int, channel_id: int = 1) -> list[dict]:
+    now = datetime.now()
+    return [
+        {
+            "channel_id": channel_id,
+            "message_id": message_id,
+            "date": now - timedelta(minutes=message_id),
+            "scraped_at": now,
+            "views": random.randint(100, 100_000),
+            "forwards": random.randint(0, 500),
+            "replies": random.randint(0, 100),
+            "reactions": {"👍": random.randint(0, 300), "🔥": random.randint(0, 50)},
+            "text": "x" * random.randint(0, 1000),
+            "media_type": random.choice([None, "photo", "document"]),
+            "has_media": random.randint(0, 1),
+        }
+        for message_id in range(1, count + 1)
+    ]
+
+
+async def run_loop(repo: DatabaseRepo, rows: list[dict]) -> None:
+    for row in rows:
+        await repo.create(row)
+
+
+async def run_bulk(repo: DatabaseRepo, rows: list[dict]) -> None:
+    await repo.bulk_create(rows)
+
+
+async def measure(factory, strategy, rows: list[dict]) -> float:
+    async with factory() as session:
+        repo = DatabaseRepo(MessageStats, session)
+        started = time.perf_counter()
+        await strategy(repo, rows)
+        await session.flush()
+        elapsed = time.perf_counter() - started
+        await session.rollback()
+    return elapsed
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine = create_async_engine(args.db_url)
+    if args.create_schema:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    factory = async_sessionmaker(engine)
+    print(f"{'rows':>8} | {'create loop':>14} | {'bulk_create':>14} | speedup")
+    for count in args.rows:
+        rows = make_rows(count)
+        loop_time = await measure(factory, run_loop, rows)
+        bulk_time = await measure(factory, run_bulk, rows)
+        print(
+            f"{count:>8} | {count / loop_time:>10.0f} r/s | {count / bulk_time:>10.0f} r/s"
+            f" | x{loop_time / bulk_time:.1f}"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db-url", default=DB_URL)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--create-schema", action="store_true")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,248 @@
+"""Фейковый TelegramClient для офлайн-бенчмарков и нагрузочных тестов.
+
+Отвечает на те же вызовы, что делает TelegramScraper (get_entity, полная
+информация о канале, постраничный get_messages, GetMessagesViewsRequest),
+и генерирует правдоподобные Message: текст разной длины, реакции, ответы,
+фото и документы. Сообщения детерминированы по (channel_id, message_id),
+поэтому повторное чтение возвращает те же данные.
+"""
+
+import asyncio
+import random
+import zlib
+from datetime import datetime, timedelta, timezone
+
+from telethon.tl.functions.channels import GetFullChannelRequest
+from telethon.tl.functions.messages import GetMessagesViewsRequest
+from telethon.tl.types import (
+    Channel,
+    ChannelFull,
+    ChatPhotoEmpty,
+    ChatReactionsNone,
+    Document,
+    Message,
+    MessageMediaDocument,
+    MessageMediaPhoto,
+    MessageReactions,
+    MessageReplies,
+    MessageViews,
+    PeerChannel,
+    PeerNotifySettings,
+    Photo,
+    ReactionCount,
+    ReactionEmoji,
+)
+from telethon.tl.types.messages import ChatFull, MessageViews as MessagesViews
+
+from app.services.rate_limiter import DEFAULT_RATES, AdaptiveRateLimiter
+from app.services.telegram_scraper import TelegramScraper
+
+
+# лимитер не должен ограничивать офлайн-замеры
+UNLIMITED_RATE = 1_000_000
+
+REACTIONS = ["👍", "❤", "🔥", "😁", "😢", "🤔", "👏", "🎉"]
+WORDS = (
+    "канал новости рынок данные анализ рост аудитория пост охват реакция "
+    "telegram update release report growth views channel weekly digest"
+).split()
+
+
+class FakeTelegramClient:
+    """In-process stand-in for TelegramClient with synthetic channels.
+
+    Every identifier resolves to its own channel with `messages` posts;
+    `latency` seconds are awaited per request to mimic network round trips.
+    """
+
+    # без parse_mode Message.text возвращает исходный текст сообщения
+    parse_mode = None
+
+    def __init__(
+        self,
+        messages: int = 1000,
+        subscribers: int = 50_000,
+        media_ratio: float = 0.4,
+        latency: float = 0.0,
+        seed: int = 42,
+    ):
+        self.messages = messages
+        self.subscribers = subscribers
+        self.media_ratio = media_ratio
+        self.latency = latency
+        self.seed = seed
+        self.requests = 0
+        self._now = datetime.now(timezone.utc)
+
+    async def connect(self):
+        pass
+
+    async def disconnect(self):
+        pass
+
+    async def is_user_authorized(self) -> bool:
+        return True
+
+    async def get_entity(self, identifier) -> Channel:
+        await self._round_trip()
+        return self.channel(self.channel_id(identifier))
+
+    async def get_messages(
+        self, entity, limit: int = 100, offset_id: int = 0, min_id: int = 0, **kwargs
+    ) -> list[Message]:
+        await self._round_trip()
+        start = offset_id - 1 if offset_id else self.messages
+        stop = max(min_id, start - limit)
+        return [
+            self.message(entity.id, message_id) for message_id in range(start, stop, -1)
+        ]
+
+    async def __call__(self, request):
+        await self._round_trip()
+        if isinstance(request, GetFullChannelRequest):
+            return ChatFull(
+                full_chat=ChannelFull(
+                    id=request.channel.id,
+                    about="Synthetic benchmark channel",
+                    read_inbox_max_id=0,
+                    read_outbox_max_id=0,
+                    unread_count=0,
+                    chat_photo=None,
+                    notify_settings=PeerNotifySettings(),
+                    bot_info=[],
+                    pts=0,
+                    participants_count=self.subscribers,
+                    available_reactions=ChatReactionsNone(),
+                ),
+                chats=[],
+                users=[],
+            )
+        if isinstance(request, GetMessagesViewsRequest):
+            return MessagesViews(
+                views=[
+                    self._views(request.peer.id, message_id)
+                    for message_id in request.id
+                ],
+                chats=[],
+                users=[],
+            )
+        raise NotImplementedError(type(request).__name__)
+
+    @staticmethod
+    def channel_id(identifier) -> int:
+        if isinstance(identifier, int):
+            return identifier
+        return 1_000_000 + zlib.crc32(str(identifier).encode()) % 1_000_000_000
+
+    def channel(self, channel_id: int) -> Channel:
+        return Channel(
+            id=channel_id,
+            title=f"Channel {channel_id}",
+            photo=ChatPhotoEmpty(),
+            date=self._now - timedelta(days=365),
+            broadcast=True,
+            username=f"channel{channel_id}",
+            access_hash=channel_id,
+        )
+
+    def message(self, channel_id: int, message_id: int) -> Message:
+        """Синтетический пост: свежие посты новее и с меньшим числом просмотров"""
+        rng = random.Random(self.seed * 1_000_003 + channel_id * 7919 + message_id)
+        age = self.messages - message_id
+
+        media = None
+        if rng.random() < self.media_ratio:
+            if rng.random() < 0.7:
+                media = MessageMediaPhoto(
+                    photo=Photo(
+                        id=message_id,
+                        access_hash=0,
+                        file_reference=b"",
+                        date=self._now,
+                        sizes=[],
+                        dc_id=2,
+                    )
+                )
+            else:
+                media = MessageMediaDocument(
+                    document=Document(
+                        id=message_id,
+                        access_hash=0,
+                        file_reference=b"",
+                        date=self._now,
+                        mime_type="video/mp4",
+                        size=rng.randint(10_000, 50_000_000),
+                        dc_id=2,
+                        attributes=[],
+                    )
+                )
+
+        reactions = None
+        if rng.random() < 0.8:
+            reactions = MessageReactions(
+                results=[
+                    ReactionCount(
+                        reaction=ReactionEmoji(emoticon=emoticon),
+                        count=rng.randint(1, 500),
+                    )
+                    for emoticon in rng.sample(REACTIONS, rng.randint(1, 5))
+                ]
+            )
+
+        message = Message(
+            id=message_id,
+            peer_id=PeerChannel(channel_id),
+            date=self._now - timedelta(minutes=90 * age + rng.randint(0, 60)),
+            message=" ".join(rng.choices(WORDS, k=rng.randint(0, 150))),
+            media=media,
+            views=int(self.subscribers * rng.uniform(0.05, 0.6)),
+            forwards=rng.randint(0, 300),
+            replies=MessageReplies(replies=rng.randint(0, 80), replies_pts=0),
+            reactions=reactions,
+            post=True,
+        )
+        message._client = self
+        return message
+
+    def _views(self, channel_id: int, message_id: int) -> MessageViews:
+        rng = random.Random(self.seed + channel_id + message_id)
+        return MessageViews(
+            views=int(self.subscribers * rng.uniform(0.05, 0.7)),
+            forwards=rng.randint(0, 300),
+            replies=MessageReplies(replies=rng.randint(0, 80), replies_pts=0),
+        )
+
+    async def _round_trip(self):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+
+def use_fake_accounts(
+    scraper: TelegramScraper, accounts: int = 1, **client_kwargs
+) -> TelegramScraper:
+    """Подменяет аккаунты пула фейковыми; вызывать до initialize()"""
+    scraper.pool.session_keys = [f"fake_{index}.session" for index in range(accounts)]
+    scraper.pool.client_factory = lambda path: FakeTelegramClient(**client_kwargs)
+    return scraper
+
+
+def lift_rate_limits(scraper: TelegramScraper):
+    """Снимает лимиты запросов с уже подключённых аккаунтов"""
+    for account in scraper.pool.accounts:
+        account.limiter = AdaptiveRateLimiter(
+            {method_class: UNLIMITED_RATE for method_class in DEFAULT_RATES}
+        )
+
+
+async def create_fake_scraper(
+    accounts: int = 1, rate_limited: bool = False, **client_kwargs
+) -> TelegramScraper:
+    """TelegramScraper на фейковых аккаунтах; S3 и реальный Telegram не нужны"""
+    scraper = use_fake_accounts(TelegramScraper(), accounts, **client_kwargs)
+    # только пул: S3-менеджер не инициализируется, сессии никуда не загружаются
+    await scraper.pool.initialize()
+
+    if not rate_limited:
+        lift_rate_limits(scraper)
+    return scraper
@@ -0,0 +1,540 @@
+"""Нагрузочный тест HTTP API: задержки p50/p95/p99, ошибки и блокировки event loop.
+
+Запуск из каталога сервиса:
+
+    python -m benchmarks.load_test --profile mixed --rps 50 --duration 60
+    python -m benchmarks.load_test --db-url sqlite+aiosqlite:///load.db --create-schema
+    python -m benchmarks.load_test --url http://staging:8000 --profile read --rps 20
+
+Без --url поднимается отдельный процесс с `api:api`, в котором Telegram
+заменён на FakeTelegramClient, а S3 — хранилищем в памяти. База по
+умолчанию — временный SQLite-файл со свежей схемой, удаляемый после
+прогона; настоящая база используется, только если явно передан --db-url
+(схему тогда создаёт --create-schema). Сначала каждый из --channels каналов
+скрапится один раз, затем запросы профиля идут с постоянной частотой --rps
+независимо от того, успевает ли сервер (open loop): задержка считается от
+запланированного момента отправки, поэтому очередь на стороне клиента тоже
+попадает в хвосты.
+
+В поднятом процессе раз в 10 мс замеряется опоздание event loop; итог
+берётся из /metrics. Счётчики пула соединений БД — из /health. С
+--p99-budget и --max-error-rate код возврата 1 означает, что бюджет
+превышен, — так проверяется запас по нагрузке перед релизом.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import httpx
+import numpy as np
+from botocore.exceptions import ClientError
+from prometheus_client import Histogram
+from prometheus_client.parser import text_string_to_metric_families
+
+from core.config import S3_SESSION_KEY
+
+from benchmarks.fake_telegram import lift_rate_limits, use_fake_accounts
+
+
+LOOP_LAG_INTERVAL = 0.01
+LOOP_LAG_STALL = 0.05
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, LOOP_LAG_STALL, 0.1, 0.25, 0.5, 1, 2.5)
+
+LOOP_LAG = Histogram(
+    "loadtest_event_loop_lag_seconds",
+    "How late the event loop woke up a sleeping coroutine",
+    buckets=LOOP_LAG_BUCKETS,
+)
+# размер файла сессии Telethon, который гоняется через S3-заглушку
+SESSION_FILE_SIZE = 28 * 1024
+
+
+# веса операций в профилях трафика
+PROFILES = {
+    "read": {"stats": 50, "series": 25, "engagement": 15, "scrape_cached": 10},
+    "write": {"scrape": 60, "scrape_incremental": 40},
+    "mixed": {
+        "stats": 35,
+        "series": 15,
+        "engagement": 10,
+        "scrape_cached": 15,
+        "scrape_incremental": 15,
+        "scrape": 10,
+    },
+}
+
+
+def scrape_request(channel: dict, args: argparse.Namespace, **options) -> dict:
+    return {
+        "method": "POST",
+        "url": "/scrape",
+        "json": {
+            "channel_identifier": channel["identifier"],
+            "limit_messages": args.limit_messages,
+            **options,
+        },
+    }
+
+
+OPERATIONS = {
+    "scrape": lambda channel, args: scrape_request(channel, args),
+    "scrape_incremental": lambda channel, args: scrape_request(
+        channel, args, incremental=True
+    ),
+    "scrape_cached": lambda channel, args: scrape_request(channel, args, max_age=300),
+    "stats": lambda channel, args: {
+        "method": "GET",
+        "url": f"/stats/{channel['channel_id']}",
+    },
+    "series": lambda channel, args: {
+        "method": "GET",
+        "url": f"/stats/{channel['channel_id']}/series",
+    },
+    "engagement": lambda channel, args: {
+        "method": "GET",
+        "url": f"/stats/{channel['channel_id']}/engagement",
+    },
+}
+
+
+class InMemoryS3Client:
+    """Stand-in for the boto3 S3 client used by S3SessionManager.
+
+    Objects live in a dict; `latency` seconds are slept per call (calls run
+    in worker threads, like boto3 ones).
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.objects: dict[str, bytes] = {}
+
+    def head_bucket(self, Bucket: str):
+        time.sleep(self.latency)
+
+    def upload_file(self, Filename: str, Bucket: str, Key: str):
+        time.sleep(self.latency)
+        with open(Filename, "rb") as f:
+            self.objects[Key] = f.read()
+
+    def download_file(self, Bucket: str, Key: str, Filename: str):
+        time.sleep(self.latency)
+        if Key not in self.objects:
+            raise ClientError(
+                {"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject"
+            )
+        with open(Filename, "wb") as f:
+            f.write(self.objects[Key])
+
+
+async def monitor_loop_lag(interval: float = LOOP_LAG_INTERVAL):
+    """Замеряет, насколько позже срока просыпается корутина"""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        LOOP_LAG.observe(max(0.0, loop.time() - started - interval))
+
+
+async def serve(args: argparse.Namespace):
+    """Поднимает api:api с фейковым Telegram и S3 в памяти"""
+    # приложение импортируется только в процессе сервера, не в генераторе нагрузки
+    import uvicorn
+
+    from api import api
+    from app.services.s3_session_manager import s3_manager
+    from db.models.stats import Base
+    import db.models.jobs  # noqa: F401
+    import db.models.watchlist  # noqa: F401
+    from db.session import init_engine
+
+    scraper = sys.modules["api.router"].scraper
+    use_fake_accounts(
+        scraper,
+        args.accounts,
+        messages=args.channel_messages,
+        latency=args.telegram_latency,
+    )
+    # кэш сущностей фейковых каналов не должен попасть в настоящий файл
+    scraper.entity_cache.path = None
+
+    session_dir = args.session_dir
+    s3_client = InMemoryS3Client(args.s3_latency)
+    for session_key in scraper.pool.session_keys:
+        s3_client.objects[session_key] = os.urandom(SESSION_FILE_SIZE)
+    s3_manager.s3_client = s3_client
+    s3_manager._initialized = True
+    s3_manager.initialize = lambda: True
+    s3_manager.get_session_path = lambda session_key=S3_SESSION_KEY: os.path.join(
+        session_dir, session_key
+    )
+
+    initialize = scraper.initialize
+
+    async def initialize_without_limits():
+        await initialize()
+        lift_rate_limits(scraper)
+
+    scraper.initialize = initialize_without_limits
+
+    engine = init_engine()
+    if args.create_schema:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    monitor = asyncio.create_task(monitor_loop_lag())
+    server = uvicorn.Server(
+        uvicorn.Config(api, host="127.0.0.1", port=args.port, log_level="warning")
+    )
+    try:
+        await server.serve()
+    finally:
+        monitor.cancel()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(
+    args: argparse.Namespace, session_dir: str
+) -> tuple[subprocess.Popen, str]:
+    port = free_port()
+    command = [
+        sys.executable,
+        "-m",
+        "benchmarks.load_test",
+        "--serve",
+        "--port",
+        str(port),
+        "--accounts",
+        str(args.accounts),
+        "--channel-messages",
+        str(args.channel_messages),
+        "--telegram-latency",
+        str(args.telegram_latency),
+        "--s3-latency",
+        str(args.s3_latency),
+        "--session-dir",
+        session_dir,
+    ]
+    if args.create_schema:
+        command.append("--create-schema")
+    process = subprocess.Popen(command, env={**os.environ, "DB_URL": args.db_url})
+    return process, f"http://127.0.0.1:{port}"
+
+
+async def wait_ready(client: httpx.AsyncClient, process: subprocess.Popen | None):
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"API process exited with code {process.returncode}")
+        try:
+            response = await client.get("/health")
+            if response.status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("API did not become ready in 60 seconds")
+
+
+async def warm_up(client: httpx.AsyncClient, args: argparse.Namespace) -> list[dict]:
+    """Скрапит каждый канал по разу, чтобы чтению было что отдавать"""
+    channels = []
+    for index in range(args.channels):
+        channel = {"identifier": f"loadtest_{index}"}
+        response = await client.request(**OPERATIONS["scrape"](channel, args))
+        response.raise_for_status()
+        channel["channel_id"] = response.json()["channel_id"]
+        channels.append(channel)
+    return channels
+
+
+async def send(
+    client: httpx.AsyncClient, operation: str, request: dict, scheduled: float
+) -> dict:
+    sample = {"operation": operation, "status": None, "error": None}
+    try:
+        response = await client.request(**request)
+        sample["status"] = response.status_code
+        if response.status_code >= 400:
+            sample["error"] = f"HTTP {response.status_code}"
+    except httpx.HTTPError as e:
+        sample["error"] = type(e).__name__
+    sample["latency"] = time.perf_counter() - scheduled
+    return sample
+
+
+async def generate_load(
+    client: httpx.AsyncClient, channels: list[dict], args: argparse.Namespace
+) -> tuple[list[dict], int, float]:
+    """Шлёт запросы профиля с постоянной частотой (open loop).
+
+    Возвращает замеры, число запросов, пропущенных из-за --max-in-flight,
+    и фактическую длительность.
+    """
+    operations = list(PROFILES[args.profile])
+    weights = list(PROFILES[args.profile].values())
+    rng = random.Random(args.seed)
+
+    samples = []
+    in_flight: set[asyncio.Task] = set()
+    dropped = 0
+    started = time.perf_counter()
+
+    for index in range(int(args.rps * args.duration)):
+        scheduled = started + index / args.rps
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        operation = rng.choices(operations, weights=weights)[0]
+        request = OPERATIONS[operation](rng.choice(channels), args)
+        if len(in_flight) >= args.max_in_flight:
+            dropped += 1
+            continue
+
+        task = asyncio.create_task(send(client, operation, request, scheduled))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+        task.add_done_callback(lambda task: samples.append(task.result()))
+
+    await asyncio.gather(*in_flight)
+    return samples, dropped, time.perf_counter() - started
+
+
+def summarize(samples: list[dict]) -> dict:
+    latencies = np.array([sample["latency"] for sample in samples]) * 1000
+    errors = sum(sample["error"] is not None for sample in samples)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if samples else [0] * 3
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "p50_ms": round(float(p50), 1),
+        "p95_ms": round(float(p95), 1),
+        "p99_ms": round(float(p99), 1),
+        "max_ms": round(float(latencies.max()), 1) if samples else 0.0,
+    }
+
+
+async def read_loop_lag(client: httpx.AsyncClient) -> dict | None:
+    """Гистограмма опоздания event loop из /metrics (есть только у поднятого API)"""
+    response = await client.get("/metrics")
+    values = {}
+    for family in text_string_to_metric_families(response.text):
+        for sample in family.samples:
+            if sample.name.startswith("loadtest_event_loop_lag_seconds"):
+                bound = sample.labels.get("le")
+                values[(sample.name, bound and float(bound))] = sample.value
+
+    if not values:
+        return None
+    return {
+        "sum": values[("loadtest_event_loop_lag_seconds_sum", None)],
+        "buckets": [
+            values[("loadtest_event_loop_lag_seconds_bucket", bound)]
+            for bound in LOOP_LAG_BUCKETS
+        ],
+        "count": values[("loadtest_event_loop_lag_seconds_count", None)],
+    }
+
+
+def loop_lag_report(before: dict | None, after: dict | None, seconds: float) -> dict:
+    """Опоздания за время нагрузки; максимум известен с точностью до бакета"""
+    if before is None or after is None:
+        return {"available": False}
+
+    count = after["count"] - before["count"]
+    buckets = [
+        after_bucket - before_bucket
+        for after_bucket, before_bucket in zip(after["buckets"], before["buckets"])
+    ]
+    stall_index = LOOP_LAG_BUCKETS.index(LOOP_LAG_STALL)
+    max_under = next(
+        (bound for bound, bucket in zip(LOOP_LAG_BUCKETS, buckets) if bucket == count),
+        None,
+    )
+    blocked = after["sum"] - before["sum"]
+    return {
+        "available": True,
+        "blocked_seconds": round(blocked, 3),
+        "blocked_share": round(blocked / seconds, 4),
+        f"stalls_over_{int(LOOP_LAG_STALL * 1000)}ms": int(
+            count - buckets[stall_index]
+        ),
+        "max_lag_under_ms": max_under * 1000 if max_under is not None else None,
+    }
+
+
+def pool_report(before: dict, after: dict) -> dict:
+    if not after.get("initialized"):
+        return {"initialized": False}
+    return {
+        "size": after["size"],
+        "checked_out_at_end": after["checked_out"],
+        "new_connections": after["connects"] - before.get("connects", 0),
+        "checkouts": after["checkouts"] - before.get("checkouts", 0),
+        "avg_wait_ms": after["avg_wait_ms"],
+        "max_wait_ms": after["max_wait_ms"],
+    }
+
+
+def print_report(report: dict):
+    print(
+        f"\n{report['profile']} profile: {report['target_rps']} rps target, "
+        f"{report['achieved_rps']} rps achieved over {report['seconds']}s, "
+        f"{report['dropped']} dropped at --max-in-flight"
+    )
+    print(
+        f"{'operation':>20} {'requests':>9} {'errors':>7} {'p50, ms':>9} "
+        f"{'p95, ms':>9} {'p99, ms':>9} {'max, ms':>9}"
+    )
+    for operation, summary in report["operations"].items():
+        print(
+            f"{operation:>20} {summary['requests']:>9} {summary['errors']:>7} "
+            f"{summary['p50_ms']:>9.1f} {summary['p95_ms']:>9.1f} "
+            f"{summary['p99_ms']:>9.1f} {summary['max_ms']:>9.1f}"
+        )
+    print(f"event loop: {report['event_loop']}")
+    print(f"database pool: {report['database_pool']}")
+
+
+def check_budget(report: dict, args: argparse.Namespace) -> list[str]:
+    total = report["operations"]["total"]
+    violations = []
+    if args.p99_budget is not None and total["p99_ms"] > args.p99_budget:
+        violations.append(f"p99 {total['p99_ms']} ms > {args.p99_budget} ms")
+    if args.max_error_rate is not None and total["error_rate"] > args.max_error_rate:
+        violations.append(f"error rate {total['error_rate']} > {args.max_error_rate}")
+    return violations
+
+
+async def main(args: argparse.Namespace) -> int:
+    process = None
+    url = args.url
+    # сессии поднятого API (и база без --db-url) живут здесь, а не в sessions/
+    work_dir = tempfile.mkdtemp(prefix="loadtest-")
+    if url is None:
+        if args.db_url is None:
+            args.db_url = f"sqlite+aiosqlite:///{os.path.join(work_dir, 'load.db')}"
+            args.create_schema = True
+        process, url = start_server(args, work_dir)
+
+    try:
+        async with httpx.AsyncClient(
+            base_url=url,
+            timeout=args.timeout,
+            limits=httpx.Limits(max_connections=args.max_in_flight),
+        ) as client:
+            await wait_ready(client, process)
+            channels = await warm_up(client, args)
+
+            health_before = (await client.get("/health")).json()
+            lag_before = await read_loop_lag(client)
+            samples, dropped, seconds = await generate_load(client, channels, args)
+            lag_after = await read_loop_lag(client)
+            health_after = (await client.get("/health")).json()
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    operations = {
+        operation: summarize(
+            [sample for sample in samples if sample["operation"] == operation]
+        )
+        for operation in PROFILES[args.profile]
+    }
+    operations["total"] = summarize(samples)
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "url": args.url or "stub",
+        "profile": args.profile,
+        "target_rps": args.rps,
+        "achieved_rps": round(len(samples) / seconds, 1),
+        "seconds": round(seconds, 1),
+        "dropped": dropped,
+        "operations": operations,
+        "errors": sorted({s["error"] for s in samples if s["error"] is not None}),
+        "event_loop": loop_lag_report(lag_before, lag_after, seconds),
+        "database_pool": pool_report(
+            health_before.get("database_pool", {}),
+            health_after.get("database_pool", {}),
+        ),
+    }
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Report written to {args.output}")
+
+    violations = check_budget(report, args)
+    for violation in violations:
+        print(f"[FAIL] {violation}")
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="load an already running API instead")
+    parser.add_argument("--profile", choices=PROFILES, default="mixed")
+    parser.add_argument("--rps", type=float, default=20)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--channels", type=int, default=10)
+    parser.add_argument("--limit-messages", type=int, default=100)
+    parser.add_argument("--max-in-flight", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    parser.add_argument("--p99-budget", type=float, help="fail above this p99, ms")
+    parser.add_argument("--max-error-rate", type=float, help="fail above this share")
+
+    stub = parser.add_argument_group("stub API")
+    stub.add_argument(
+        "--db-url",
+        help="database of the stub API (default: a throwaway SQLite file)",
+    )
+    stub.add_argument("--create-schema", action="store_true")
+    stub.add_argument("--accounts", type=int, default=1)
+    stub.add_argument(
+        "--channel-messages",
+        type=int,
+        default=1000,
+        help="posts in every fake channel",
+    )
+    stub.add_argument(
+        "--telegram-latency",
+        type=float,
+        default=0.05,
+        help="seconds per fake Telegram request",
+    )
+    stub.add_argument(
+        "--s3-latency",
+        type=float,
+        default=0.05,
+        help="seconds per in-memory S3 call",
+    )
+    stub.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    stub.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    stub.add_argument("--session-dir", help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+    if args.serve:
+        asyncio.run(serve(args))
+    else:
+        sys.exit(asyncio.run(main(args)))
@@ -0,0 +1,201 @@
+"""Бенчмарк извлечения сообщений: MessageBatch против словаря на каждый пост.
+
+Запуск из каталога сервиса:
+
+    python -m benchmarks.message_records
+    python -m benchmarks.message_records --messages 10000 100000 --repeat 5
+
+База и сеть не нужны: Message создаются FakeTelegramClient заранее и в замер
+не входят. Прежний путь — async-извлечение в dict, отдельный подсчёт итогов
+и второй dict на пост для ответа — воспроизведён здесь как ориентир.
+Время меряется без tracemalloc, память — отдельным прогоном под ним:
+«retained» — сколько занимают извлечённые данные, «peak» — пик вместе
+с построением списка сообщений ответа.
+"""
+
+import argparse
+import asyncio
+import gc
+import time
+import tracemalloc
+
+from telethon.tl.types import Message, MessageMediaDocument, MessageMediaPhoto
+
+from app.services.message_records import MessageBatch
+
+from benchmarks.fake_telegram import FakeTelegramClient
+
+
+async def dict_extract(message: Message) -> dict:
+    """Прежний _extract_message_stats"""
+    reactions = {}
+    if message.reactions:
+        if hasattr(message.reactions, "results"):
+            for reaction in message.reactions.results:
+                if hasattr(reaction, "count"):
+                    if (
+                        hasattr(reaction.reaction, "emoticon")
+                        and reaction.reaction.emoticon
+                    ):
+                        reaction_key = reaction.reaction.emoticon
+                    elif hasattr(reaction.reaction, "document_id"):
+                        reaction_key = f"document_{reaction.reaction.document_id}"
+                    else:
+                        reaction_key = str(reaction.reaction)
+                    reactions[reaction_key] = reaction.count
+
+    replies_count = 0
+    if message.replies:
+        if hasattr(message.replies, "replies"):
+            replies_count = message.replies.replies
+        elif hasattr(message.replies, "replies_count"):
+            replies_count = message.replies.replies_count
+
+    media_type = None
+    has_media = 0
+    if message.media:
+        has_media = 1
+        if isinstance(message.media, MessageMediaPhoto):
+            media_type = "photo"
+        elif isinstance(message.media, MessageMediaDocument):
+            media_type = "document"
+
+    message_date = message.date
+    if message_date.tzinfo is not None:
+        message_date = message_date.replace(tzinfo=None)
+
+    return {
+        "message_id": message.id,
+        "date": message_date,
+        "views": getattr(message, "views", None),
+        "forwards": getattr(message, "forwards", None),
+        "replies": replies_count,
+        "reactions": reactions,
+        "text": message.text or "",
+        "media_type": media_type,
+        "has_media": has_media,
+    }
+
+
+async def dict_scrape(messages: list[Message]) -> tuple[list, dict]:
+    messages_data = []
+    total_views = 0
+    total_reactions = 0
+    total_forwards = 0
+    messages_with_stats = 0
+    for message in messages:
+        message_stats = await dict_extract(message)
+        messages_data.append(message_stats)
+        if message_stats["views"]:
+            total_views += message_stats["views"]
+            messages_with_stats += 1
+        total_forwards += message_stats["forwards"] or 0
+        total_reactions += sum(message_stats["reactions"].values())
+    return messages_data, {
+        "total_views": total_views,
+        "total_forwards": total_forwards,
+        "total_reactions": total_reactions,
+        "messages_with_stats": messages_with_stats,
+    }
+
+
+def dict_response(messages_data: list[dict]) -> list[dict]:
+    return [
+        {
+            "message_id": msg["message_id"],
+            "date": msg["date"],
+            "views": msg["views"],
+            "forwards": msg["forwards"],
+            "replies": msg["replies"],
+            "reactions": msg["reactions"],
+            "text": msg["text"],
+            "media_type": msg["media_type"],
+            "has_media": msg["has_media"],
+        }
+        for msg in messages_data
+    ]
+
+
+async def batch_scrape(messages: list[Message]) -> tuple[MessageBatch, dict]:
+    batch = MessageBatch()
+    for message in messages:
+        batch.add(message)
+    return batch, {
+        "total_views": batch.total_views,
+        "total_forwards": batch.total_forwards,
+        "total_reactions": batch.total_reactions,
+        "messages_with_stats": batch.messages_with_stats,
+    }
+
+
+def batch_response(batch: MessageBatch) -> list[dict]:
+    return [record.as_response() for record in batch.records]
+
+
+async def timed(scrape, respond, messages: list[Message], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        extracted, _ = await scrape(messages)
+        respond(extracted)
+        best = min(best, time.perf_counter() - started)
+        del extracted
+    return best
+
+
+async def traced(scrape, respond, messages: list[Message]) -> tuple[int, int, dict]:
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    extracted, totals = await scrape(messages)
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    response = respond(extracted)
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    del extracted, response
+    return retained, peak, totals
+
+
+async def main(args: argparse.Namespace):
+    client = FakeTelegramClient(messages=max(args.messages))
+    channel_id = client.channel_id("records")
+    print(
+        f"{'messages':>9} {'path':>6} {'msgs/sec':>10} "
+        f"{'retained, MB':>13} {'peak, MB':>9}"
+    )
+    for count in args.messages:
+        messages = [
+            client.message(channel_id, message_id) for message_id in range(count, 0, -1)
+        ]
+        # Message.text кэширует текст при первом обращении; прогреваем заранее
+        for message in messages:
+            message.text
+
+        results = {}
+        for path, scrape, respond in (
+            ("dict", dict_scrape, dict_response),
+            ("slots", batch_scrape, batch_response),
+        ):
+            seconds = await timed(scrape, respond, messages, args.repeat)
+            retained, peak, totals = await traced(scrape, respond, messages)
+            results[path] = (seconds, retained, peak, totals)
+            print(
+                f"{count:>9} {path:>6} {count / seconds:>10.0f} "
+                f"{retained / 2**20:>13.1f} {peak / 2**20:>9.1f}"
+            )
+
+        assert results["dict"][3] == results["slots"][3]
+        dict_seconds, dict_retained = results["dict"][:2]
+        slots_seconds, slots_retained = results["slots"][:2]
+        print(
+            f"{'':>9} {'gain':>6} {dict_seconds / slots_seconds:>9.2f}x "
+            f"{dict_retained / slots_retained:>12.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
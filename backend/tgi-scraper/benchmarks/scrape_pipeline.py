@@ -0,0 +1,213 @@
+"""Бенчмарк конвейера скрапинга на фейковом Telegram: msgs/sec и пиковый RSS.
+
+Запуск из каталога сервиса:
+
+    python -m benchmarks.scrape_pipeline --messages 1000 10000
+    python -m benchmarks.scrape_pipeline --db-url sqlite+aiosqlite:///bench.db --create-schema
+    python -m benchmarks.scrape_pipeline --messages 50000 --output before.json
+
+По умолчанию используется DB_URL из окружения (SQLite или Postgres). Сеть
+и S3 не нужны: сообщения отдаёт FakeTelegramClient. Для каждого объёма
+замеряются этапы:
+
+    extract         MessageBatch.add по заранее созданным Message
+    fetch           скачивание канала с фейкового клиента (включая extract)
+    save_new        _save_to_database первого снимка
+    save_unchanged  _save_to_database того же снимка ещё раз
+    scrape          полный scrape_channel_stats нового канала
+
+Каждый запуск пишет в БД новые каналы; результаты с --output удобно
+сравнивать до и после изменения.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import psutil
+
+from core.config import DB_URL
+from db.models.stats import Base
+import db.models.jobs  # noqa: F401
+import db.models.watchlist  # noqa: F401
+from db.session import dispose_engine, init_engine
+
+from app.services.message_records import MessageBatch
+
+from benchmarks.fake_telegram import FakeTelegramClient, create_fake_scraper
+
+
+class RssSampler:
+    """Фоновый поток, запоминающий максимальный RSS процесса за замер"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.start_rss = 0
+        self.peak_rss = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> "RssSampler":
+        self.start_rss = self.peak_rss = self.process.memory_info().rss
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak_rss = max(self.peak_rss, self.process.memory_info().rss)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, self.process.memory_info().rss)
+
+
+async def measure(stage: str, messages: int, coroutine_function) -> dict:
+    with RssSampler() as rss:
+        started = time.perf_counter()
+        result = await coroutine_function()
+        elapsed = time.perf_counter() - started
+
+    return {
+        "stage": stage,
+        "messages": messages,
+        "seconds": round(elapsed, 4),
+        "messages_per_sec": round(messages / elapsed, 1) if elapsed else None,
+        "peak_rss_mb": round(rss.peak_rss / 2**20, 1),
+        "rss_growth_mb": round((rss.peak_rss - rss.start_rss) / 2**20, 1),
+        "_result": result,
+    }
+
+
+async def run_size(count: int, args: argparse.Namespace) -> list[dict]:
+    run_id = uuid.uuid4().hex[:8]
+    client_kwargs = {"messages": count, "latency": args.latency}
+    scraper = await create_fake_scraper(**client_kwargs)
+    results = []
+
+    try:
+        client = FakeTelegramClient(**client_kwargs)
+        channel_id = client.channel_id(f"extract_{run_id}")
+        messages = [
+            client.message(channel_id, message_id) for message_id in range(count, 0, -1)
+        ]
+
+        async def extract():
+            batch = MessageBatch()
+            for message in messages:
+                batch.add(message)
+            return batch
+
+        results.append(await measure("extract", count, extract))
+        del messages
+
+        identifier = f"bench_{run_id}"
+        fetched = await measure(
+            "fetch",
+            count,
+            lambda: scraper._fetch_channel_stats(identifier, count),
+        )
+        scraped = fetched["_result"]
+        results.append(fetched)
+
+        results.append(
+            await measure("save_new", count, lambda: scraper._save_to_database(scraped))
+        )
+        # тот же снимок ещё раз: сообщения не изменились и не переписываются
+        scraped["scraped_at"] = datetime.now()
+        results.append(
+            await measure(
+                "save_unchanged", count, lambda: scraper._save_to_database(scraped)
+            )
+        )
+        del scraped, fetched
+
+        results.append(
+            await measure(
+                "scrape",
+                count,
+                lambda: scraper.scrape_channel_stats(f"scrape_{run_id}", count),
+            )
+        )
+    finally:
+        await scraper.pool.disconnect()
+
+    for result in results:
+        result.pop("_result")
+    return results
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args: argparse.Namespace):
+    engine = init_engine(args.db_url)
+    if args.create_schema:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    results = []
+    print(
+        f"{'messages':>9} {'stage':>15} {'seconds':>9} {'msgs/sec':>10} "
+        f"{'peak RSS, MB':>13} {'growth, MB':>11}"
+    )
+    try:
+        for count in args.messages:
+            for result in await run_size(count, args):
+                results.append(result)
+                print(
+                    f"{count:>9} {result['stage']:>15} {result['seconds']:>9.3f} "
+                    f"{result['messages_per_sec']:>10.0f} "
+                    f"{result['peak_rss_mb']:>13.1f} {result['rss_growth_mb']:>11.1f}"
+                )
+    finally:
+        await dispose_engine()
+
+    if args.output:
+        report = {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "db_dialect": engine.dialect.name,
+            "latency": args.latency,
+            "results": results,
+        }
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, nargs="+", default=[1000, 10_000])
+    parser.add_argument("--db-url", default=DB_URL)
+    parser.add_argument("--create-schema", action="store_true")
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="seconds awaited per fake Telegram request",
+    )
+    parser.add_argument("--output", help="write results as JSON to this file")
+    asyncio.run(main(parser.parse_args()))
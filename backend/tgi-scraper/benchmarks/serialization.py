@@ -0,0 +1,110 @@
+"""Бенчмарк сериализации ответа /scrape: pydantic + JSONResponse против orjson.
+
+Запуск из каталога сервиса:
+
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --messages 1000 10000 50000 --repeat 10
+
+База и сеть не нужны: результат скрапинга собирается из сообщений
+FakeTelegramClient так же, как это делает TelegramScraper. Каждый путь
+замеряется от записей MessageBatch до тела ответа. Прежний повторяет
+FastAPI: ScrapeResponse(**result), повторная валидация по response_model,
+jsonable_encoder и json.dumps. Новый — словари ответа из записей и
+scrape_response из роутера, с текстом сообщений и без него.
+"""
+
+import argparse
+import asyncio
+import gzip
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from api.router import scrape_response
+from app.schemas.stats import ScrapeResponse
+from app.services.message_records import MessageBatch
+from app.services.telegram_scraper import TelegramScraper
+
+from benchmarks.fake_telegram import FakeTelegramClient
+
+
+def make_scraped(count: int) -> dict:
+    client = FakeTelegramClient(messages=count)
+    channel_id = client.channel_id("serialization")
+    messages = MessageBatch()
+    for message_id in range(count, 0, -1):
+        messages.add(client.message(channel_id, message_id))
+
+    channel = client.channel(channel_id)
+    return {
+        "channel_data": {
+            "channel_id": channel_id,
+            "username": channel.username,
+            "title": channel.title,
+            "description": "Synthetic benchmark channel",
+            "subscribers_count": client.subscribers,
+            "participants_count": client.subscribers,
+        },
+        "messages": messages,
+        "scraped_at": client._now.replace(tzinfo=None),
+    }
+
+
+async def pydantic_body(scraped: dict) -> bytes:
+    """Что делал маршрут до orjson: две валидации и стандартный json"""
+    result = TelegramScraper._scrape_response(scraped)
+    field = create_model_field("response", ScrapeResponse, mode="serialization")
+    content = await serialize_response(
+        field=field, response_content=ScrapeResponse(**result), is_coroutine=True
+    )
+    return JSONResponse(content).body
+
+
+async def orjson_body(scraped: dict) -> bytes:
+    return scrape_response(TelegramScraper._scrape_response(scraped)).body
+
+
+async def orjson_no_text_body(scraped: dict) -> bytes:
+    return scrape_response(
+        TelegramScraper._scrape_response(scraped, include_text=False)
+    ).body
+
+
+async def measure(render, scraped: dict, repeat: int) -> tuple[float, bytes]:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = await render(scraped)
+        best = min(best, time.perf_counter() - started)
+    return best, body
+
+
+async def main(args: argparse.Namespace):
+    print(
+        f"{'messages':>9} {'path':>14} {'ms':>9} {'size, KB':>10} "
+        f"{'gzip, KB':>10} {'speedup':>8}"
+    )
+    for count in args.messages:
+        scraped = make_scraped(count)
+        baseline = None
+        for path, render in (
+            ("pydantic", pydantic_body),
+            ("orjson", orjson_body),
+            ("orjson no text", orjson_no_text_body),
+        ):
+            seconds, body = await measure(render, scraped, args.repeat)
+            baseline = baseline or seconds
+            print(
+                f"{count:>9} {path:>14} {seconds * 1000:>9.1f} "
+                f"{len(body) / 1024:>10.0f} {len(gzip.compress(body)) / 1024:>10.0f} "
+                f"{baseline / seconds:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, nargs="+", default=[10_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -7,15 +7,59 @@ DEBUG: bool = os.environ.get("DEBUG", "False") == "True"
 API_HOST: str = os.environ.get("APP_HOST", "0.0.0.0")
 API_PORT: int = int(os.environ.get("APP_PORT", "8000"))
 DB_URL: str = os.environ.get("DB_URL")
+DB_POOL_SIZE: int = int(os.environ.get("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW: int = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT: float = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE: int = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING: bool = os.environ.get("DB_POOL_PRE_PING", "True") == "True"
+DB_BULK_COPY_THRESHOLD: int = int(os.environ.get("DB_BULK_COPY_THRESHOLD", "1000"))
 TELEGRAM_API_ID: str = os.environ.get("TELEGRAM_API_ID")
 TELEGRAM_API_HASH: str = os.environ.get("TELEGRAM_API_HASH")
 
+ENTITY_CACHE_TTL: int = int(os.environ.get("ENTITY_CACHE_TTL", "86400"))
+FULL_INFO_CACHE_TTL: int = int(os.environ.get("FULL_INFO_CACHE_TTL", "300"))
+ENTITY_CACHE_MAX_SIZE: int = int(os.environ.get("ENTITY_CACHE_MAX_SIZE", "10000"))
+ENTITY_CACHE_PATH: str = os.environ.get("ENTITY_CACHE_PATH")
+
+SCRAPE_HOT_WINDOW_HOURS: int = int(os.environ.get("SCRAPE_HOT_WINDOW_HOURS", "48"))
+SNAPSHOT_REVALIDATE_AFTER: int = int(os.environ.get("SNAPSHOT_REVALIDATE_AFTER", "60"))
+SCRAPE_JOB_WORKERS: int = int(os.environ.get("SCRAPE_JOB_WORKERS", "4"))
+
+SCHEDULER_ENABLED: bool = os.environ.get("SCHEDULER_ENABLED", "True") == "True"
+SCHEDULER_CONCURRENCY: int = int(os.environ.get("SCHEDULER_CONCURRENCY", "2"))
+SCHEDULER_TICK: float = float(os.environ.get("SCHEDULER_TICK", "5"))
+SCHEDULER_JITTER: float = float(os.environ.get("SCHEDULER_JITTER", "0.1"))
+SCHEDULER_DEFAULT_INTERVAL: int = int(
+    os.environ.get("SCHEDULER_DEFAULT_INTERVAL", "3600")
+)
+SCHEDULER_MIN_INTERVAL: int = int(os.environ.get("SCHEDULER_MIN_INTERVAL", "300"))
+SCHEDULER_FULL_REFRESH_EVERY: int = int(
+    os.environ.get("SCHEDULER_FULL_REFRESH_EVERY", "6")
+)
+SCRAPE_STREAM_CHUNK_SIZE: int = int(os.environ.get("SCRAPE_STREAM_CHUNK_SIZE", "500"))
+SCRAPE_BATCH_MAX_CHANNELS: int = int(os.environ.get("SCRAPE_BATCH_MAX_CHANNELS", "100"))
+SCRAPE_BATCH_CONCURRENCY: int = int(os.environ.get("SCRAPE_BATCH_CONCURRENCY", "4"))
+ANALYTICS_MAX_MESSAGES: int = int(os.environ.get("ANALYTICS_MAX_MESSAGES", "200000"))
+EXPORT_CHUNK_SIZE: int = int(os.environ.get("EXPORT_CHUNK_SIZE", "10000"))
+
+TELEGRAM_RATE_RESOLVE: float = float(os.environ.get("TELEGRAM_RATE_RESOLVE", "0.5"))
+TELEGRAM_RATE_FULL_INFO: float = float(os.environ.get("TELEGRAM_RATE_FULL_INFO", "1"))
+TELEGRAM_RATE_HISTORY: float = float(os.environ.get("TELEGRAM_RATE_HISTORY", "3"))
+TELEGRAM_RATE_VIEWS: float = float(os.environ.get("TELEGRAM_RATE_VIEWS", "2"))
+FLOOD_WAIT_BUDGET: int = int(os.environ.get("FLOOD_WAIT_BUDGET", "30"))
+
 S3_ENDPOINT_URL: str = os.environ.get("S3_ENDPOINT_URL", "https://s3.amazonaws.com")
 S3_ACCESS_KEY_ID: str = os.environ.get("S3_ACCESS_KEY_ID")
 S3_SECRET_ACCESS_KEY: str = os.environ.get("S3_SECRET_ACCESS_KEY")
 S3_BUCKET_NAME: str = os.environ.get("S3_BUCKET_NAME", "telegram-sessions")
 S3_SESSION_KEY: str = os.environ.get("S3_SESSION_KEY", "telegram_scraper.session")
+S3_SESSION_KEYS: list[str] = [
+    key.strip()
+    for key in os.environ.get("S3_SESSION_KEYS", S3_SESSION_KEY).split(",")
+    if key.strip()
+]
 S3_REGION: str = os.environ.get("S3_REGION", "us-east-1")
+S3_UPLOAD_INTERVAL: float = float(os.environ.get("S3_UPLOAD_INTERVAL", "30"))
 
 LOCAL_SESSION_PATH: str = os.environ.get(
     "LOCAL_SESSION_PATH", "sessions/telegram_scraper.session"
@@ -0,0 +1,83 @@
+from contextlib import contextmanager
+import functools
+import time
+from typing import Awaitable, Callable, Iterator, TypeVar
+
+from prometheus_client import Counter, Gauge, Histogram
+
+T = TypeVar("T")
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+STAGE_SECONDS = Histogram(
+    "scraper_stage_seconds",
+    "Duration of scrape stages",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+STAGE_IN_FLIGHT = Gauge(
+    "scraper_stage_in_flight",
+    "Scrape stages currently running",
+    ["stage"],
+)
+STAGE_ERRORS = Counter(
+    "scraper_stage_errors_total",
+    "Scrape stages that ended with an exception",
+    ["stage"],
+)
+
+MESSAGES_SCRAPED = Counter(
+    "scraper_messages_total",
+    "Messages fetched from Telegram; rate() of it is messages per second",
+)
+FLOOD_WAIT_SECONDS = Counter(
+    "scraper_flood_wait_seconds_total",
+    "FloodWait seconds received from Telegram",
+    ["outcome"],
+)
+DB_ROWS_WRITTEN = Counter(
+    "scraper_db_rows_written_total",
+    "Rows inserted or upserted",
+    ["table"],
+)
+S3_BYTES = Counter(
+    "scraper_s3_bytes_total",
+    "Session bytes transferred to or from S3",
+    ["direction"],
+)
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Times a stage into `scraper_stage_seconds` and counts it as in flight.
+
+    Works around awaits as well: `with stage_timer("save"): await ...`.
+    Only exceptions count as errors; cancellation and generator close do not.
+    """
+    in_flight = STAGE_IN_FLIGHT.labels(stage)
+    in_flight.inc()
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(stage).inc()
+        raise
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - started)
+        in_flight.dec()
+
+
+def timed_stage(
+    stage: str,
+) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Decorator form of `stage_timer` for coroutine functions"""
+
+    def decorator(function: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs) -> T:
+            with stage_timer(stage):
+                return await function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,99 @@
+from sqlalchemy import BigInteger, Text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class epoch_seconds(FunctionElement):
+    """Целые секунды от Unix-эпохи для наивного (UTC) DateTime"""
+
+    type = BigInteger()
+    name = "epoch_seconds"
+    inherit_cache = True
+
+
+@compiles(epoch_seconds)
+def _epoch_seconds_postgresql(element, compiler, **kw):
+    return (
+        f"CAST(FLOOR(EXTRACT(EPOCH FROM {compiler.process(element.clauses, **kw)}))"
+        " AS BIGINT)"
+    )
+
+
+@compiles(epoch_seconds, "sqlite")
+def _epoch_seconds_sqlite(element, compiler, **kw):
+    return f"CAST(strftime('%s', {compiler.process(element.clauses, **kw)}) AS INTEGER)"
+
+
+class json_values_sum(FunctionElement):
+    """Сумма числовых значений JSON-объекта (например, счётчиков реакций)"""
+
+    type = BigInteger()
+    name = "json_values_sum"
+    inherit_cache = True
+
+
+@compiles(json_values_sum)
+def _json_values_sum_postgresql(element, compiler, **kw):
+    return (
+        "(SELECT COALESCE(SUM(CAST(value AS BIGINT)), 0) "
+        f"FROM json_each_text({_json_object_postgresql(element, compiler, **kw)}))"
+    )
+
+
+@compiles(json_values_sum, "sqlite")
+def _json_values_sum_sqlite(element, compiler, **kw):
+    return (
+        "(SELECT COALESCE(SUM(value), 0) "
+        f"FROM json_each({_json_object_sqlite(element, compiler, **kw)}))"
+    )
+
+
+class json_array_agg(FunctionElement):
+    """Агрегат: значения колонки всех строк группы одним JSON-массивом (текстом).
+
+    Порядок элементов в разных json_array_agg одного SELECT совпадает, так
+    что массивы колонок выровнены по строкам.
+    """
+
+    type = Text()
+    name = "json_array_agg"
+    inherit_cache = True
+
+
+@compiles(json_array_agg)
+def _json_array_agg_postgresql(element, compiler, **kw):
+    return f"CAST(json_agg({compiler.process(element.clauses, **kw)}) AS TEXT)"
+
+
+@compiles(json_array_agg, "sqlite")
+def _json_array_agg_sqlite(element, compiler, **kw):
+    return f"json_group_array({compiler.process(element.clauses, **kw)})"
+
+
+class json_entries(FunctionElement):
+    """Табличная функция: пары key/value JSON-объекта, значения — текстом или числом"""
+
+    name = "json_entries"
+    inherit_cache = True
+
+
+@compiles(json_entries)
+def _json_entries_postgresql(element, compiler, **kw):
+    return f"json_each_text({_json_object_postgresql(element, compiler, **kw)})"
+
+
+@compiles(json_entries, "sqlite")
+def _json_entries_sqlite(element, compiler, **kw):
+    return f"json_each({_json_object_sqlite(element, compiler, **kw)})"
+
+
+# JSON null или не-объект разворачиваются в пустой набор: json_each_text на
+# PostgreSQL падает на таких значениях, а json_each в SQLite даёт строку с NULL
+def _json_object_postgresql(element, compiler, **kw) -> str:
+    value = compiler.process(element.clauses, **kw)
+    return f"CASE WHEN json_typeof({value}) = 'object' THEN {value} END"
+
+
+def _json_object_sqlite(element, compiler, **kw) -> str:
+    value = compiler.process(element.clauses, **kw)
+    return f"CASE WHEN json_type({value}) = 'object' THEN {value} END"
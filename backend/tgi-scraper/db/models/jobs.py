@@ -0,0 +1,20 @@
+from uuid import uuid4
+from sqlalchemy import Column, UUID, String, Integer, DateTime, Text, JSON
+
+from db.models.stats import Base
+
+
+class ScrapeJob(Base):
+    __tablename__ = "scrape_jobs"
+
+    id = Column(UUID, primary_key=True, default=uuid4)
+    status = Column(String(20), nullable=False, index=True)
+    request = Column(JSON, nullable=False)
+    progress = Column(Integer, nullable=False, default=0)
+
+    result = Column(JSON)
+    error = Column(Text)
+
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
@@ -1,5 +1,18 @@
 from uuid import uuid4
-from sqlalchemy import Column, UUID, String, Integer, DateTime, Text, JSON, BigInteger
+from sqlalchemy import (
+    Column,
+    UUID,
+    String,
+    Integer,
+    DateTime,
+    Text,
+    JSON,
+    BigInteger,
+    Boolean,
+    Index,
+    false,
+    func,
+)
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -26,6 +39,18 @@ class ChannelStats(Base):
 
     messages_analyzed = Column(Integer)
     recent_activity = Column(JSON)
+    # инкрементальный снимок: агрегаты только по новым и горячим постам
+    incremental = Column(Boolean, nullable=False, default=False, server_default=false())
+
+    __table_args__ = (
+        Index("ix_channel_stats_channel_id_scraped_at", channel_id, scraped_at.desc()),
+        # поиск снимка по @username, пока channel_id канала неизвестен
+        Index(
+            "ix_channel_stats_username_lower_scraped_at",
+            func.lower(username),
+            scraped_at.desc(),
+        ),
+    )
 
 
 class MessageStats(Base):
@@ -45,3 +70,68 @@ class MessageStats(Base):
     text = Column(Text)
     media_type = Column(String(100))
     has_media = Column(Integer)
+
+    __table_args__ = (
+        Index(
+            "ix_message_stats_channel_id_message_id",
+            channel_id,
+            message_id,
+            unique=True,
+        ),
+        Index("ix_message_stats_channel_id_date", channel_id, date),
+    )
+
+
+class MessageStatsHistory(Base):
+    """Metric time series: a row is written only when a post's counters changed"""
+
+    __tablename__ = "message_stats_history"
+
+    channel_id = Column(BigInteger, primary_key=True)
+    message_id = Column(BigInteger, primary_key=True)
+    scraped_at = Column(DateTime, primary_key=True)
+
+    views = Column(Integer)
+    forwards = Column(Integer)
+    replies = Column(Integer)
+    reactions = Column(JSON)
+
+    __table_args__ = (
+        Index("ix_message_stats_history_channel_id_scraped_at", channel_id, scraped_at),
+    )
+
+
+class ChannelWatermark(Base):
+    __tablename__ = "channel_watermarks"
+
+    channel_id = Column(BigInteger, primary_key=True)
+    last_message_id = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+
+class ChannelRollup(Base):
+    """Hourly/daily channel aggregates.
+
+    Subscriber fields come from channel snapshots taken in the bucket; post
+    fields cover posts published in the bucket, with their latest metrics.
+    """
+
+    __tablename__ = "channel_rollups"
+
+    channel_id = Column(BigInteger, primary_key=True)
+    granularity = Column(String(10), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+
+    snapshots = Column(Integer, nullable=False, default=0)
+    subscribers_open = Column(Integer)
+    subscribers_close = Column(Integer)
+    subscribers_delta = Column(Integer)
+
+    posts = Column(Integer, nullable=False, default=0)
+    views_sum = Column(BigInteger, nullable=False, default=0)
+    views_p50 = Column(Integer)
+    views_p90 = Column(Integer)
+    forwards_sum = Column(BigInteger, nullable=False, default=0)
+    reactions_total = Column(BigInteger, nullable=False, default=0)
+
+    updated_at = Column(DateTime, nullable=False)
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, Float, Text
+
+from db.models.stats import Base
+
+
+class WatchedChannel(Base):
+    """Channel refreshed periodically by the scheduler"""
+
+    __tablename__ = "watchlist"
+
+    # normalize_channel_identifier: @name, name и t.me/name — один канал
+    channel_identifier = Column(String(255), primary_key=True)
+    channel_id = Column(BigInteger)
+
+    interval_seconds = Column(Integer, nullable=False)
+    limit_messages = Column(Integer, nullable=False, default=100)
+
+    priority = Column(Float, nullable=False, default=0)
+    subscribers_count = Column(Integer)
+    posts_per_day = Column(Float)
+
+    next_run_at = Column(DateTime, nullable=False, index=True)
+    last_run_at = Column(DateTime)
+    last_error = Column(Text)
+    failures = Column(Integer, nullable=False, default=0)
+    # инкрементальных обновлений после последнего полного; NULL — полного ещё не было
+    incremental_runs = Column(Integer)
+    created_at = Column(DateTime, nullable=False)
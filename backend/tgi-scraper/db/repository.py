@@ -1,9 +1,23 @@
+import json
 import uuid
-from typing import Generic, TypeVar
+from typing import Any, AsyncIterator, Callable, Generic, Sequence, TypeVar
 
-from sqlalchemy import BinaryExpression, select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import (
+    JSON,
+    BinaryExpression,
+    Column,
+    ColumnElement,
+    Select,
+    insert,
+    literal,
+    select,
+    tuple_,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
 
+from core.config import DB_BULK_COPY_THRESHOLD
+from core.metrics import DB_ROWS_WRITTEN
 from db.models import Base
 
 Model = TypeVar("Model", bound=Base)
@@ -24,6 +38,97 @@ class DatabaseRepo(Generic[Model]):
         await self.session.refresh(instance)
         return instance
 
+    async def bulk_create(
+        self, rows: list[dict], copy_threshold: int = DB_BULK_COPY_THRESHOLD
+    ) -> int:
+        """Массово вставляет записи без flush/refresh на каждую строку.
+
+        Небольшие пачки уходят multi-row INSERT'ом, большие на asyncpg — через COPY.
+        Возвращает количество вставленных строк.
+        """
+        if not rows:
+            return 0
+
+        connection = await self.session.connection()
+        if (
+            copy_threshold
+            and len(rows) >= copy_threshold
+            and connection.dialect.driver == "asyncpg"
+        ):
+            await self._copy_records(connection, rows)
+        else:
+            await self.session.execute(insert(self.model), rows)
+
+        DB_ROWS_WRITTEN.labels(self.model.__tablename__).inc(len(rows))
+        return len(rows)
+
+    async def upsert(
+        self,
+        rows: list[dict],
+        index_elements: list[str],
+        update_columns: list[str],
+        where: Callable[[Any], ColumnElement[bool]] | None = None,
+    ) -> int:
+        """Вставляет записи, а при конфликте по index_elements обновляет update_columns.
+
+        Использует INSERT ... ON CONFLICT DO UPDATE (PostgreSQL и SQLite).
+        `where` получает excluded (вставляемую строку) и ограничивает, какие
+        существующие строки обновляются. Возвращает количество обработанных строк.
+        """
+        if not rows:
+            return 0
+
+        connection = await self.session.connection()
+        dialect = connection.dialect.name
+        if dialect == "postgresql":
+            query = postgresql.insert(self.model)
+        elif dialect == "sqlite":
+            query = sqlite.insert(self.model)
+        else:
+            raise NotImplementedError(f"Upsert is not supported for {dialect}")
+
+        query = query.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={column: query.excluded[column] for column in update_columns},
+            where=where(query.excluded) if where is not None else None,
+        )
+        await self.session.execute(query, rows)
+        DB_ROWS_WRITTEN.labels(self.model.__tablename__).inc(len(rows))
+        return len(rows)
+
+    async def _copy_records(
+        self, connection: AsyncConnection, rows: list[dict]
+    ) -> None:
+        """Загружает строки через asyncpg COPY, заполняя дефолты колонок."""
+        table = self.model.__table__
+        columns = list(table.columns)
+        records = [
+            tuple(self._copy_value(column, row) for column in columns) for row in rows
+        ]
+
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            table.name,
+            records=records,
+            columns=[column.name for column in columns],
+            schema_name=table.schema,
+        )
+
+    @staticmethod
+    def _copy_value(column: Column, row: dict) -> Any:
+        if column.key in row:
+            value = row[column.key]
+        elif column.default is not None and column.default.is_callable:
+            value = column.default.arg(None)
+        elif column.default is not None and column.default.is_scalar:
+            value = column.default.arg
+        else:
+            value = None
+
+        if value is not None and isinstance(column.type, JSON):
+            return json.dumps(value)
+        return value
+
     async def get(self, pk: uuid.UUID) -> Model | None:
         """Получает запись по первичному ключу."""
         return await self.session.get(self.model, pk)
@@ -31,14 +136,143 @@ class DatabaseRepo(Generic[Model]):
     async def filter(
         self,
         *expressions: BinaryExpression,
+        order_by: Sequence[ColumnElement] = (),
+        limit: int | None = None,
     ) -> list[Model]:
-        """Фильтрует записи по условиям."""
+        """Фильтрует записи по условиям; сортировка и лимит выполняются в SQL."""
         query = select(self.model)
         if expressions:
             query = query.where(*expressions)
+        if order_by:
+            query = query.order_by(*order_by)
+        if limit is not None:
+            query = query.limit(limit)
         result = await self.session.scalars(query)
         return list(result)
 
+    async def columns(
+        self,
+        columns: Sequence[ColumnElement],
+        *expressions: BinaryExpression,
+        group_by: Sequence[ColumnElement] = (),
+        order_by: Sequence[ColumnElement] = (),
+        limit: int | None = None,
+    ) -> list[tuple]:
+        """Читает только нужные колонки кортежами, без построения ORM-объектов.
+
+        С `group_by` колонки могут быть агрегатами по группам.
+        """
+        return await self.fetch(
+            self.select_columns(
+                columns,
+                *expressions,
+                group_by=group_by,
+                order_by=order_by,
+                limit=limit,
+            )
+        )
+
+    def select_columns(
+        self,
+        columns: Sequence[ColumnElement],
+        *expressions: BinaryExpression,
+        group_by: Sequence[ColumnElement] = (),
+        order_by: Sequence[ColumnElement] = (),
+        limit: int | None = None,
+    ) -> Select:
+        """Строит SELECT колонок модели, не выполняя его (например, для подзапроса)."""
+        query = select(*columns).select_from(self.model)
+        if expressions:
+            query = query.where(*expressions)
+        if group_by:
+            query = query.group_by(*group_by)
+        if order_by:
+            query = query.order_by(*order_by)
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
+    async def fetch(self, query: Select) -> list[tuple]:
+        """Выполняет готовый SELECT и возвращает строки кортежами."""
+        result = await self.session.execute(query)
+        return [tuple(row) for row in result]
+
+    async def iter_columns(
+        self,
+        columns: Sequence[ColumnElement],
+        *expressions: BinaryExpression,
+        order_by: Sequence[ColumnElement] = (),
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[list[tuple]]:
+        """Читает колонки пачками по `chunk_size` через серверный курсор."""
+        query = select(*columns).select_from(self.model)
+        if expressions:
+            query = query.where(*expressions)
+        if order_by:
+            query = query.order_by(*order_by)
+
+        result = await self.session.stream(
+            query.execution_options(yield_per=chunk_size)
+        )
+        async for partition in result.partitions(chunk_size):
+            yield [tuple(row) for row in partition]
+
+    async def paginate(
+        self,
+        *expressions: BinaryExpression,
+        key: Sequence[Column],
+        limit: int,
+        after: Sequence[Any] | None = None,
+        descending: bool = True,
+    ) -> tuple[list[Model], tuple | None]:
+        """Keyset-пагинация по уникальному ключу `key`.
+
+        Возвращает страницу и значения ключа её последней записи, если есть
+        следующая страница (их передают в `after` для следующего запроса).
+        """
+        query = select(self.model)
+        if expressions:
+            query = query.where(*expressions)
+        if after is not None:
+            position = tuple_(*key)
+            bound = tuple_(
+                *(literal(value, column.type) for value, column in zip(after, key))
+            )
+            query = query.where(position < bound if descending else position > bound)
+
+        query = query.order_by(
+            *(column.desc() if descending else column.asc() for column in key)
+        ).limit(limit + 1)
+
+        rows = list(await self.session.scalars(query))
+        if len(rows) <= limit:
+            return rows, None
+
+        rows = rows[:limit]
+        return rows, tuple(getattr(rows[-1], column.key) for column in key)
+
+    async def scalar(
+        self,
+        expression: ColumnElement,
+        *expressions: BinaryExpression,
+    ) -> Any:
+        """Вычисляет одно значение (например, агрегат) по условиям."""
+        query = select(expression).select_from(self.model)
+        if expressions:
+            query = query.where(*expressions)
+        return await self.session.scalar(query)
+
+    async def distinct(
+        self,
+        column: ColumnElement,
+        *expressions: BinaryExpression,
+    ) -> list[Any]:
+        """Возвращает различные значения колонки по условиям."""
+        query = select(column).select_from(self.model).distinct()
+        if expressions:
+            query = query.where(*expressions)
+        return list(await self.session.scalars(query))
+
     async def update(self, instance: Model, data: dict) -> Model:
         """Обновляет существующую запись."""
         for key, value in data.items():
@@ -1,23 +1,153 @@
 from collections.abc import AsyncGenerator
 import logging
+import time
 
-from sqlalchemy import exc
-from sqlalchemy.pool import NullPool
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util.queue import AsyncAdaptedQueue
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
 
-from core.config import DB_URL
+from core.config import (
+    DB_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+)
 
 
 logger = logging.getLogger(__name__)
 
 
+class PoolStats:
+    """Counters for connection pool usage"""
+
+    def __init__(self):
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.waits = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_wait(self, seconds: float):
+        self.waits += 1
+        self.total_wait += seconds
+        self.max_wait = max(self.max_wait, seconds)
+
+    def as_dict(self) -> dict:
+        return {
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "avg_wait_ms": (
+                round(self.total_wait / self.waits * 1000, 3) if self.waits else 0.0
+            ),
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+        }
+
+
+engine: AsyncEngine | None = None
+session_factory: async_sessionmaker[AsyncSession] | None = None
+pool_stats = PoolStats()
+
+
+class _TimedQueue(AsyncAdaptedQueue):
+    """Очередь свободных соединений, замеряющая ожидание в ней"""
+
+    def get(self, block: bool = True, timeout: float | None = None):
+        started = time.perf_counter()
+        try:
+            return super().get(block, timeout)
+        finally:
+            pool_stats.record_wait(time.perf_counter() - started)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool, учитывающий только ожидание свободного соединения.
+
+    Установка нового соединения и pool_pre_ping происходят после выхода из
+    очереди и в ожидание не входят.
+    """
+
+    _queue_class = _TimedQueue
+
+
+def init_engine(url: str = DB_URL) -> AsyncEngine:
+    """Create the process-wide engine and session factory"""
+    global engine, session_factory
+
+    if engine is not None:
+        return engine
+
+    engine = create_async_engine(
+        url,
+        future=True,
+        poolclass=TimedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        pool_stats.connects += 1
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        pool_stats.checkouts += 1
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        pool_stats.checkins += 1
+
+    logger.info(
+        f"Database engine created (pool_size={DB_POOL_SIZE}, max_overflow={DB_MAX_OVERFLOW})"
+    )
+    return engine
+
+
+async def dispose_engine():
+    """Close all pooled connections"""
+    global engine, session_factory
+
+    if engine is None:
+        return
+
+    await engine.dispose()
+    engine = None
+    session_factory = None
+    logger.info("Database engine disposed")
+
+
+def get_pool_status() -> dict:
+    """Current pool occupancy together with checkout/wait counters"""
+    if engine is None:
+        return {"initialized": False}
+
+    pool = engine.pool
+    return {
+        "initialized": True,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        **pool_stats.as_dict(),
+    }
+
+
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
-    engine = create_async_engine(DB_URL, future=True, poolclass=NullPool)
-    factory = async_sessionmaker(engine)
+    if session_factory is None:
+        init_engine()
 
-    async with factory() as session:
+    async with session_factory() as session:
         yield session
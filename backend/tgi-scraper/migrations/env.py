@@ -10,6 +10,8 @@ from alembic import context
 
 from db.models import Base
 from db.models.stats import *
+from db.models.jobs import *
+from db.models.watchlist import *
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,71 @@
+"""Normalize watchlist identifiers
+
+Revision ID: 3a6b1d4cb615
+Revises: ca8121779777
+Create Date: 2026-10-18 19:28:23.891897
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3a6b1d4cb615"
+down_revision: Union[str, None] = "ca8121779777"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _normalize(identifier: str) -> str:
+    # normalize_channel_identifier as of this revision
+    identifier = identifier.strip()
+    for prefix in ("https://", "http://"):
+        identifier = identifier.removeprefix(prefix)
+    for prefix in ("t.me/", "telegram.me/"):
+        identifier = identifier.removeprefix(prefix)
+    return identifier.strip("/").lstrip("@").lower()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    watchlist = sa.table(
+        "watchlist",
+        sa.column("channel_identifier", sa.String()),
+        sa.column("created_at", sa.DateTime()),
+    )
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(watchlist.c.channel_identifier).order_by(
+            watchlist.c.created_at, watchlist.c.channel_identifier
+        )
+    ).scalars()
+
+    # of several spellings of one channel the earliest added row is kept
+    kept = {}
+    duplicates = []
+    for identifier in rows:
+        normalized = _normalize(identifier)
+        if normalized in kept:
+            duplicates.append(identifier)
+        else:
+            kept[normalized] = identifier
+
+    if duplicates:
+        connection.execute(
+            watchlist.delete().where(watchlist.c.channel_identifier.in_(duplicates))
+        )
+    for normalized, identifier in kept.items():
+        if normalized != identifier:
+            connection.execute(
+                watchlist.update()
+                .where(watchlist.c.channel_identifier == identifier)
+                .values(channel_identifier=normalized)
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # original spellings are not kept, identifiers stay normalized
@@ -0,0 +1,36 @@
+"""Channel stats lower(username) index
+
+Revision ID: 5f0c2e8a7d41
+Revises: 3a6b1d4cb615
+Create Date: 2026-10-18 20:41:07.512384
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5f0c2e8a7d41"
+down_revision: Union[str, None] = "3a6b1d4cb615"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_channel_stats_username_lower_scraped_at",
+        "channel_stats",
+        [sa.text("lower(username)"), sa.literal_column("scraped_at DESC")],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_channel_stats_username_lower_scraped_at", table_name="channel_stats"
+    )
@@ -0,0 +1,112 @@
+"""Message stats upsert and history
+
+Revision ID: 68a4426f5241
+Revises: 012b653853b9
+Create Date: 2026-10-18 18:31:18.995200
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "68a4426f5241"
+down_revision: Union[str, None] = "012b653853b9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "message_stats_history",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("channel_id", sa.BigInteger(), nullable=False),
+        sa.Column("message_id", sa.BigInteger(), nullable=False),
+        sa.Column("scraped_at", sa.DateTime(), nullable=False),
+        sa.Column("views", sa.Integer(), nullable=True),
+        sa.Column("forwards", sa.Integer(), nullable=True),
+        sa.Column("replies", sa.Integer(), nullable=True),
+        sa.Column("reactions", sa.JSON(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_message_stats_history_channel_id_message_id",
+        "message_stats_history",
+        ["channel_id", "message_id", "scraped_at"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_message_stats_history_channel_id_scraped_at",
+        "message_stats_history",
+        ["channel_id", "scraped_at"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_channel_stats_channel_id_scraped_at",
+        "channel_stats",
+        ["channel_id", sa.literal_column("scraped_at DESC")],
+        unique=False,
+    )
+
+    # every existing snapshot row becomes history; message_stats keeps the latest one
+    op.execute(
+        """
+        INSERT INTO message_stats_history
+            (id, channel_id, message_id, scraped_at, views, forwards, replies, reactions)
+        SELECT id, channel_id, message_id, scraped_at, views, forwards, replies, reactions
+        FROM message_stats
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM message_stats
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY channel_id, message_id
+                    ORDER BY scraped_at DESC, id DESC
+                ) AS rn
+                FROM message_stats
+            ) ranked
+            WHERE rn > 1
+        )
+        """
+    )
+    op.create_index(
+        "ix_message_stats_channel_id_message_id",
+        "message_stats",
+        ["channel_id", "message_id"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_message_stats_channel_id_message_id", table_name="message_stats")
+    op.execute(
+        """
+        INSERT INTO message_stats
+            (id, channel_id, message_id, date, scraped_at, views, forwards, replies,
+             reactions, text, media_type, has_media)
+        SELECT h.id, h.channel_id, h.message_id, m.date, h.scraped_at, h.views,
+               h.forwards, h.replies, h.reactions, m.text, m.media_type, m.has_media
+        FROM message_stats_history h
+        JOIN message_stats m
+            ON m.channel_id = h.channel_id AND m.message_id = h.message_id
+        WHERE h.scraped_at <> m.scraped_at
+        """
+    )
+    op.drop_index("ix_channel_stats_channel_id_scraped_at", table_name="channel_stats")
+    op.drop_index(
+        "ix_message_stats_history_channel_id_scraped_at",
+        table_name="message_stats_history",
+    )
+    op.drop_index(
+        "ix_message_stats_history_channel_id_message_id",
+        table_name="message_stats_history",
+    )
+    op.drop_table("message_stats_history")
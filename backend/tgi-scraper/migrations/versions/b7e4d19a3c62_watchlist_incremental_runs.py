@@ -0,0 +1,32 @@
+"""Watchlist incremental runs counter
+
+Revision ID: b7e4d19a3c62
+Revises: 5f0c2e8a7d41
+Create Date: 2026-10-18 22:10:43.281907
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e4d19a3c62"
+down_revision: Union[str, None] = "5f0c2e8a7d41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # NULL makes the next scheduled refresh of every existing channel a full one
+    op.add_column(
+        "watchlist", sa.Column("incremental_runs", sa.Integer(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("watchlist", "incremental_runs")
@@ -0,0 +1,46 @@
+"""Channel stats incremental flag
+
+Revision ID: ca8121779777
+Revises: 884879dd1f62
+Create Date: 2026-10-18 19:12:30.137871
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "ca8121779777"
+down_revision: Union[str, None] = "884879dd1f62"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "channel_stats",
+        sa.Column(
+            "incremental", sa.Boolean(), server_default=sa.false(), nullable=False
+        ),
+    )
+
+    # the flag used to live only in recent_activity
+    channel_stats = sa.table(
+        "channel_stats",
+        sa.column("incremental", sa.Boolean()),
+        sa.column("recent_activity", sa.JSON()),
+    )
+    op.execute(
+        channel_stats.update()
+        .where(channel_stats.c.recent_activity["incremental"].as_boolean())
+        .values(incremental=True)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("channel_stats", "incremental")
@@ -0,0 +1,137 @@
+"""Compact message metric history
+
+Revision ID: d97ac716f72a
+Revises: 68a4426f5241
+Create Date: 2026-10-18 18:36:21.621869
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d97ac716f72a"
+down_revision: Union[str, None] = "68a4426f5241"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def distinct_from(left: str, right: str) -> str:
+    """Null-safe inequality for the current dialect"""
+    if op.get_bind().dialect.name == "sqlite":
+        return f"{left} IS NOT {right}"
+    return f"{left} IS DISTINCT FROM {right}"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index(
+        "ix_message_stats_history_channel_id_scraped_at",
+        table_name="message_stats_history",
+    )
+    op.drop_index(
+        "ix_message_stats_history_channel_id_message_id",
+        table_name="message_stats_history",
+    )
+    op.rename_table("message_stats_history", "message_stats_history_old")
+
+    op.create_table(
+        "message_stats_history",
+        sa.Column("channel_id", sa.BigInteger(), nullable=False),
+        sa.Column("message_id", sa.BigInteger(), nullable=False),
+        sa.Column("scraped_at", sa.DateTime(), nullable=False),
+        sa.Column("views", sa.Integer(), nullable=True),
+        sa.Column("forwards", sa.Integer(), nullable=True),
+        sa.Column("replies", sa.Integer(), nullable=True),
+        sa.Column("reactions", sa.JSON(), nullable=True),
+        sa.PrimaryKeyConstraint("channel_id", "message_id", "scraped_at"),
+    )
+    op.create_index(
+        "ix_message_stats_history_channel_id_scraped_at",
+        "message_stats_history",
+        ["channel_id", "scraped_at"],
+        unique=False,
+    )
+
+    # keep the first snapshot of every post and then only snapshots whose counters changed
+    changed = " OR ".join(
+        [
+            distinct_from("views", "prev_views"),
+            distinct_from("forwards", "prev_forwards"),
+            distinct_from("replies", "prev_replies"),
+            distinct_from("reactions_text", "prev_reactions"),
+        ]
+    )
+    op.execute(
+        f"""
+        INSERT INTO message_stats_history
+            (channel_id, message_id, scraped_at, views, forwards, replies, reactions)
+        SELECT channel_id, message_id, scraped_at, views, forwards, replies, reactions
+        FROM (
+            SELECT channel_id, message_id, scraped_at, views, forwards, replies,
+                   reactions, CAST(reactions AS TEXT) AS reactions_text,
+                   row_number() OVER w AS rn,
+                   lag(views) OVER w AS prev_views,
+                   lag(forwards) OVER w AS prev_forwards,
+                   lag(replies) OVER w AS prev_replies,
+                   lag(CAST(reactions AS TEXT)) OVER w AS prev_reactions
+            FROM message_stats_history_old
+            WINDOW w AS (PARTITION BY channel_id, message_id ORDER BY scraped_at)
+        ) snapshots
+        WHERE rn = 1 OR {changed}
+        """
+    )
+    op.drop_table("message_stats_history_old")
+
+
+def downgrade() -> None:
+    """Downgrade schema. Snapshots dropped as unchanged are not restored."""
+    if op.get_bind().dialect.name == "sqlite":
+        new_id = "lower(hex(randomblob(16)))"
+    else:
+        new_id = "gen_random_uuid()"
+
+    op.drop_index(
+        "ix_message_stats_history_channel_id_scraped_at",
+        table_name="message_stats_history",
+    )
+    op.rename_table("message_stats_history", "message_stats_history_compact")
+
+    op.create_table(
+        "message_stats_history",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("channel_id", sa.BigInteger(), nullable=False),
+        sa.Column("message_id", sa.BigInteger(), nullable=False),
+        sa.Column("scraped_at", sa.DateTime(), nullable=False),
+        sa.Column("views", sa.Integer(), nullable=True),
+        sa.Column("forwards", sa.Integer(), nullable=True),
+        sa.Column("replies", sa.Integer(), nullable=True),
+        sa.Column("reactions", sa.JSON(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute(
+        f"""
+        INSERT INTO message_stats_history
+            (id, channel_id, message_id, scraped_at, views, forwards, replies, reactions)
+        SELECT {new_id}, channel_id, message_id, scraped_at, views, forwards, replies,
+               reactions
+        FROM message_stats_history_compact
+        """
+    )
+    op.drop_table("message_stats_history_compact")
+
+    op.create_index(
+        "ix_message_stats_history_channel_id_message_id",
+        "message_stats_history",
+        ["channel_id", "message_id", "scraped_at"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_message_stats_history_channel_id_scraped_at",
+        "message_stats_history",
+        ["channel_id", "scraped_at"],
+        unique=False,
+    )
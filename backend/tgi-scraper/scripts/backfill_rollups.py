@@ -0,0 +1,32 @@
+"""Заполнение почасовых и посуточных роллапов по уже накопленным сырым данным.
+
+Запуск из каталога сервиса:
+
+    python -m scripts.backfill_rollups
+    python -m scripts.backfill_rollups --channel-id 1234567890 --channel-id 42
+
+Без `--channel-id` пересчитываются все каналы, встречающиеся в channel_stats
+и message_stats. Повторный запуск безопасен: роллапы перезаписываются upsert'ом.
+"""
+
+import argparse
+import asyncio
+import logging
+
+from app.services.rollups import ChannelRollups
+from db.session import dispose_engine
+
+
+async def main(args: argparse.Namespace):
+    try:
+        written = await ChannelRollups().backfill(args.channel_id)
+        print(f"Backfilled {written} rollups")
+    finally:
+        await dispose_engine()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--channel-id", type=int, action="append")
+    asyncio.run(main(parser.parse_args()))
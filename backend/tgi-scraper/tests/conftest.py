@@ -0,0 +1,21 @@
+import pytest
+
+from db.models.stats import Base
+import db.models.jobs  # noqa: F401
+import db.models.watchlist  # noqa: F401
+from db.session import dispose_engine, init_engine
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def database(tmp_path):
+    """Свежая SQLite-база со схемой из моделей на время теста"""
+    engine = init_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    yield engine
+    await dispose_engine()
@@ -0,0 +1,95 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from app.services.analytics import (
+    ChannelAnalytics,
+    HistoryColumns,
+    MessageColumns,
+    view_decay,
+)
+from db.models.stats import MessageStats, MessageStatsHistory
+from db.uow import get_uow
+
+pytestmark = pytest.mark.anyio
+
+CHANNEL_ID = 1001
+POSTED = datetime(2026, 1, 15, 10, 0)
+
+
+@pytest.fixture
+def berlin_time(monkeypatch):
+    """Сервер в UTC+1: scraped_at пишется локальным временем"""
+    monkeypatch.setenv("TZ", "Europe/Berlin")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def post(message_id: int, views, reactions, media_type) -> dict:
+    return {
+        "channel_id": CHANNEL_ID,
+        "message_id": message_id,
+        "date": POSTED,
+        "scraped_at": POSTED,
+        "views": views,
+        "forwards": None,
+        "replies": 1,
+        "reactions": reactions,
+        "media_type": media_type,
+    }
+
+
+async def test_engagement_from_stored_posts(database):
+    async with get_uow() as uow:
+        repo = await uow.get_repo(MessageStats)
+        await repo.bulk_create(
+            [
+                post(1, 100, {"👍": 3, "🔥": 1}, None),
+                post(2, None, None, "photo"),
+                post(3, 300, {"👍": 5}, "photo"),
+            ]
+        )
+        await uow.commit()
+
+    result = await ChannelAnalytics().get_engagement(CHANNEL_ID)
+
+    assert result["posts"] == 3
+    assert result["views"] == {
+        "total": 400,
+        "mean": 200.0,
+        "median": 200.0,
+        "p90": 280.0,
+    }
+    assert result["reaction_mix"] == [
+        {"reaction": "👍", "count": 8, "share": 0.8889},
+        {"reaction": "🔥", "count": 1, "share": 0.1111},
+    ]
+    assert {item["media_type"]: item["posts"] for item in result["media"]} == {
+        "photo": 2,
+        "text": 1,
+    }
+    assert [item["message_id"] for item in result["top_posts"]] == [1, 3]
+
+
+async def test_empty_channel_has_no_engagement(database):
+    assert await ChannelAnalytics().get_engagement(CHANNEL_ID) is None
+
+
+def test_view_decay_ages_posts_from_local_snapshot_times(berlin_time):
+    posted = int((POSTED - datetime(1970, 1, 1)).total_seconds())
+    columns = MessageColumns.from_arrays(
+        [[1], [posted], [1000], [0], [0], [0], ["text"]], []
+    )
+    # 12:30 по Берлину — 11:30 UTC, через полтора часа после публикации
+    scraped = posted + int(2.5 * 3600)
+    history = HistoryColumns.from_arrays([[1], [scraped], [500]])
+
+    decay = {
+        point["age_hours"]: point["samples"] for point in view_decay(columns, history)
+    }
+
+    assert decay[2] == 1
+    assert decay[4] == 0
@@ -0,0 +1,67 @@
+import pytest
+
+from app.services.client_pool import TelegramClientPool
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeSessionManager:
+    async def download_session(self, session_key):
+        pass
+
+    async def upload_session(self, session_key):
+        pass
+
+    def get_session_path(self, session_key):
+        return f"/tmp/{session_key}"
+
+
+class FakeClient:
+    def __init__(self, session_path):
+        self.session_path = session_path
+        self.connected = False
+
+    async def connect(self):
+        self.connected = True
+
+    async def disconnect(self):
+        self.connected = False
+
+    def is_connected(self):
+        return self.connected
+
+    async def is_user_authorized(self):
+        return True
+
+
+@pytest.fixture
+def pool():
+    return TelegramClientPool(
+        FakeSessionManager(), ["first.session", "second.session"], FakeClient
+    )
+
+
+async def test_repeated_initialize_keeps_one_account_per_session(pool):
+    await pool.initialize()
+    accounts = list(pool.accounts)
+
+    await pool.initialize()
+
+    assert [account.session_key for account in pool.accounts] == [
+        "first.session",
+        "second.session",
+    ]
+    assert pool.accounts == accounts
+
+
+async def test_initialize_reconnects_dropped_clients(pool):
+    await pool.initialize()
+    dropped = pool.accounts[0]
+    await dropped.client.disconnect()
+
+    await pool.initialize()
+
+    assert len(pool.accounts) == 2
+    assert pool.accounts[0] is not dropped
+    assert pool.accounts[0].client.is_connected()
+    assert pool.accounts[1].client.is_connected()
@@ -0,0 +1,56 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from api.router import router
+from app.services.telegram_scraper import TelegramScraper
+
+pytestmark = pytest.mark.anyio
+
+
+def encode(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def test_cursor_round_trip():
+    scraped_at = datetime(2026, 10, 18, 12, 30, 15, 250)
+    stat_id = uuid.uuid4()
+
+    cursor = TelegramScraper._encode_history_cursor(scraped_at, stat_id)
+
+    assert TelegramScraper._decode_history_cursor(cursor) == (scraped_at, stat_id)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        encode({"scraped_at": "2026-10-18T12:30:15"}),
+        encode(["2026-10-18T12:30:15"]),
+        encode([20261018, str(uuid.uuid4())]),
+        encode(["2026-10-18T12:30:15", 42]),
+        encode(["2026-10-18T12:30:15", ["nested"]]),
+    ],
+)
+def test_invalid_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        TelegramScraper._decode_history_cursor(cursor)
+
+
+async def test_history_route_rejects_invalid_cursor():
+    app = FastAPI()
+    app.include_router(router)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get(
+            "/stats/1", params={"cursor": encode(["2026-10-18T12:30:15", 42])}
+        )
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Invalid cursor")
@@ -0,0 +1,150 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import Select, event, select, text
+
+from app.services.telegram_scraper import TelegramScraper
+from db.models.stats import (
+    ChannelRollup,
+    ChannelStats,
+    MessageStats,
+    MessageStatsHistory,
+)
+
+pytestmark = pytest.mark.anyio
+
+CHANNEL_ID = 1
+SINCE = datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def statements(database):
+    """SELECT'ы, выполненные за время теста, с их параметрами"""
+    executed = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            executed.append((statement, parameters))
+
+    event.listen(database.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(database.sync_engine, "before_cursor_execute", record)
+
+
+async def query_plan(database, statement: str, parameters=()) -> str:
+    async with database.connect() as connection:
+        result = await connection.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {statement}", parameters
+        )
+        return "\n".join(row[-1] for row in result)
+
+
+async def channel_stats_plans(database, statements) -> list[str]:
+    return [
+        await query_plan(database, statement, parameters)
+        for statement, parameters in list(statements)
+        if "FROM channel_stats" in statement
+    ]
+
+
+def assert_searches(plan: str, index: str):
+    assert f"USING INDEX {index}" in plan or f"USING COVERING INDEX {index}" in plan
+    assert "SCAN channel_stats" not in plan
+
+
+async def test_history_pages_use_the_channel_index(database, statements):
+    scraper = TelegramScraper()
+    cursor = scraper._encode_history_cursor(
+        datetime(2026, 1, 1), "00000000-0000-0000-0000-000000000001"
+    )
+
+    await scraper.get_channel_history(CHANNEL_ID, limit=10)
+    await scraper.get_channel_history(CHANNEL_ID, limit=10, cursor=cursor)
+
+    plans = await channel_stats_plans(database, statements)
+    assert len(plans) == 2
+    for plan in plans:
+        assert_searches(plan, "ix_channel_stats_channel_id_scraped_at")
+
+
+async def test_snapshot_lookups_use_an_index(database, statements):
+    scraper = TelegramScraper()
+
+    await scraper.get_recent_snapshot("@DurovChannel", limit_messages=20, max_age=60)
+    scraper.entity_cache.get_channel_id = lambda identifier: CHANNEL_ID
+    await scraper.get_recent_snapshot("@DurovChannel", limit_messages=20, max_age=60)
+
+    by_username, by_channel_id = await channel_stats_plans(database, statements)
+    assert_searches(by_username, "ix_channel_stats_username_lower_scraped_at")
+    assert_searches(by_channel_id, "ix_channel_stats_channel_id_scraped_at")
+
+
+HOT_QUERIES: list[tuple[str, str, Select]] = [
+    (
+        "latest metrics of a message",
+        "ix_message_stats_channel_id_message_id",
+        select(MessageStats).where(
+            MessageStats.channel_id == CHANNEL_ID, MessageStats.message_id == 42
+        ),
+    ),
+    (
+        "newest messages of a channel",
+        "ix_message_stats_channel_id_message_id",
+        select(MessageStats.message_id)
+        .where(MessageStats.channel_id == CHANNEL_ID)
+        .order_by(MessageStats.message_id.desc())
+        .limit(100),
+    ),
+    (
+        "metric history of a message",
+        "sqlite_autoindex_message_stats_history_1",
+        select(MessageStatsHistory)
+        .where(
+            MessageStatsHistory.channel_id == CHANNEL_ID,
+            MessageStatsHistory.message_id == 42,
+        )
+        .order_by(MessageStatsHistory.scraped_at),
+    ),
+    (
+        "metric changes of a channel since a date",
+        "ix_message_stats_history_channel_id_scraped_at",
+        select(MessageStatsHistory).where(
+            MessageStatsHistory.channel_id == CHANNEL_ID,
+            MessageStatsHistory.scraped_at >= SINCE,
+        ),
+    ),
+    (
+        "posts of a channel in a time range",
+        "ix_message_stats_channel_id_date",
+        select(MessageStats).where(
+            MessageStats.channel_id == CHANNEL_ID, MessageStats.date >= SINCE
+        ),
+    ),
+    (
+        "rollup series of a channel",
+        "sqlite_autoindex_channel_rollups_1",
+        select(ChannelRollup)
+        .where(
+            ChannelRollup.channel_id == CHANNEL_ID,
+            ChannelRollup.granularity == "hour",
+            ChannelRollup.bucket_start >= SINCE,
+        )
+        .order_by(ChannelRollup.bucket_start.desc())
+        .limit(168),
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "index, query",
+    [query[1:] for query in HOT_QUERIES],
+    ids=[q[0] for q in HOT_QUERIES],
+)
+async def test_hot_query_uses_its_index(database, index, query):
+    sql = str(
+        query.compile(dialect=database.dialect, compile_kwargs={"literal_binds": True})
+    )
+
+    plan = await query_plan(database, sql)
+
+    assert f"INDEX {index}" in plan, plan
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+import pytest
+
+from app.services.rollups import GRANULARITY_HOUR, ChannelRollups
+from db.models.stats import ChannelStats
+from db.uow import get_uow
+
+pytestmark = pytest.mark.anyio
+
+CHANNEL_ID = 1001
+
+
+async def save_snapshots(*snapshots: tuple[datetime, int, bool]):
+    async with get_uow() as uow:
+        repo = await uow.get_repo(ChannelStats)
+        await repo.bulk_create(
+            [
+                {
+                    "channel_id": CHANNEL_ID,
+                    "title": "Channel",
+                    "scraped_at": scraped_at,
+                    "subscribers_count": subscribers,
+                    "incremental": incremental,
+                    "recent_activity": {"incremental": incremental},
+                }
+                for scraped_at, subscribers, incremental in snapshots
+            ]
+        )
+        await uow.commit()
+
+
+async def test_incremental_snapshots_feed_the_subscriber_series(database):
+    await save_snapshots(
+        (datetime(2026, 1, 1, 10, 15), 100, False),
+        (datetime(2026, 1, 1, 11, 15), 110, True),
+        (datetime(2026, 1, 1, 11, 45), 115, True),
+    )
+    rollups = ChannelRollups()
+
+    await rollups.backfill([CHANNEL_ID])
+    series = await rollups.get_series(CHANNEL_ID, GRANULARITY_HOUR)
+
+    assert [
+        (rollup.bucket_start.hour, rollup.snapshots, rollup.subscribers_close)
+        for rollup in series
+    ] == [(10, 1, 100), (11, 2, 115)]
+    assert series[1].subscribers_delta == 15
@@ -0,0 +1,77 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+import app.services.s3_session_manager as s3_session_manager
+from app.services.s3_session_manager import S3SessionManager
+
+pytestmark = pytest.mark.anyio
+
+SESSION_KEY = "accounts/first.session"
+
+
+class SlowS3Client:
+    """Фейковый S3: загрузка читает файл и держит поток `latency` секунд"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.uploads: list[bytes] = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def upload_file(self, local_path, bucket, key):
+        with open(local_path, "rb") as f:
+            data = f.read()
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.latency)
+        with self._lock:
+            self.active -= 1
+            self.uploads.append(data)
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        s3_session_manager, "LOCAL_SESSION_PATH", str(tmp_path / "default.session")
+    )
+    manager = S3SessionManager(upload_interval=60)
+    manager.s3_client = SlowS3Client(latency=0.2)
+    manager._initialized = True
+    return manager
+
+
+def write_session(manager: S3SessionManager, data: bytes):
+    path = manager.get_session_path(SESSION_KEY)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+async def test_flush_waits_for_the_running_upload(manager):
+    write_session(manager, b"before")
+    manager.schedule_upload(SESSION_KEY)
+    while not manager.s3_client.active:
+        await asyncio.sleep(0.01)
+
+    write_session(manager, b"after")
+    await manager.flush([SESSION_KEY])
+
+    assert manager.s3_client.uploads == [b"before", b"after"]
+    assert manager.s3_client.max_active == 1
+    assert not manager._pending and not manager._uploading
+
+
+def test_session_paths_keep_the_key_prefix(manager):
+    first = manager.get_session_path("a/account.session")
+    second = manager.get_session_path("b/account.session")
+
+    assert first != second
+    assert first.endswith(os.path.join("a", "account.session"))
+    with pytest.raises(ValueError):
+        manager.get_session_path("../account.session")
@@ -0,0 +1,90 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.services.entity_cache import normalize_channel_identifier
+from app.services.message_records import MessageBatch
+from app.services.telegram_scraper import TelegramScraper
+from db.models.stats import ChannelStats
+from db.uow import get_uow
+
+pytestmark = pytest.mark.anyio
+
+CHANNELS = {"first": 1001, "broken": 1002, "third": 1003}
+
+
+class FakeScraper(TelegramScraper):
+    """Скрапер без Telegram: каналы без постов; у broken снимок не проходит в базу"""
+
+    def __init__(self):
+        super().__init__()
+        self.fetches = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def _fetch_channel_stats(
+        self,
+        channel_identifier,
+        limit_messages=100,
+        incremental=False,
+        hot_window_hours=None,
+        progress=None,
+    ):
+        self.fetches.append(channel_identifier)
+        await self.release.wait()
+        channel_identifier = normalize_channel_identifier(channel_identifier)
+        return {
+            "channel_data": {
+                "channel_id": CHANNELS[channel_identifier],
+                "username": channel_identifier,
+                # title NOT NULL: запись этого канала упадёт на вставке
+                "title": None if channel_identifier == "broken" else "Channel",
+                "subscribers_count": 100,
+                "participants_count": 100,
+            },
+            "messages": MessageBatch(),
+            "limit_messages": limit_messages,
+            "incremental": incremental,
+            "scraped_at": datetime.now(),
+        }
+
+
+async def saved_channel_ids() -> set[int]:
+    async with get_uow() as uow:
+        repo = await uow.get_repo(ChannelStats)
+        return {snapshot.channel_id for snapshot in await repo.filter()}
+
+
+async def test_each_result_is_saved_before_it_is_streamed(database):
+    scraper = FakeScraper()
+    lines = []
+    async for line in scraper.scrape_batch(
+        [{"channel_identifier": identifier} for identifier in CHANNELS]
+    ):
+        if line["type"] == "result":
+            assert line["channel_id"] in await saved_channel_ids()
+        lines.append(line)
+
+    results = sorted(line["channel_id"] for line in lines if line["type"] == "result")
+    errors = [line["channel_identifier"] for line in lines if line["type"] == "error"]
+    assert results == [1001, 1003]
+    assert errors == ["broken"]
+    assert await saved_channel_ids() == {1001, 1003}
+
+
+async def test_batch_shares_the_scrape_of_a_concurrent_request(database):
+    scraper = FakeScraper()
+    scraper.release.clear()
+
+    single = asyncio.create_task(scraper.scrape_channel_stats("@First"))
+    await asyncio.sleep(0)
+    batch = asyncio.create_task(
+        anext(scraper.scrape_batch([{"channel_identifier": "first"}]))
+    )
+    await asyncio.sleep(0.01)
+    scraper.release.set()
+
+    assert (await single)["channel_id"] == (await batch)["channel_id"] == 1001
+    assert scraper.fetches == ["@First"]
+    assert scraper.scrape_flights.stats()["coalesced"] == 1
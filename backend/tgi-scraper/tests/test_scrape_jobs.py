@@ -0,0 +1,80 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.services.scrape_jobs import (
+    JOB_CANCELLED,
+    JOB_DONE,
+    JOB_RUNNING,
+    ScrapeJobManager,
+)
+
+pytestmark = pytest.mark.anyio
+
+REQUEST = {"channel_identifier": "durov", "limit_messages": 10}
+
+
+class FakeScraper:
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def scrape_channel_stats(self, channel_identifier, limit_messages, **kwargs):
+        await self.release.wait()
+        return {
+            "channel_id": 1,
+            "username": channel_identifier,
+            "title": "Durov",
+            "description": None,
+            "subscribers_count": 1,
+            "participants_count": 1,
+            "messages": [],
+            "scraped_at": datetime(2026, 1, 1),
+        }
+
+
+class PausedFinishManager(ScrapeJobManager):
+    """Останавливается между завершением скрапинга и записью итога"""
+
+    def __init__(self, scraper):
+        super().__init__(scraper)
+        self.finishing = asyncio.Event()
+        self.resume = asyncio.Event()
+
+    async def _finish(self, *args, **kwargs):
+        self.finishing.set()
+        await self.resume.wait()
+        await super()._finish(*args, **kwargs)
+
+
+async def test_cancel_stops_a_running_job(database):
+    scraper = FakeScraper()
+    manager = ScrapeJobManager(scraper)
+    job = await manager.submit(REQUEST)
+    run = asyncio.create_task(manager._run(job.id))
+    while job.id not in manager._running:
+        await asyncio.sleep(0)
+
+    cancelled = await manager.cancel(job.id)
+    await run
+
+    assert cancelled.status == JOB_CANCELLED
+    assert (await manager.get(job.id)).status == JOB_CANCELLED
+
+
+async def test_cancel_after_the_scrape_finished_keeps_the_result(database):
+    scraper = FakeScraper()
+    manager = PausedFinishManager(scraper)
+    job = await manager.submit(REQUEST)
+    run = asyncio.create_task(manager._run(job.id))
+    scraper.release.set()
+    await manager.finishing.wait()
+
+    cancelled = await manager.cancel(job.id)
+    manager.resume.set()
+    await run
+
+    assert cancelled.status == JOB_RUNNING
+    finished = await manager.get(job.id)
+    assert finished.status == JOB_DONE
+    assert finished.result["channel_id"] == 1
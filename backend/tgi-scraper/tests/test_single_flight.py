@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    results = await asyncio.gather(*(flights.run("key", work) for _ in range(3)))
+
+    assert results == [1, 1, 1]
+    assert flights.stats() == {"in_flight": 0, "started": 1, "coalesced": 2}
+
+
+async def test_cancelled_waiter_does_not_cancel_shared_call():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        return "done"
+
+    first = asyncio.create_task(flights.run("key", work))
+    second = asyncio.create_task(flights.run("key", work))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await second == "done"
+    assert first.cancelled()
+
+
+async def test_call_after_last_waiter_cancelled_starts_fresh():
+    flights = SingleFlight()
+    started = asyncio.Event()
+
+    async def hang():
+        started.set()
+        await asyncio.Event().wait()
+
+    async def work():
+        return "fresh"
+
+    waiter = asyncio.create_task(flights.run("key", hang))
+    await started.wait()
+    waiter.cancel()
+    await asyncio.sleep(0)
+    # ключ освобождается сразу, до того как отменённая задача завершится
+    assert await flights.run("key", work) == "fresh"
+
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert flights.stats()["in_flight"] == 0
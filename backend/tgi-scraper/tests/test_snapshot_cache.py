@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.telegram_scraper import TelegramScraper
+from db.models.stats import ChannelStats
+from db.uow import get_uow
+
+pytestmark = pytest.mark.anyio
+
+CHANNEL_ID = 1001
+
+
+async def save_snapshot(age: timedelta, limit_messages: int, incremental=False):
+    async with get_uow() as uow:
+        repo = await uow.get_repo(ChannelStats)
+        await repo.bulk_create(
+            [
+                {
+                    "channel_id": CHANNEL_ID,
+                    "username": "DurovChannel",
+                    "title": "Channel",
+                    "scraped_at": datetime.now() - age,
+                    "subscribers_count": limit_messages,
+                    "incremental": incremental,
+                    "recent_activity": {
+                        "limit_messages": limit_messages,
+                        "incremental": incremental,
+                    },
+                }
+            ]
+        )
+        await uow.commit()
+
+
+async def test_newest_covering_full_snapshot_is_served(database):
+    await save_snapshot(timedelta(minutes=30), limit_messages=200)
+    await save_snapshot(timedelta(minutes=20), limit_messages=50)
+    await save_snapshot(timedelta(minutes=10), limit_messages=10)
+    await save_snapshot(timedelta(minutes=5), limit_messages=100, incremental=True)
+
+    snapshot = await TelegramScraper().get_recent_snapshot(
+        "@durovchannel", limit_messages=20, max_age=3600
+    )
+
+    assert snapshot["from_cache"]
+    assert snapshot["subscribers_count"] == 50
+
+
+async def test_no_snapshot_when_none_is_fresh_enough(database):
+    await save_snapshot(timedelta(hours=2), limit_messages=100)
+
+    snapshot = await TelegramScraper().get_recent_snapshot(
+        "durovchannel", limit_messages=20, max_age=3600
+    )
+
+    assert snapshot is None
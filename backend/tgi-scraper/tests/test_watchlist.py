@@ -0,0 +1,108 @@
+from datetime import datetime
+
+import pytest
+
+from app.services.message_records import MessageBatch
+from app.services.scheduler import WatchlistScheduler
+from app.services.telegram_scraper import TelegramScraper
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def scheduler(database):
+    # add/remove/channels не обращаются к скраперу
+    return WatchlistScheduler(scraper=None)
+
+
+async def test_spellings_of_one_channel_share_one_entry(scheduler):
+    await scheduler.add("@DurovChannel", interval_seconds=600)
+    await scheduler.add("durovchannel", interval_seconds=900)
+    await scheduler.add("https://t.me/DurovChannel/", interval_seconds=1200)
+
+    channels = await scheduler.channels()
+
+    assert [channel.channel_identifier for channel in channels] == ["durovchannel"]
+    assert channels[0].interval_seconds == 1200
+
+
+async def test_remove_accepts_any_spelling(scheduler):
+    await scheduler.add("t.me/durovchannel", interval_seconds=600)
+
+    assert await scheduler.remove("@DurovChannel")
+    assert await scheduler.channels() == []
+    assert not await scheduler.remove("durovchannel")
+
+
+async def test_empty_identifier_is_rejected(scheduler):
+    with pytest.raises(ValueError):
+        await scheduler.add("https://t.me/@", interval_seconds=600)
+
+
+class FakeScraper(TelegramScraper):
+    """Скрапер без Telegram: канал без постов, снимок сохраняется как обычно"""
+
+    def __init__(self):
+        super().__init__()
+        self.incremental = []
+
+    async def _fetch_channel_stats(
+        self,
+        channel_identifier,
+        limit_messages=100,
+        incremental=False,
+        hot_window_hours=None,
+        progress=None,
+    ):
+        self.incremental.append(incremental)
+        return {
+            "channel_data": {
+                "channel_id": 1001,
+                "username": "DurovChannel",
+                "title": "Channel",
+                "subscribers_count": 100,
+                "participants_count": 100,
+            },
+            "messages": MessageBatch(),
+            "limit_messages": limit_messages,
+            "incremental": incremental,
+            "scraped_at": datetime.now(),
+        }
+
+
+async def scheduled_refresh(scheduler: WatchlistScheduler, identifier: str):
+    (channel,) = [
+        channel
+        for channel in await scheduler.channels()
+        if channel.channel_identifier == identifier
+    ]
+    await scheduler._refresh(
+        identifier, channel.limit_messages, channel.incremental_runs
+    )
+
+
+async def test_watched_channel_is_cached_after_one_refresh(database):
+    scraper = FakeScraper()
+    scheduler = WatchlistScheduler(scraper)
+    await scheduler.add("@DurovChannel", interval_seconds=600, limit_messages=50)
+
+    await scheduled_refresh(scheduler, "durovchannel")
+    snapshot = await scraper.get_recent_snapshot(
+        "durovchannel", limit_messages=50, max_age=3600
+    )
+
+    assert snapshot is not None
+    assert snapshot["from_cache"]
+
+
+async def test_every_nth_scheduled_refresh_is_full(database):
+    scraper = FakeScraper()
+    scheduler = WatchlistScheduler(scraper, full_refresh_every=3)
+    await scheduler.add("durovchannel", interval_seconds=600)
+
+    for _ in range(5):
+        await scheduled_refresh(scheduler, "durovchannel")
+    await scheduler.add("durovchannel", interval_seconds=600, limit_messages=200)
+    await scheduled_refresh(scheduler, "durovchannel")
+
+    assert scraper.incremental == [False, True, True, False, True, False]
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+import pytest
+
+from app.services.telegram_scraper import TelegramScraper
+from db.models.stats import ChannelWatermark
+from db.uow import get_uow
+
+pytestmark = pytest.mark.anyio
+
+CHANNEL_ID = 1001
+
+
+async def advance(scraper: TelegramScraper, last_message_id: int):
+    async with get_uow() as uow:
+        await scraper._update_watermark(
+            uow, CHANNEL_ID, last_message_id, datetime(2026, 1, 1, last_message_id)
+        )
+        await uow.commit()
+
+
+async def read_watermark() -> ChannelWatermark:
+    async with get_uow() as uow:
+        repo = await uow.get_repo(ChannelWatermark)
+        return await repo.get(CHANNEL_ID)
+
+
+async def test_watermark_only_moves_forward(database):
+    scraper = TelegramScraper()
+
+    await advance(scraper, 10)
+    await advance(scraper, 5)
+    watermark = await read_watermark()
+    assert (watermark.last_message_id, watermark.updated_at.hour) == (10, 10)
+
+    await advance(scraper, 20)
+    watermark = await read_watermark()
+    assert (watermark.last_message_id, watermark.updated_at.hour) == (20, 20)